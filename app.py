@@ -1,381 +1,502 @@
+import os
+import time
 import streamlit as st
-from logic import extract_text_from_pdf, extract_text_from_docx, extract_skills_with_openai, compare_skills, generate_score_explanation
+from config import get_api_key
+import metrics
+from jobs import FINISHED_STATUSES, JOB_POLL_INTERVAL, STAGES, JobQueue, WorkerPool
+from logic import get_openai_client, get_skill_vector_store, get_result_store
 
 # Set page config
 st.set_page_config(page_title="Resume Analyzer", layout="wide")
 
-# API key handling (update with your Streamlit secrets management)
-apiK = st.secrets['openai']['api_key']  # Corrected key path
+# API key handling: env, key file or Streamlit secrets (see config.resolve_api_key)
+try:
+    get_api_key()
+except RuntimeError as e:
+    st.error(str(e))
+    st.stop()
 
-# File upload section - Add visual feedback
-st.header("📁 Upload Documents", divider="rainbow")
-col1, col2 = st.columns(2)
-with col1:
-    resume_file = st.file_uploader("Upload Resume (PDF/DOCX)", type=["pdf", "docx"], 
-                                 help="Max file size: 5MB")
-with col2:
-    jd_file = st.file_uploader("Upload Job Description (PDF/DOCX)", type=["pdf", "docx"],
-                             help="Supported formats: PDF, Word documents")
+@st.cache_resource(show_spinner="Loading skill index...")
+def load_pipeline_resources():
+    """OpenAI client and skill index shared by every session on this server"""
+    return get_openai_client(), get_skill_vector_store()
 
-def process_uploaded_file(file):
-    """Handle uploaded file processing"""
-    if file is None:
-        return None
-    try:
-        if file.name.lower().endswith('.pdf'):
-            # Pass the file buffer directly
-            return extract_text_from_pdf(file)
-        elif file.name.lower().endswith('.docx'):
-            # Read bytes for DOCX processing
-            return extract_text_from_docx(file.getvalue())
-        else:
-            st.error(f"Unsupported file type: {file.name}")
-            return None
-            
-        if not text.strip():
-            st.error(f"Empty content in file: {file.name}")
-            return None
-            
-        return text
-    except Exception as e:
-        st.error(f"Error processing {file.name}: {str(e)}")
-        return None
+# Worker threads started inside the Streamlit server; set APP_WORKERS=0 when jobs are
+# processed by dedicated `python logic.py jobs worker` processes instead
+APP_WORKERS = int(os.environ.get("APP_WORKERS", "2"))
+STAGE_LABELS = {"parse": "Read documents", "extract": "Extract skills",
+                "score": "Score match", "explain": "Write assessment"}
 
-if resume_file and jd_file:
-    # Process documents
-    with st.spinner("Analyzing documents..."):
-        resume_text = process_uploaded_file(resume_file)
-        jd_text = process_uploaded_file(jd_file)
-        
-        # Add null checks before processing
-        if resume_text is None or jd_text is None:
-            st.error("Failed to extract text from one or more files. Please check the file formats.")
-            st.stop()  # Prevent further execution
-        
-        # Extract skills
-        try:
-            resume_skills = extract_skills_with_openai(resume_text)
-            jd_requirements = extract_skills_with_openai(jd_text)
-        except Exception as e:
-            st.error(f"Error analyzing documents: {str(e)}")
-            st.stop()
+@st.cache_resource
+def get_job_queue():
+    """Job queue shared by every session, with this server's worker pool if enabled"""
+    queue = JobQueue()
+    if APP_WORKERS:
+        WorkerPool(queue, threads=APP_WORKERS).start()
+    return queue
+
+def render_explanation_section(section):
+    """Render one '## ' section of the explanation markdown"""
+    parts = section.split('\n', 1)
+    if len(parts) > 1:
+        st.subheader(parts[0])
+        st.write(parts[1])
+    else:
+        st.write(section)
+
+def render_explanation_sections(chunks):
+    """Fill in each '## ' section as its text arrives and return the full explanation"""
+    text = ""
+    placeholders = []
+    for chunk in chunks:
+        text += chunk
+        sections = [section for section in text.split('## ') if section.strip()]
+        # Earlier sections are final once a later one starts; only redraw from the last known one
+        first_dirty = max(len(placeholders) - 1, 0)
+        while len(placeholders) < len(sections):
+            placeholders.append(st.empty())
+        for placeholder, section in zip(placeholders[first_dirty:], sections[first_dirty:]):
+            with placeholder.container():
+                render_explanation_section(section)
+    return text
+
+def render_match_analysis(comparison):
+    """Render the score card, score breakdown and requirement lists of a comparison"""
+    # Main Score Card - Full Width
+    with st.container(border=True):
+        st.markdown("""
+        <style>
+        .big-score {
+            font-size: 72px !important;
+            font-weight: bold;
+            text-align: center;
+            margin: 20px 0;
+        }
+        </style>
+        """, unsafe_allow_html=True)
         
-    # Display extracted skills
-    st.header("Extracted Requirements")
-    tab1, tab2 = st.tabs(["Resume Skills", "Job Description Requirements"])
-    
-    def display_skills(skills_data, title):
-        """Display skills data in a visual format"""
-        if 'error' in skills_data:
-            st.error(skills_data['error'])
-            return
+        score = comparison.get('overall_score', 0)
+        score_color = "red" if score < 50 else "orange" if score < 75 else "green"
         
-        with st.container(border=True):
-            st.subheader(f"🔍 {title}")
-            
-            # Technical Skills Section
-            with st.expander("📚 Technical Skills", expanded=True):
-                if skills_data.get('technical_skills'):
-                    cols = st.columns(3)
-                    for i, skill in enumerate(skills_data['technical_skills']):
-                        cols[i%3].success(f"• {skill}")
-                else:
-                    st.warning("No technical skills detected", icon="⚠️")
+        # Split into two columns for better layout
+        main_col, help_col = st.columns([3, 2])
+        with main_col:
+            st.markdown(f"""
+            <div style="text-align:center; padding:20px; background:linear-gradient(145deg, #f0f2f6, #ffffff);
+                        border-radius:15px; box-shadow:0 4px 6px rgba(0,0,0,0.1)">
+                <div style="font-size:24px; color:#666; margin-bottom:10px">Match Score</div>
+                <div class="big-score" style="color:{score_color}">{score:.1f}%</div>
+            </div>
+            """, unsafe_allow_html=True)
             
-            # Qualifications Section
-            with st.expander("🎓 Education & Qualifications", expanded=True):
-                if skills_data.get('qualifications'):
-                    for qual in skills_data['qualifications']:
-                        st.markdown(f"📌 {qual}")
-                else:
-                    st.warning("No qualifications detected", icon="⚠️")
+            # Add styled text above the progress bar
+            st.markdown(f"""
+                <div style='font-weight:900; font-size:24px; margin-top:25px; margin-bottom:10px; text-align:center'>
+                    {'🚀 IDEAL CANDIDATE' if score >= 90 else '📈 STRONG MATCH' if score >= 75 else '🤝 POTENTIAL CANDIDATE' if score >= 50 else '⚠️ SIGNIFICANT GAPS'}
+                </div>
+            """, unsafe_allow_html=True)
             
-            # Certifications Section
-            with st.expander("📜 Certifications", expanded=True):
-                if skills_data.get('certifications'):
-                    cols = st.columns(2)
-                    for i, cert in enumerate(skills_data['certifications']):
-                        cols[i%2].markdown(f"🏅 {cert}")
-                else:
-                    st.warning("No certifications detected", icon="⚠️")
-
-    with tab1:
-        display_skills(resume_skills, "Candidate Skills Overview")
-
-    with tab2:
-        display_skills(jd_requirements, "Job Requirements Breakdown")
-    
-    # Run comparison
-    if st.button("Run Comparison"):
-        with st.spinner("Calculating match..."):
-            comparison = compare_skills(resume_skills, jd_requirements)
+            # Progress bar without text parameter
+            st.progress(score/100)
         
-        st.header("Match Analysis", divider="rainbow")
-        
-        # Main Score Card - Full Width
-        with st.container(border=True):
+        with help_col:
+            st.subheader("📊 Interpretation Guide")
             st.markdown("""
-            <style>
-            .big-score {
-                font-size: 72px !important;
-                font-weight: bold;
-                text-align: center;
-                margin: 20px 0;
+            - **90-100%**: Ideal candidate 🏆
+            - **75-89%**: Strong match 💪
+            - **50-74%**: Potential candidate 🤝
+            - **<50%**: Significant gaps ❌
+            """)
+
+    # Dynamic Score Breakdown
+    with st.expander("🧮 Detailed Score Composition", expanded=True):
+        if 'score_breakdown' in comparison:
+            certs_required = comparison.get('certifications_required', False)
+            
+            max_weights = {
+                'technical_skills': 60 if not certs_required else 50,
+                'qualifications': 40 if not certs_required else 30,
+                'certifications': 20,
+                'bonuses': 10
             }
+
+            # Create equal columns with proper spacing
+            cols = st.columns(4 if certs_required else 3, gap="large")
+            
+            # Add custom styling for centering
+            st.markdown("""
+            <style>
+                .metric-container {
+                    display: flex;
+                    flex-direction: column;
+                    align-items: center;
+                    justify-content: center;
+                    padding: 15px;
+                    border-radius: 10px;
+                    background-color: rgba(255,255,255,0.1);
+                }
+                .metric-label {
+                    text-align: center !important;
+                    margin-bottom: 8px !important;
+                }
             </style>
             """, unsafe_allow_html=True)
-            
-            score = comparison.get('overall_score', 0)
-            score_color = "red" if score < 50 else "orange" if score < 75 else "green"
-            
-            # Split into two columns for better layout
-            main_col, help_col = st.columns([3, 2])
-            with main_col:
-                st.markdown(f"""
-                <div style="text-align:center; padding:20px; background:linear-gradient(145deg, #f0f2f6, #ffffff);
-                            border-radius:15px; box-shadow:0 4px 6px rgba(0,0,0,0.1)">
-                    <div style="font-size:24px; color:#666; margin-bottom:10px">Match Score</div>
-                    <div class="big-score" style="color:{score_color}">{score:.1f}%</div>
-                </div>
-                """, unsafe_allow_html=True)
-                
-                # Add styled text above the progress bar
-                st.markdown(f"""
-                    <div style='font-weight:900; font-size:24px; margin-top:25px; margin-bottom:10px; text-align:center'>
-                        {'🚀 IDEAL CANDIDATE' if score >= 90 else '📈 STRONG MATCH' if score >= 75 else '🤝 POTENTIAL CANDIDATE' if score >= 50 else '⚠️ SIGNIFICANT GAPS'}
-                    </div>
-                """, unsafe_allow_html=True)
+
+            for i, (category, score) in enumerate(comparison['score_breakdown'].items()):
+                if not certs_required and category == 'certifications':
+                    continue
                 
-                # Progress bar without text parameter
-                st.progress(score/100)
-            
-            with help_col:
-                st.subheader("📊 Interpretation Guide")
-                st.markdown("""
-                - **90-100%**: Ideal candidate 🏆
-                - **75-89%**: Strong match 💪
-                - **50-74%**: Potential candidate 🤝
-                - **<50%**: Significant gaps ❌
-                """)
-
-        # Dynamic Score Breakdown
-        with st.expander("🧮 Detailed Score Composition", expanded=True):
-            if 'score_breakdown' in comparison:
-                certs_required = comparison.get('certifications_required', False)
+                max_weight = max_weights.get(category, 100)
+                normalized_score = (score / max_weight) * 100 if max_weight > 0 else 0
                 
-                max_weights = {
-                    'technical_skills': 60 if not certs_required else 50,
-                    'qualifications': 40 if not certs_required else 30,
-                    'certifications': 20,
-                    'bonuses': 10
+                category_info = {
+                    'technical_skills': {"icon": "💻", "label": "Technical Skills"},
+                    'qualifications': {"icon": "🎓", "label": "Qualifications"},
+                    'certifications': {"icon": "📜", "label": "Certifications"},
+                    'bonuses': {"icon": "⭐", "label": "Bonuses"}
                 }
-
-                # Create equal columns with proper spacing
-                cols = st.columns(4 if certs_required else 3, gap="large")
                 
-                # Add custom styling for centering
-                st.markdown("""
-                <style>
-                    .metric-container {
-                        display: flex;
-                        flex-direction: column;
-                        align-items: center;
-                        justify-content: center;
-                        padding: 15px;
-                        border-radius: 10px;
-                        background-color: rgba(255,255,255,0.1);
-                    }
-                    .metric-label {
-                        text-align: center !important;
-                        margin-bottom: 8px !important;
-                    }
-                </style>
-                """, unsafe_allow_html=True)
-
-                for i, (category, score) in enumerate(comparison['score_breakdown'].items()):
-                    if not certs_required and category == 'certifications':
-                        continue
-                    
-                    max_weight = max_weights.get(category, 100)
-                    normalized_score = (score / max_weight) * 100 if max_weight > 0 else 0
-                    
-                    category_info = {
-                        'technical_skills': {"icon": "💻", "label": "Technical Skills"},
-                        'qualifications': {"icon": "🎓", "label": "Qualifications"},
-                        'certifications': {"icon": "📜", "label": "Certifications"},
-                        'bonuses': {"icon": "⭐", "label": "Bonuses"}
-                    }
-                    
-                    # Calculate column index based on certification presence
-                    col_idx = i if certs_required else i if i < 3 else i-1
-                    with cols[col_idx]:
-                        st.markdown(f"""
-                        <div class="metric-container">
-                            <div class="metric-label">
-                                {category_info[category]['icon']} {category_info[category]['label']}
-                            </div>
-                            <div style="font-size: 26px; font-weight: bold; margin: 8px 0;">
-                                {normalized_score:.1f}%
-                            </div>
-                            <div style="font-size: 12px; color: #666; text-align: center">
-                                Weight: {max_weight}%
-                            </div>
+                # Calculate column index based on certification presence
+                col_idx = i if certs_required else i if i < 3 else i-1
+                with cols[col_idx]:
+                    st.markdown(f"""
+                    <div class="metric-container">
+                        <div class="metric-label">
+                            {category_info[category]['icon']} {category_info[category]['label']}
+                        </div>
+                        <div style="font-size: 26px; font-weight: bold; margin: 8px 0;">
+                            {normalized_score:.1f}%
+                        </div>
+                        <div style="font-size: 12px; color: #666; text-align: center">
+                            Weight: {max_weight}%
                         </div>
-                        """, unsafe_allow_html=True)
-
-        # Requirements analysis with visual indicators
-        if comparison.get('missing_requirements'):
-            with st.container(border=True):
-                st.subheader("🔍 Gap Analysis", divider="red")
-                cols = st.columns(2)
-                with cols[0]:
-                    st.markdown("### ❌ Missing Requirements")
-                    st.caption("These key requirements from the JD are not fully met:")
-                    for item in comparison['missing_requirements']:
-                        st.error(f"• {item}", icon="🚫")
-                with cols[1]:
-                    if comparison.get('recommendations'):
-                        st.markdown("### 💡 Improvement Suggestions")
-                        for suggestion in comparison['recommendations']:
-                            st.info(f"✨ {suggestion}")
-
-        if comparison.get('matched_requirements'):
-            with st.container(border=True):
-                st.subheader("✅ Strengths & Matches", divider="green")
-                st.caption("These JD requirements are strongly matched:")
-                for item in comparison['matched_requirements']:
-                    # Use a container with columns for better alignment
-                    with st.container():
-                        cols = st.columns([1, 15])  # Adjusted column ratio
-                        with cols[0]:
-                            st.success("✔️", icon="✅")
-                        with cols[1]:
-                            st.markdown(f"""
-                            <div style="position: relative; top: -2px;">
-                                <b>{item}</b><br>
-                                <span style="color: #666; font-size: 0.9em">Perfect match with candidate profile</span>
-                            </div>
-                            """, unsafe_allow_html=True)
-
-        if 'error' in comparison:
-            st.error(f"🚨 Analysis error: {comparison['error']}", icon="⚠️")
-
-        # Add explanation section
-        with st.expander("📈 AI-Powered Match Breakdown", expanded=True):
-            with st.spinner("Generating detailed analysis..."):
-                # Generate explanation after displaying other results
-                score_explanation = generate_score_explanation(resume_skills, jd_requirements, comparison)
-
-                # Split explanation into sections 
-                sections = score_explanation.split('## ')
-                st.markdown("""
-                    <style>
-                    .analysis-header {
-                        background: var(--secondary-background-color);
-                        padding: 20px;
-                        border-radius: 15px;
-                        margin-bottom: 20px;
-                    }
-                    </style>
-                    
-                    <div class="analysis-header">
-                        <h2 style="margin:0;">🔍 AI-Powered Deep Analysis</h2>
-                        <p style="margin:0; color: var(--text-color)">Comprehensive breakdown of candidate suitability</p>
                     </div>
                     """, unsafe_allow_html=True)
-                    
-                    # Combined card container with bottom margin
-                with st.container(border=True):
-                    cols = st.columns(2)
-                    with cols[0]:
-                        st.markdown("### 🎯 Key Strengths")
-                        # Dynamic strengths from comparison results
-                        if comparison.get('matched_requirements'):
-                            for item in comparison['matched_requirements'][:3]:  # Top 3 matches
-                                st.success(f"✅ {item}")
-                        else:
-                            st.warning("No strong matches found", icon="⚠️")
-                            
-                        st.markdown("### 📉 Improvement Areas")
-                        # Dynamic gaps from comparison results
-                        if comparison.get('missing_requirements'):
-                            for item in comparison['missing_requirements'][:3]:  # Top 3 gaps
-                                st.error(f"⚠️ {item}")
-                        else:
-                            st.success("All key requirements met!", icon="🎉")
 
+    # Requirements analysis with visual indicators
+    if comparison.get('missing_requirements'):
+        with st.container(border=True):
+            st.subheader("🔍 Gap Analysis", divider="red")
+            cols = st.columns(2)
+            with cols[0]:
+                st.markdown("### ❌ Missing Requirements")
+                st.caption("These key requirements from the JD are not fully met:")
+                for item in comparison['missing_requirements']:
+                    st.error(f"• {item}", icon="🚫")
+            with cols[1]:
+                if comparison.get('recommendations'):
+                    st.markdown("### 💡 Improvement Suggestions")
+                    for suggestion in comparison['recommendations']:
+                        st.info(f"✨ {suggestion}")
+
+    if comparison.get('matched_requirements'):
+        with st.container(border=True):
+            st.subheader("✅ Strengths & Matches", divider="green")
+            st.caption("These JD requirements are strongly matched:")
+            for item in comparison['matched_requirements']:
+                # Use a container with columns for better alignment
+                with st.container():
+                    cols = st.columns([1, 15])  # Adjusted column ratio
+                    with cols[0]:
+                        st.success("✔️", icon="✅")
                     with cols[1]:
-                        st.markdown("### 🏆 Recommendation")
-                        # Dynamic recommendation based on score
-                        score = comparison.get('overall_score', 0)
-                        if score >= 90:
-                            rec_text = "🥇 Gold Tier Candidate - Ideal Hire"
-                            rec_details = "Strongly recommend for senior roles with leadership potential"
-                        elif score >= 75:
-                            rec_text = "🥈 Silver Tier Candidate - Strong Match" 
-                            rec_details = "Recommend for mid-level roles with growth opportunities"
-                        elif score >= 50:
-                            rec_text = "🥉 Bronze Tier Candidate - Potential Fit"
-                            rec_details = "Consider for junior roles with mentorship"
-                        else:
-                            rec_text = "🚫 Not Recommended - Significant Gaps"
-                            rec_details = "Doesn't meet minimum requirements"
-                            
                         st.markdown(f"""
-                        <div style="margin-bottom: 20px;">
-                            <div style="font-size:18px; font-weight:bold;">
-                                {rec_text}
-                            </div>
-                            <p style="margin:0; line-height:1.5;">
-                            {rec_details}<br>
-                            Score: {score:.1f}%
-                            </p>
+                        <div style="position: relative; top: -2px;">
+                            <b>{item}</b><br>
+                            <span style="color: #666; font-size: 0.9em">Perfect match with candidate profile</span>
                         </div>
                         """, unsafe_allow_html=True)
-                            
-                        st.markdown("### 📅 Next Steps")
-                        # Dynamic next steps based on score
-                        steps = []
-                        if score >= 75:
-                            steps = [
-                                "Schedule final interview with tech lead",
-                                "Request reference checks",
-                                "Prepare offer letter"
-                            ]
-                        elif score >= 50:
-                            steps = [
-                                "Conduct technical screening",
-                                "Review portfolio projects",
-                                "Schedule team interview"
-                            ]
-                        else:
-                            steps = [
-                                "Consider alternative candidates",
-                                "Provide constructive feedback",
-                                "Encourage re-application after upskilling"
-                            ]
-                        
-                        st.markdown("""
-                        <div style="margin-bottom: 20px;">
-                        • {}<br>
-                        • {}<br>
-                        • {}
-                        </div>
-                        """.format(*steps), unsafe_allow_html=True)
-                st.divider()
-                with st.container(border=False):
-                    st.markdown("### 📝 Detailed Assessment")
-                    # Split explanation into sections and format properly
-                    sections = score_explanation.split('## ')
-                    for section in sections:
-                        if section.strip():
-                            parts = section.split('\n', 1)
-                            if len(parts) > 1:
-                                st.subheader(parts[0])
-                                st.write(parts[1])
-                            else:
-                                st.write(section)
-                    
-
-        if 'error' in comparison:
-            st.error(f"🚨 Analysis error: {comparison['error']}", icon="⚠️") 
\ No newline at end of file
+
+def display_skills(skills_data, title):
+    """Display skills data in a visual format"""
+    if 'error' in skills_data:
+        st.error(skills_data['error'])
+        return
+
+    with st.container(border=True):
+        st.subheader(f"🔍 {title}")
+
+        # Technical Skills Section
+        with st.expander("📚 Technical Skills", expanded=True):
+            if skills_data.get('technical_skills'):
+                cols = st.columns(3)
+                for i, skill in enumerate(skills_data['technical_skills']):
+                    cols[i%3].success(f"• {skill}")
+            else:
+                st.warning("No technical skills detected", icon="⚠️")
+
+        # Qualifications Section
+        with st.expander("🎓 Education & Qualifications", expanded=True):
+            if skills_data.get('qualifications'):
+                for qual in skills_data['qualifications']:
+                    st.markdown(f"📌 {qual}")
+            else:
+                st.warning("No qualifications detected", icon="⚠️")
+            if skills_data.get('years_of_experience') is not None:
+                st.caption(f"Experience: {skills_data['years_of_experience']} years")
+
+        # Certifications Section
+        with st.expander("📜 Certifications", expanded=True):
+            if skills_data.get('certifications'):
+                cols = st.columns(2)
+                for i, cert in enumerate(skills_data['certifications']):
+                    cols[i%2].markdown(f"🏅 {cert}")
+            else:
+                st.warning("No certifications detected", icon="⚠️")
+
+def render_match_breakdown(comparison):
+    """Render the strengths, gaps, recommendation and next steps card of a comparison"""
+    st.markdown("""
+        <style>
+        .analysis-header {
+            background: var(--secondary-background-color);
+            padding: 20px;
+            border-radius: 15px;
+            margin-bottom: 20px;
+        }
+        </style>
+
+        <div class="analysis-header">
+            <h2 style="margin:0;">🔍 AI-Powered Deep Analysis</h2>
+            <p style="margin:0; color: var(--text-color)">Comprehensive breakdown of candidate suitability</p>
+        </div>
+        """, unsafe_allow_html=True)
+
+        # Combined card container with bottom margin
+    with st.container(border=True):
+        cols = st.columns(2)
+        with cols[0]:
+            st.markdown("### 🎯 Key Strengths")
+            # Dynamic strengths from comparison results
+            if comparison.get('matched_requirements'):
+                for item in comparison['matched_requirements'][:3]:  # Top 3 matches
+                    st.success(f"✅ {item}")
+            else:
+                st.warning("No strong matches found", icon="⚠️")
+
+            st.markdown("### 📉 Improvement Areas")
+            # Dynamic gaps from comparison results
+            if comparison.get('missing_requirements'):
+                for item in comparison['missing_requirements'][:3]:  # Top 3 gaps
+                    st.error(f"⚠️ {item}")
+            else:
+                st.success("All key requirements met!", icon="🎉")
+
+        with cols[1]:
+            st.markdown("### 🏆 Recommendation")
+            # Dynamic recommendation based on score
+            score = comparison.get('overall_score', 0)
+            if score >= 90:
+                rec_text = "🥇 Gold Tier Candidate - Ideal Hire"
+                rec_details = "Strongly recommend for senior roles with leadership potential"
+            elif score >= 75:
+                rec_text = "🥈 Silver Tier Candidate - Strong Match" 
+                rec_details = "Recommend for mid-level roles with growth opportunities"
+            elif score >= 50:
+                rec_text = "🥉 Bronze Tier Candidate - Potential Fit"
+                rec_details = "Consider for junior roles with mentorship"
+            else:
+                rec_text = "🚫 Not Recommended - Significant Gaps"
+                rec_details = "Doesn't meet minimum requirements"
+
+            st.markdown(f"""
+            <div style="margin-bottom: 20px;">
+                <div style="font-size:18px; font-weight:bold;">
+                    {rec_text}
+                </div>
+                <p style="margin:0; line-height:1.5;">
+                {rec_details}<br>
+                Score: {score:.1f}%
+                </p>
+            </div>
+            """, unsafe_allow_html=True)
+
+            st.markdown("### 📅 Next Steps")
+            # Dynamic next steps based on score
+            steps = []
+            if score >= 75:
+                steps = [
+                    "Schedule final interview with tech lead",
+                    "Request reference checks",
+                    "Prepare offer letter"
+                ]
+            elif score >= 50:
+                steps = [
+                    "Conduct technical screening",
+                    "Review portfolio projects",
+                    "Schedule team interview"
+                ]
+            else:
+                steps = [
+                    "Consider alternative candidates",
+                    "Provide constructive feedback",
+                    "Encourage re-application after upskilling"
+                ]
+
+            st.markdown("""
+            <div style="margin-bottom: 20px;">
+            • {}<br>
+            • {}<br>
+            • {}
+            </div>
+            """.format(*steps), unsafe_allow_html=True)
+
+def render_job_progress(job):
+    """Stage-by-stage status line and progress bar of a screening job"""
+    icons = {"done": "✅", "running": "⏳", "failed": "❌", "skipped": "➖", "pending": "▫️"}
+    progress = job['progress']
+    steps = []
+    for stage in STAGES:
+        state = progress.get(stage, {"status": "pending"})
+        seconds = f" {state['seconds']:.1f}s" if 'seconds' in state else ""
+        steps.append(f"{icons[state['status']]} {STAGE_LABELS[stage]}{seconds}")
+    finished = sum(1 for stage in STAGES if progress.get(stage, {}).get('status') in ('done', 'skipped'))
+    st.progress(finished / len(STAGES), text=" · ".join(steps))
+
+def render_job(job):
+    """Everything a screening job has produced so far"""
+    result = job['result']
+    status = job['status']
+    params = job['params']
+    st.header(f"Screening {params['resume_name']} vs {params['jd_name']}", divider="rainbow")
+    st.caption(f"Job {job['id']} · {status}. Reopen or share this page's URL to come back to the result.")
+    render_job_progress(job)
+    if status == 'queued' and not get_job_queue().live_workers():
+        st.warning("No worker is running. Start one with `python logic.py jobs worker`.", icon="⏸️")
+    if status == 'failed':
+        st.error(f"🚨 Analysis error: {job['error']}", icon="⚠️")
+
+    if 'resume_skills' in result:
+        st.header("Extracted Requirements")
+        tab1, tab2 = st.tabs(["Resume Skills", "Job Description Requirements"])
+        with tab1:
+            display_skills(result['resume_skills'], "Candidate Skills Overview")
+        with tab2:
+            display_skills(result['jd_requirements'], "Job Requirements Breakdown")
+
+    comparison = result.get('comparison')
+    if not comparison or 'overall_score' not in comparison or 'score_breakdown' not in comparison:
+        return
+    st.header("Match Analysis", divider="rainbow")
+    render_match_analysis(comparison)
+    if comparison.get('scoring_model'):
+        st.caption(f"Scored by {comparison['scoring_model']}")
+    if comparison.get('reused_from'):
+        source = comparison['reused_from']
+        st.caption(f"Score reused from near-duplicate resume "
+                   f"{source['candidate_name'] or source['candidate_id'][:16]} ({source['similarity']:.0%} similar)")
+    if 'stored_at' in result:
+        st.caption(f"Stored result from {time.strftime('%Y-%m-%d %H:%M', time.localtime(result['stored_at']))}")
+    if job['progress'].get('score', {}).get('status') != 'done':
+        return
+
+    with st.expander("📈 AI-Powered Match Breakdown", expanded=True):
+        render_match_breakdown(comparison)
+        if params.get('explain', True):
+            st.divider()
+            with st.container(border=False):
+                st.markdown("### 📝 Detailed Assessment")
+                if result.get('explanation'):
+                    render_explanation_sections([result['explanation']])
+                elif status not in FINISHED_STATUSES:
+                    st.caption("Generating detailed analysis...")
+        if result.get('usage', {}).get('calls'):
+            st.caption(f"API usage: {metrics.format_summary(result['usage'])}")
+
+def job_view(job_id, polling):
+    """Render a job; while it is unfinished this reruns on a timer to pick up progress"""
+    job = get_job_queue().get(job_id)
+    if job is None:
+        st.error(f"No screening job {job_id}")
+        return
+    render_job(job)
+    if polling and job['status'] in FINISHED_STATUSES:
+        # One full rerun re-renders the page without the refresh timer
+        st.rerun()
+
+LEADERBOARD_PAGE_SIZE = 25
+
+def render_leaderboard(store, selected_jd=None):
+    """Paginated ranking of stored screenings for one JD, read from the result store only"""
+    jobs = store.jobs()
+    if not jobs:
+        st.info("Screened candidates will appear here.")
+        return
+    labels = {job['jd_id']: f"{job['jd_name'] or job['jd_id'][:12]} ({job['screenings']} screened)"
+              for job in jobs}
+    ids = list(labels)
+    cols = st.columns([3, 2, 1, 1])
+    jd_id = cols[0].selectbox("Job description", ids, format_func=labels.get,
+                              index=ids.index(selected_jd) if selected_jd in labels else 0)
+    min_score = cols[1].slider("Minimum score", 0, 100, 0, step=5)
+    scorer = cols[2].selectbox("Scorer", ["all", "llm", "fused", "local"])
+    order = cols[3].selectbox("Order", ["score", "recent"])
+    scorer = None if scorer == "all" else scorer
+
+    started = time.perf_counter()
+    total = store.count(jd_id, min_score or None, scorer)
+    pages = max((total + LEADERBOARD_PAGE_SIZE - 1) // LEADERBOARD_PAGE_SIZE, 1)
+    page = st.number_input("Page", 1, pages, 1, key=f"leaderboard_page_{jd_id}")
+    offset = (page - 1) * LEADERBOARD_PAGE_SIZE
+    rows = store.leaderboard(jd_id, LEADERBOARD_PAGE_SIZE, offset, min_score or None, scorer, order)
+    elapsed = (time.perf_counter() - started) * 1000
+
+    st.dataframe([{
+        "Rank": rank,
+        "Candidate": row['candidate_name'] or row['candidate_id'][:12],
+        "Score": round(row['overall_score'], 1),
+        "Recommendation": row['hiring_recommendation'] or "",
+        "Scorer": row['scorer'],
+        "Screened": time.strftime('%Y-%m-%d %H:%M', time.localtime(row['created_at'])),
+        "Prompt": row['prompt_version'],
+        "Model": row['model']
+    } for rank, row in enumerate(rows, offset + 1)], hide_index=True)
+    st.caption(f"Page {page} of {pages} · {total} screenings · queried in {elapsed:.1f} ms")
+
+load_pipeline_resources()
+queue = get_job_queue()
+
+# File upload section - Add visual feedback
+st.header("📁 Upload Documents", divider="rainbow")
+col1, col2 = st.columns(2)
+with col1:
+    resume_file = st.file_uploader("Upload Resume (PDF/DOCX)", type=["pdf", "docx"], 
+                                 help="Max file size: 5MB")
+with col2:
+    jd_file = st.file_uploader("Upload Job Description (PDF/DOCX)", type=["pdf", "docx"],
+                             help="Supported formats: PDF, Word documents")
+
+jd_hash = None
+if resume_file and jd_file:
+    local_scoring = st.toggle("Deterministic local scoring",
+                              help="Compute the score from embedding similarity and the rubric "
+                                   "weights locally; the LLM is only used for the explanation")
+    fused = st.toggle("Single-call scoring and explanation", disabled=local_scoring,
+                      help="Get the score and the detailed assessment from one LLM call "
+                           "instead of two; the assessment appears all at once")
+
+    # Documents are saved for the workers; parsing, extraction and scoring run in the job
+    resume_hash, resume_path = queue.store_file(resume_file.getvalue(), resume_file.name)
+    jd_hash, jd_path = queue.store_file(jd_file.getvalue(), jd_file.name)
+
+    if st.button("Run Comparison"):
+        job_id = queue.enqueue({
+            "resume_path": resume_path, "resume_name": resume_file.name, "resume_sha256": resume_hash,
+            "jd_path": jd_path, "jd_name": jd_file.name, "jd_sha256": jd_hash,
+            "scorer": 'local' if local_scoring else 'fused' if fused else 'llm',
+            "explain": True
+        })
+        # The job ID in the URL survives reloads and can be shared
+        st.query_params["job"] = job_id
+        st.rerun()
+
+job_id = st.query_params.get("job")
+if job_id:
+    job = queue.get(job_id)
+    polling = job is not None and job['status'] not in FINISHED_STATUSES
+    st.fragment(job_view, run_every=JOB_POLL_INTERVAL if polling else None)(job_id, polling)
+    if job is not None:
+        jd_hash = jd_hash or job['params']['jd_sha256']
+
+st.header("🏆 Leaderboard", divider="rainbow")
+render_leaderboard(get_result_store(), jd_hash)
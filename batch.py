@@ -0,0 +1,353 @@
+import argparse
+import contextvars
+import csv
+import functools
+import glob
+import hashlib
+import json
+import os
+import queue
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from logic import (EXTRACTION_CHAR_BUDGET, extract_text_from_file, extract_skills_with_openai,
+                   prefetch_skill_contexts, compare_skills, compare_skills_local,
+                   compare_and_explain, generate_score_explanation, get_result_store,
+                   index_document, scoring_version)
+from result_store import records_to_screenings
+from extraction import EXTRACTION_WORKERS, extract_texts_parallel
+import metrics
+
+SUPPORTED_EXTENSIONS = ('.pdf', '.docx')
+# Parsed resumes whose RAG query embeddings are requested together
+RAG_PREFETCH_BATCH = int(os.environ.get('RAG_PREFETCH_BATCH', '16'))
+SCORE_KEYS = ['technical_skills', 'qualifications', 'certifications', 'bonuses']
+CSV_FIELDS = ['resume_path', 'resume_sha256', 'overall_score'] + SCORE_KEYS + [
+    'hiring_recommendation', 'matched_requirements', 'missing_requirements',
+    'explanation', 'error'
+]
+
+
+def collect_resume_paths(patterns):
+    """Expand directories and glob patterns into a sorted list of PDF/DOCX paths"""
+    paths = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            candidates = [os.path.join(pattern, name) for name in os.listdir(pattern)]
+        else:
+            candidates = glob.glob(pattern, recursive=True)
+        for path in candidates:
+            if os.path.isfile(path) and path.lower().endswith(SUPPORTED_EXTENSIONS):
+                paths.add(os.path.normpath(path))
+    return sorted(paths)
+
+
+def file_sha256(path):
+    """Hash file contents so a replaced resume is re-screened on resume"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def screen_resume(path, jd_requirements, explain=False, use_cache=True, scorer='llm',
+                  resume_text=None, skill_context=None, fused=False):
+    """Run extraction, scoring and optionally the explanation for one resume"""
+    record = {'resume_path': path}
+    with metrics.track('screening') as usage:
+        _screen_into(record, path, jd_requirements, explain, use_cache, scorer, resume_text,
+                     skill_context, fused)
+    record['usage'] = usage.summary()
+    return record
+
+
+def _screen_into(record, path, jd_requirements, explain, use_cache, scorer, resume_text,
+                 skill_context, fused):
+    try:
+        # Inside the try so a resume deleted mid-run becomes an error record
+        record['resume_sha256'] = file_sha256(path)
+        if resume_text is None:
+            resume_text = extract_text_from_file(path, max_chars=EXTRACTION_CHAR_BUDGET)
+        if not resume_text.strip():
+            raise ValueError("Empty content in file")
+        resume_skills = extract_skills_with_openai(resume_text, use_cache=use_cache,
+                                                   skill_context=skill_context)
+        if 'error' in resume_skills:
+            raise ValueError(resume_skills['error'])
+        # Lets later uploads of near-duplicates of this resume reuse its stored score
+        index_document(record['resume_sha256'], resume_text, os.path.basename(path))
+
+        explanation = None
+        if explain and fused and scorer == 'llm':
+            comparison, explanation = compare_and_explain(resume_skills, jd_requirements)
+        else:
+            score = compare_skills_local if scorer == 'local' else compare_skills
+            comparison = score(resume_skills, jd_requirements)
+        record.update(comparison)
+        record['resume_skills'] = resume_skills
+        if explanation is not None:
+            record['explanation'] = explanation
+        elif explain and 'error' not in comparison:
+            record['explanation'] = generate_score_explanation(
+                resume_skills, jd_requirements, comparison)
+    except metrics.TokenBudgetExceeded:
+        # Stops the whole run; see run_batch
+        raise
+    except Exception as e:
+        record['error'] = str(e)
+        record.setdefault('overall_score', 0)
+
+
+def _finish_screening(future, finished, path, stats):
+    # Every submitted resume must put exactly one record on finished, or run_batch waits forever
+    if future.cancelled():
+        # Only once the budget ran out, when run_batch no longer waits for it
+        return
+    try:
+        record = future.result()
+    except metrics.TokenBudgetExceeded as e:
+        finished.put(e)
+        return
+    except Exception as e:
+        record = {'resume_path': path, 'overall_score': 0, 'error': f"Screening failed: {str(e)}"}
+    finished.put({**record, 'extraction_stats': stats})
+
+
+def _flatten_for_csv(record):
+    row = {field: record.get(field, '') for field in CSV_FIELDS}
+    for key in SCORE_KEYS:
+        row[key] = record.get('score_breakdown', {}).get(key, record.get(key, ''))
+    for key in ['matched_requirements', 'missing_requirements']:
+        if isinstance(row[key], list):
+            row[key] = '; '.join(row[key])
+    return row
+
+
+def load_results(output_path, fmt):
+    """Read records already written by an earlier (possibly interrupted) run"""
+    if not os.path.exists(output_path):
+        return []
+    records = []
+    with open(output_path, newline='', encoding='utf-8') as f:
+        if fmt == 'csv':
+            for row in csv.DictReader(f):
+                row['overall_score'] = float(row.get('overall_score') or 0)
+                records.append(row)
+        else:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # A crash can leave a truncated final line behind
+                    continue
+    return records
+
+
+def write_ranked(output_path, records, fmt):
+    """Atomically rewrite the output sorted by overall_score, best first"""
+    ranked = sorted(records, key=lambda r: float(r.get('overall_score') or 0), reverse=True)
+    tmp_path = f"{output_path}.tmp"
+    with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+        if fmt == 'csv':
+            writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+            writer.writeheader()
+            writer.writerows(_flatten_for_csv(r) for r in ranked)
+        else:
+            for record in ranked:
+                f.write(json.dumps(record) + '\n')
+    os.replace(tmp_path, output_path)
+    return ranked
+
+
+def run_batch(jd_path, resume_paths, output_path, fmt='jsonl', workers=4,
+              explain=False, use_cache=True, scorer='llm', extract_workers=EXTRACTION_WORKERS,
+              fused=False):
+    """Screen many resumes against one JD, streaming results and resuming past runs"""
+    previous = load_results(output_path, fmt)
+    # Failed screenings are retried; finished ones are kept if the file is unchanged
+    done = {
+        (r['resume_path'], r.get('resume_sha256')): r
+        for r in previous if not r.get('error')
+    }
+    records = list(done.values())
+
+    pending = []
+    for path in resume_paths:
+        if (path, file_sha256(path)) not in done:
+            pending.append(path)
+    print(f"{len(resume_paths) - len(pending)} resumes already screened, "
+          f"{len(pending)} to go", file=sys.stderr)
+
+    if pending:
+        jd_requirements = extract_skills_with_openai(
+            extract_text_from_file(jd_path, max_chars=EXTRACTION_CHAR_BUDGET), use_cache=use_cache)
+        if 'error' in jd_requirements:
+            raise ValueError(f"Job description extraction failed: {jd_requirements['error']}")
+
+        # New screenings also go to the result store, so the app's leaderboard sees them
+        store = get_result_store()
+        jd_id = file_sha256(jd_path)
+        store_scorer = 'local' if scorer == 'local' else 'fused' if explain and fused else 'llm'
+        prompt_version, model = scoring_version(store_scorer)
+
+        # Start the streaming file over from the surviving records
+        write_ranked(output_path, records, fmt)
+        # Holds records, or the TokenBudgetExceeded that ends the run
+        finished = queue.Queue()
+        stopped = threading.Event()
+
+        fed = set()
+
+        def submit_parsed(executor, items):
+            try:
+                contexts = prefetch_skill_contexts([item['text'] for item in items], use_cache)
+            except metrics.TokenBudgetExceeded:
+                raise
+            except Exception:
+                # Fall back to a per-resume lookup inside extract_skills_with_openai
+                contexts = [None] * len(items)
+            for item, context in zip(items, contexts):
+                if stopped.is_set():
+                    return
+                # Screenings run under the batch's usage tracker and token budget
+                future = executor.submit(contextvars.copy_context().run, screen_resume,
+                                         item['path'], jd_requirements, explain, use_cache,
+                                         scorer, item['text'], context, fused)
+                future.add_done_callback(functools.partial(
+                    _finish_screening, finished=finished, path=item['path'], stats=item['stats']))
+                fed.add(item['path'])
+
+        def feed_llm_stage(executor):
+            # Parsed resumes go to the LLM stage in small groups so their RAG query
+            # embeddings share one request
+            parsed = []
+            try:
+                for item in extract_texts_parallel(pending, workers=extract_workers,
+                                                   max_chars=EXTRACTION_CHAR_BUDGET):
+                    if stopped.is_set():
+                        return
+                    if 'error' in item:
+                        fed.add(item['path'])
+                        # Not hashed: the file may be the reason extraction failed
+                        finished.put({
+                            'resume_path': item['path'],
+                            'overall_score': 0,
+                            'error': f"Text extraction failed ({item['error_type']}): {item['error']}"
+                        })
+                        continue
+                    parsed.append(item)
+                    if len(parsed) >= RAG_PREFETCH_BATCH:
+                        submit_parsed(executor, parsed)
+                        parsed = []
+                if parsed:
+                    submit_parsed(executor, parsed)
+            except metrics.TokenBudgetExceeded as e:
+                finished.put(e)
+            except Exception as e:
+                if stopped.is_set():
+                    # Submitting raced with the shutdown after the budget ran out
+                    return
+                for path in pending:
+                    if path not in fed:
+                        finished.put({'resume_path': path, 'overall_score': 0,
+                                      'error': f"Text extraction failed: {str(e)}"})
+
+        with open(output_path, 'a', newline='', encoding='utf-8') as out, \
+                ThreadPoolExecutor(max_workers=workers) as executor:
+            writer = csv.DictWriter(out, fieldnames=CSV_FIELDS) if fmt == 'csv' else None
+            threading.Thread(target=contextvars.copy_context().run, args=(feed_llm_stage, executor),
+                             daemon=True).start()
+            def write(record, i):
+                if writer:
+                    writer.writerow(_flatten_for_csv(record))
+                else:
+                    out.write(json.dumps(record) + '\n')
+                out.flush()
+                records.append(record)
+                store.save_many(records_to_screenings([record], jd_id, store_scorer, prompt_version,
+                                                      model, jd_name=os.path.basename(jd_path)))
+                status = record.get('error') or f"{float(record.get('overall_score') or 0):.1f}%"
+                print(f"[{i}/{len(pending)}] {record['resume_path']}: {status}", file=sys.stderr)
+
+            for i in range(1, len(pending) + 1):
+                record = finished.get()
+                if isinstance(record, metrics.TokenBudgetExceeded):
+                    # Stop feeding and cancel queued screenings; nothing is written for
+                    # unscreened resumes, so a rerun picks them up
+                    budget_error = record
+                    stopped.set()
+                    executor.shutdown(wait=True, cancel_futures=True)
+                    # Screenings that were already running may still have finished
+                    while not finished.empty():
+                        record = finished.get()
+                        if not isinstance(record, metrics.TokenBudgetExceeded):
+                            i += 1
+                            write(record, i)
+                    raise budget_error
+                write(record, i)
+
+    return write_ranked(output_path, records, fmt)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Screen a directory of resumes against one JD')
+    parser.add_argument('job_description_path', help='Path to PDF/DOCX job description file')
+    parser.add_argument('resumes', nargs='+', help='Resume files, directories or glob patterns')
+    parser.add_argument('-o', '--output', default='screening_results.jsonl',
+                        help='Results file; reruns resume from it')
+    parser.add_argument('--format', choices=['jsonl', 'csv'],
+                        help='Output format (default: inferred from --output)')
+    parser.add_argument('-j', '--workers', type=int, default=4,
+                        help='Maximum resumes screened concurrently')
+    parser.add_argument('--extract-workers', type=int, default=EXTRACTION_WORKERS,
+                        help='Processes used to parse PDF/DOCX files')
+    parser.add_argument('--explain', action='store_true',
+                        help='Also generate the natural language score explanation')
+    parser.add_argument('--scorer', choices=['llm', 'local'], default='llm',
+                        help='Score with GPT-4o or with the deterministic local rubric engine')
+    parser.add_argument('--fused', action='store_true',
+                        help='With --explain, get the LLM score and the explanation from one call')
+    parser.add_argument('--no-cache', action='store_true', help='Bypass the extraction cache')
+    parser.add_argument('--top', type=int, default=10, help='Number of ranked results to print')
+    parser.add_argument('--token-budget', type=int, default=metrics.TOKEN_BUDGET,
+                        help='Stop making API calls once the whole batch has spent this many tokens')
+    parser.add_argument('--usage-report', metavar='PATH',
+                        help='Write token/cost/latency usage as JSON, or Prometheus text for *.prom')
+
+    args = parser.parse_args(argv)
+    fmt = args.format or ('csv' if args.output.lower().endswith('.csv') else 'jsonl')
+
+    if not os.path.exists(args.job_description_path):
+        raise FileNotFoundError(f"File {args.job_description_path} not found")
+    resume_paths = collect_resume_paths(args.resumes)
+    if not resume_paths:
+        raise FileNotFoundError("No PDF/DOCX resumes matched the given paths")
+
+    with metrics.track('batch', token_budget=args.token_budget) as usage:
+        try:
+            ranked = run_batch(args.job_description_path, resume_paths, args.output, fmt=fmt,
+                               workers=args.workers, explain=args.explain,
+                               use_cache=not args.no_cache, scorer=args.scorer,
+                               extract_workers=args.extract_workers, fused=args.fused)
+        except metrics.TokenBudgetExceeded as e:
+            print(f"Aborted: {e}", file=sys.stderr)
+            return 2
+        finally:
+            print(f"USAGE: {metrics.format_summary(usage.summary())}", file=sys.stderr)
+            if args.usage_report:
+                metrics.write_report(args.usage_report, usage)
+
+    print(f"\nTOP {min(args.top, len(ranked))} OF {len(ranked)} CANDIDATES:")
+    for rank, record in enumerate(ranked[:args.top], 1):
+        score = float(record.get('overall_score') or 0)
+        print(f"{rank:>3}. {score:5.1f}%  {record['resume_path']}")
+    print(f"\nFull results written to {args.output}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
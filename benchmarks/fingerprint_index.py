@@ -0,0 +1,119 @@
+"""Lookup latency and detection of the near-duplicate fingerprint index.
+
+Fills a temporary index with random fingerprints, then times nearest() for queries
+that are near-duplicates of an indexed text and for unrelated queries. A synthetic
+resume and edited copies of it (changed date, moved line, re-exported whitespace,
+another candidate) show how many bits each edit moves the fingerprint. No API calls.
+
+    python benchmarks/fingerprint_index.py --texts 200000
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from near_duplicates import (FINGERPRINT_BITS, NEAR_DUP_SIMILARITY, NearDuplicateIndex,  # noqa: E402
+                             hamming, simhash)
+
+SKILLS = ["Python", "Java", "Go", "SQL", "AWS", "GCP", "Docker", "Kubernetes", "Terraform", "Spark",
+          "Kafka", "React", "TypeScript", "PostgreSQL", "Airflow", "PyTorch", "Linux", "CI/CD"]
+
+
+def synthetic_resume(rng, name):
+    lines = [f"{name}", "Senior Software Engineer", "EXPERIENCE"]
+    for year in range(2012, 2024, 3):
+        lines.append(f"{rng.choice(['Acme', 'Globex', 'Initech', 'Umbrella'])} Corp, {year} - {year + 3}")
+        for _ in range(5):
+            skills = ", ".join(rng.sample(SKILLS, 3))
+            lines.append(f"- {rng.choice(['Built', 'Designed', 'Migrated', 'Operated'])} "
+                         f"{rng.choice(['billing', 'search', 'ingestion', 'reporting', 'auth'])} services "
+                         f"with {skills}, serving {rng.randint(1, 90)}M requests a day; worked with "
+                         f"{rng.randint(2, 9)} engineers and cut cost by {rng.randint(10, 40)}%.")
+    lines.append("SKILLS: " + ", ".join(rng.sample(SKILLS, 10)))
+    lines.append(f"EDUCATION: B.Sc. Computer Science, {rng.choice(['MIT', 'ETH', 'IIT', 'CMU'])}, 2011")
+    return "\n".join(lines)
+
+
+def variants(rng, text):
+    lines = text.split("\n")
+    moved = lines[:]
+    moved.insert(4, moved.pop(-1))
+    return {
+        "re-exported (whitespace, case)": "  ".join(text.upper().split()),
+        "date changed": text.replace("2011", "2012"),
+        "line moved": "\n".join(moved),
+        "date changed + line moved": "\n".join(moved).replace("2011", "2012"),
+        "other candidate": synthetic_resume(rng, "Other Person"),
+    }
+
+
+def time_lookups(index, fingerprints):
+    timings, found = [], 0
+    for fingerprint in fingerprints:
+        start = time.perf_counter()
+        found += bool(index.nearest(fingerprint))
+        timings.append((time.perf_counter() - start) * 1000)
+    p99 = sorted(timings)[int(len(timings) * 0.99)]
+    return {"median_ms": round(statistics.median(timings), 4), "p99_ms": round(p99, 4), "found": found}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Near-duplicate index benchmark")
+    parser.add_argument("--texts", type=int, default=200000, help="Fingerprints in the index")
+    parser.add_argument("--similarity", type=float, default=NEAR_DUP_SIMILARITY)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", help="Write the results to this file")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    index = NearDuplicateIndex(os.path.join(tempfile.mkdtemp(prefix="near-dup-bench-"), "fingerprints.sqlite3"),
+                               args.similarity)
+    fingerprints = [rng.getrandbits(FINGERPRINT_BITS) for _ in range(args.texts)]
+    start = time.perf_counter()
+    index.add_many([{"text_sha256": f"{i:064x}", "fingerprint": fingerprint}
+                    for i, fingerprint in enumerate(fingerprints)])
+    insert_seconds = time.perf_counter() - start
+
+    def near(fingerprint):
+        for bit in rng.sample(range(FINGERPRINT_BITS), index.max_distance):
+            fingerprint ^= 1 << bit
+        return fingerprint
+
+    lookups = {
+        "near-duplicate": time_lookups(index, [near(rng.choice(fingerprints)) for _ in range(args.queries)]),
+        "unrelated": time_lookups(index, [rng.getrandbits(FINGERPRINT_BITS) for _ in range(args.queries)]),
+    }
+
+    resume = synthetic_resume(rng, "Jane Doe")
+    simhash(resume)
+    start = time.perf_counter()
+    original = simhash(resume)
+    simhash_ms = (time.perf_counter() - start) * 1000
+    distances = {name: hamming(original, simhash(text)) for name, text in variants(rng, resume).items()}
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"texts": args.texts, "max_distance": index.max_distance,
+                       "insert_seconds": round(insert_seconds, 3), "lookups": lookups,
+                       "simhash_ms": round(simhash_ms, 3), "distances": distances}, f, indent=2)
+
+    print(f"{args.texts} fingerprints, {index.bands} bands, near-duplicates within {index.max_distance} bits, "
+          f"inserted in {insert_seconds:.2f}s\n")
+    print(f"{'lookup':<16} {'median ms':>10} {'p99 ms':>8} {'found':>7}")
+    for name, row in lookups.items():
+        print(f"{name:<16} {row['median_ms']:>10.4f} {row['p99_ms']:>8.4f} {row['found']:>7}")
+    print(f"\nsimhash of a {len(resume)}-char resume: {simhash_ms:.2f} ms")
+    for name, distance in distances.items():
+        verdict = "near-duplicate" if distance <= index.max_distance else "distinct"
+        print(f"{name:<30} {distance:>3} bits apart  {verdict}")
+
+
+if __name__ == "__main__":
+    main()
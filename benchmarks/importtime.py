@@ -0,0 +1,103 @@
+"""Track cold-start import cost of the CLI and worker entry points.
+
+Runs each entry point's import under ``python -X importtime`` in a fresh
+interpreter and reports the median total import time, the heaviest
+top-level and first-level nested imports and whether any heavy dependency was pulled in eagerly.
+
+    python benchmarks/importtime.py
+    python benchmarks/importtime.py --runs 7 --json importtime.json --budget-ms 150
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ENTRY_POINTS = {
+    "cli": "import logic",
+    "batch_worker": "import batch",
+    "local_scoring": "import scoring",
+}
+# Packages that no entry point should load just by being imported
+HEAVY_MODULES = ["streamlit", "fitz", "pymupdf", "docx", "openai", "langchain_community",
+                 "langchain_openai", "faiss"]
+
+LINE_PATTERN = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def measure(statement):
+    """Import statement in a clean interpreter and parse the -X importtime report"""
+    probe = f"{statement}; import sys; print(','.join(sorted(sys.modules)))"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", probe],
+        cwd=REPO_ROOT, capture_output=True, text=True,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"{statement!r} failed:\n{result.stderr[-2000:]}")
+
+    top_level = {}
+    direct = {}
+    for line in result.stderr.splitlines():
+        match = LINE_PATTERN.match(line)
+        if not match:
+            continue
+        # The package column is indented by one space plus two per nesting level
+        depth = (len(match.group(3)) - 1) // 2
+        if depth == 0:
+            top_level[match.group(4)] = int(match.group(2))
+        elif depth == 1:
+            direct[match.group(4)] = int(match.group(2))
+    loaded = set(result.stdout.strip().splitlines()[-1].split(","))
+    return {
+        "total_ms": sum(top_level.values()) / 1000,
+        "imports_ms": {name: us / 1000 for name, us in {**top_level, **direct}.items()},
+        "heavy_loaded": [m for m in HEAVY_MODULES if m in loaded]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time benchmark for the entry points")
+    parser.add_argument("--runs", type=int, default=5, help="Interpreter launches per entry point")
+    parser.add_argument("--top", type=int, default=8, help="Heaviest imports to list")
+    parser.add_argument("--json", help="Write the summary to this file")
+    parser.add_argument("--budget-ms", type=float,
+                        help="Exit non-zero if any entry point's median exceeds this")
+    args = parser.parse_args()
+
+    summary = {}
+    for name, statement in ENTRY_POINTS.items():
+        runs = [measure(statement) for _ in range(args.runs)]
+        heaviest = sorted(runs[-1]["imports_ms"].items(), key=lambda kv: kv[1], reverse=True)
+        summary[name] = {
+            "statement": statement,
+            "median_ms": round(statistics.median(r["total_ms"] for r in runs), 1),
+            "min_ms": round(min(r["total_ms"] for r in runs), 1),
+            "heavy_loaded": runs[-1]["heavy_loaded"],
+            "heaviest": [[module, round(ms, 1)] for module, ms in heaviest[:args.top]]
+        }
+
+        print(f"{name:<14} {statement:<18} median {summary[name]['median_ms']:>8.1f} ms"
+              f"   min {summary[name]['min_ms']:>8.1f} ms")
+        for module, ms in summary[name]["heaviest"]:
+            print(f"{'':<16}{module:<32}{ms:>8.1f} ms")
+        if summary[name]["heavy_loaded"]:
+            print(f"{'':<16}eagerly loaded: {', '.join(summary[name]['heavy_loaded'])}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+
+    if args.budget_ms is not None:
+        over = [name for name, s in summary.items() if s["median_ms"] > args.budget_ms]
+        if over:
+            print(f"Over the {args.budget_ms} ms budget: {', '.join(over)}", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,368 @@
+"""Local stand-in for the OpenAI endpoints the screening pipeline uses.
+
+Serves chat completions (plain and SSE streaming), embeddings, and the files and
+batches endpoints bulk mode needs. Chat replies are replayed from a fixture file of
+recorded responses per stage (extract, compare, explain, fused), chosen by what the
+request asks for. Latency, jitter, 429 responses and malformed JSON can be injected.
+Point the pipeline at it with OPENAI_BASE_URL:
+
+    python benchmarks/mock_openai.py --port 8765 --latency 400 --jitter 150 --rate-429 0.05
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=sk-mock python logic.py resume.pdf jd.pdf
+
+Benchmarks start it in-process with MockOpenAI(...).start().
+"""
+import argparse
+import email.parser
+import hashlib
+import itertools
+import json
+import os
+import random
+import re
+import struct
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FIXTURES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures",
+                             "openai_responses.json")
+CHARS_PER_TOKEN = 4
+# Matches the provider's prompt caching: 1024-token minimum, 128-token increments
+CACHE_MIN_TOKENS = 1024
+CACHE_INCREMENT = 128
+
+
+def _tokens(text):
+    return max(1, len(text) // CHARS_PER_TOKEN) if text else 0
+
+
+def _embedding(value, dimensions):
+    # Deterministic unit vector seeded by the input, so equal texts embed identically
+    seed = hashlib.sha256(json.dumps(value).encode("utf-8")).digest()
+    rng = random.Random(struct.unpack("<Q", seed[:8])[0])
+    vector = [rng.gauss(0, 1) for _ in range(dimensions)]
+    norm = sum(x * x for x in vector) ** 0.5
+    return [x / norm for x in vector]
+
+
+def classify(body):
+    """Which pipeline stage a chat request comes from"""
+    text = " ".join(str(m.get("content", "")) for m in body.get("messages", []))
+    json_mode = (body.get("response_format") or {}).get("type") == "json_object"
+    if json_mode and '"explanation": {' in text:
+        return "fused"
+    if json_mode:
+        return "extract"
+    if "Final Response Format" in text:
+        return "compare"
+    return "explain"
+
+
+class MockOpenAI:
+    """Threaded HTTP server with configurable latency and fault injection"""
+
+    def __init__(self, host="127.0.0.1", port=0, fixtures_path=FIXTURES_PATH, latency_ms=0,
+                 jitter_ms=0, stream_chunk_ms=0, rate_429=0.0, retry_after_ms=50,
+                 malformed_rate=0.0, dimensions=1536, seed=0):
+        with open(fixtures_path, encoding="utf-8") as f:
+            self.fixtures = json.load(f)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.stream_chunk_ms = stream_chunk_ms
+        self.rate_429 = rate_429
+        self.retry_after_ms = retry_after_ms
+        self.malformed_rate = malformed_rate
+        self.dimensions = dimensions
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.counters = {"requests": 0, "rate_limited": 0, "malformed": 0}
+        self.files = {}
+        self.batches = {}
+        self._ids = itertools.count(1)
+        self._rotation = {stage: itertools.cycle(replies) for stage, replies in self.fixtures.items()}
+        self._recent_prompts = deque(maxlen=256)
+        handler = type("Handler", (_Handler,), {"mock": self})
+        self.server = ThreadingHTTPServer((host, port), handler)
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _random(self):
+        with self.lock:
+            return self.rng.random()
+
+    def _count(self, key):
+        with self.lock:
+            self.counters[key] += 1
+
+    def _next_id(self, prefix):
+        with self.lock:
+            return f"{prefix}-{next(self._ids)}"
+
+    def delay(self):
+        with self.lock:
+            jitter = self.rng.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0
+        time.sleep(max(self.latency_ms + jitter, 0) / 1000)
+
+    def should_rate_limit(self):
+        return self.rate_429 and self._random() < self.rate_429
+
+    def reply_for(self, body):
+        stage = classify(body)
+        with self.lock:
+            content = next(self._rotation[stage])
+        if stage != "explain" and self.malformed_rate and self._random() < self.malformed_rate:
+            self._count("malformed")
+            with self.lock:
+                how = self.rng.choice(["truncate", "unfenced", "prose"])
+            if how == "truncate":
+                content = content[:len(content) // 2]
+            elif how == "unfenced":
+                content = "Here is the evaluation:\n" + re.sub(r"```(json)?\n?", "", content)
+            else:
+                content = "I could not complete the evaluation in the requested format."
+        return content
+
+    def usage_for(self, body, content):
+        prompt = "".join(f"<{m.get('role')}>{m.get('content', '')}" for m in body.get("messages", []))
+        prompt_tokens = _tokens(prompt)
+        with self.lock:
+            shared = max((len(os.path.commonprefix([prompt, p])) for p in self._recent_prompts),
+                         default=0)
+            self._recent_prompts.append(prompt)
+        shared = shared // CHARS_PER_TOKEN
+        cached = 0 if shared < CACHE_MIN_TOKENS else shared - (shared - CACHE_MIN_TOKENS) % CACHE_INCREMENT
+        completion_tokens = _tokens(content)
+        return {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+                "prompt_tokens_details": {"cached_tokens": min(cached, prompt_tokens)}}
+
+    def completion(self, body):
+        content = self.reply_for(body)
+        return {
+            "id": self._next_id("chatcmpl"),
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "gpt-4o"),
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": content}}],
+            "usage": self.usage_for(body, content)
+        }
+
+    def embeddings(self, body):
+        inputs = body.get("input")
+        if isinstance(inputs, str) or (isinstance(inputs, list) and inputs and isinstance(inputs[0], int)):
+            inputs = [inputs]
+        data = [{"object": "embedding", "index": i,
+                 "embedding": _embedding(value, body.get("dimensions") or self.dimensions)}
+                for i, value in enumerate(inputs)]
+        tokens = sum(len(v) if isinstance(v, list) else _tokens(v) for v in inputs)
+        return {"object": "list", "data": data, "model": body.get("model"),
+                "usage": {"prompt_tokens": tokens, "total_tokens": tokens}}
+
+    def run_batch(self, batch_id):
+        """Answer every request of a batch from the fixtures, with injected faults"""
+        batch = self.batches[batch_id]
+        output, errors = [], []
+        for line in self.files[batch["input_file_id"]]["content"].decode("utf-8").splitlines():
+            if not line.strip():
+                continue
+            request = json.loads(line)
+            if self.should_rate_limit():
+                self._count("rate_limited")
+                errors.append({"id": self._next_id("batch_req"), "custom_id": request["custom_id"],
+                               "response": {"status_code": 429, "body": {"error": {
+                                   "message": "Rate limit reached", "type": "rate_limit_error"}}},
+                               "error": None})
+                continue
+            output.append({"id": self._next_id("batch_req"), "custom_id": request["custom_id"],
+                           "response": {"status_code": 200, "body": self.completion(request["body"])},
+                           "error": None})
+        batch["output_file_id"] = self._store_file(output, "batch_output")
+        batch["error_file_id"] = self._store_file(errors, "batch_output") if errors else None
+        batch["request_counts"] = {"total": len(output) + len(errors), "completed": len(output),
+                                   "failed": len(errors)}
+        batch["status"] = "completed"
+        batch["completed_at"] = int(time.time())
+
+    def _store_file(self, lines, purpose):
+        file_id = self._next_id("file")
+        content = "\n".join(json.dumps(line) for line in lines).encode("utf-8")
+        self.files[file_id] = {"id": file_id, "object": "file", "bytes": len(content),
+                               "created_at": int(time.time()), "filename": f"{file_id}.jsonl",
+                               "purpose": purpose, "content": content}
+        return file_id
+
+
+class _Handler(BaseHTTPRequestHandler):
+    mock = None
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _send_json(self, status, payload, headers=None):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _read_body(self):
+        return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+    def _rate_limited(self):
+        mock = self.mock
+        if not mock.should_rate_limit():
+            return False
+        mock._count("rate_limited")
+        self._send_json(429, {"error": {"message": "Rate limit reached (injected)",
+                                        "type": "rate_limit_error", "code": "rate_limit_exceeded"}},
+                        {"retry-after-ms": str(mock.retry_after_ms)})
+        return True
+
+    def do_POST(self):
+        mock = self.mock
+        mock._count("requests")
+        path = self.path.split("?")[0].rstrip("/")
+        raw = self._read_body()
+        if path.endswith("/files"):
+            return self._upload(raw)
+        body = json.loads(raw or b"{}")
+        if path.endswith("/batches"):
+            return self._create_batch(body)
+        if self._rate_limited():
+            return
+        mock.delay()
+        if path.endswith("/chat/completions"):
+            if body.get("stream"):
+                return self._stream(body)
+            return self._send_json(200, mock.completion(body))
+        if path.endswith("/embeddings"):
+            return self._send_json(200, mock.embeddings(body))
+        self._send_json(404, {"error": {"message": f"Unknown endpoint {self.path}"}})
+
+    def do_GET(self):
+        mock = self.mock
+        mock._count("requests")
+        path = self.path.split("?")[0].rstrip("/")
+        match = re.search(r"/files/([^/]+)/content$", path)
+        if match and match.group(1) in mock.files:
+            content = mock.files[match.group(1)]["content"]
+            self.send_response(200)
+            self.send_header("Content-Type", "application/octet-stream")
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+            return
+        match = re.search(r"/batches/([^/]+)$", path)
+        if match and match.group(1) in mock.batches:
+            batch = mock.batches[match.group(1)]
+            if batch["status"] == "in_progress":
+                mock.run_batch(batch["id"])
+            return self._send_json(200, batch)
+        self._send_json(404, {"error": {"message": f"Unknown endpoint {self.path}"}})
+
+    def _stream(self, body):
+        mock = self.mock
+        reply = mock.completion(body)
+        content = reply["choices"][0]["message"]["content"]
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def event(payload):
+            data = f"data: {payload}\n\n".encode("utf-8")
+            self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+            self.wfile.flush()
+
+        base = {"id": reply["id"], "object": "chat.completion.chunk", "created": reply["created"],
+                "model": reply["model"]}
+        for start in range(0, len(content), 16):
+            event(json.dumps({**base, "choices": [{"index": 0, "finish_reason": None,
+                                                   "delta": {"content": content[start:start + 16]}}]}))
+            if mock.stream_chunk_ms:
+                time.sleep(mock.stream_chunk_ms / 1000)
+        event(json.dumps({**base, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]}))
+        if (body.get("stream_options") or {}).get("include_usage"):
+            event(json.dumps({**base, "choices": [], "usage": reply["usage"]}))
+        event("[DONE]")
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+    def _upload(self, raw):
+        mock = self.mock
+        message = email.parser.BytesParser().parsebytes(
+            b"Content-Type: " + self.headers["Content-Type"].encode("latin-1") + b"\r\n\r\n" + raw)
+        fields = {part.get_param("name", header="content-disposition"): part.get_payload(decode=True)
+                  for part in message.get_payload()}
+        file_id = mock._next_id("file")
+        mock.files[file_id] = {"id": file_id, "object": "file", "bytes": len(fields["file"]),
+                               "created_at": int(time.time()), "filename": "input.jsonl",
+                               "purpose": fields.get("purpose", b"batch").decode("utf-8"),
+                               "content": fields["file"]}
+        self._send_json(200, {k: v for k, v in mock.files[file_id].items() if k != "content"})
+
+    def _create_batch(self, body):
+        mock = self.mock
+        batch_id = mock._next_id("batch")
+        mock.batches[batch_id] = {
+            "id": batch_id, "object": "batch", "endpoint": body["endpoint"],
+            "input_file_id": body["input_file_id"], "completion_window": body["completion_window"],
+            "status": "in_progress", "created_at": int(time.time()), "output_file_id": None,
+            "error_file_id": None, "metadata": body.get("metadata"),
+            "request_counts": {"total": 0, "completed": 0, "failed": 0}
+        }
+        self._send_json(200, mock.batches[batch_id])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local OpenAI-compatible stand-in server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--fixtures", default=FIXTURES_PATH, help="Recorded replies per stage")
+    parser.add_argument("--latency", type=float, default=0, help="Mean response latency in ms")
+    parser.add_argument("--jitter", type=float, default=0, help="Uniform +/- latency jitter in ms")
+    parser.add_argument("--stream-chunk-ms", type=float, default=0,
+                        help="Delay between streamed chunks in ms")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="Share of requests answered 429")
+    parser.add_argument("--retry-after-ms", type=int, default=50, help="retry-after-ms sent with 429s")
+    parser.add_argument("--malformed-rate", type=float, default=0.0,
+                        help="Share of JSON replies truncated, unfenced or replaced by prose")
+    parser.add_argument("--dimensions", type=int, default=1536, help="Embedding vector size")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    mock = MockOpenAI(args.host, args.port, args.fixtures, args.latency, args.jitter,
+                      args.stream_chunk_ms, args.rate_429, args.retry_after_ms,
+                      args.malformed_rate, args.dimensions, args.seed)
+    print(f"Mock OpenAI API on {mock.base_url}")
+    try:
+        mock.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(json.dumps(mock.counters))
+
+
+if __name__ == "__main__":
+    main()
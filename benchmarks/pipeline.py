@@ -0,0 +1,319 @@
+"""End-to-end throughput and latency of the screening pipeline against the mock API.
+
+Starts benchmarks/mock_openai.py in-process, points the pipeline at it through
+OPENAI_BASE_URL, generates synthetic resume PDFs and screens them along three paths:
+
+  single   one pair at a time the way the CLI does: parse, extract, score, explain
+  batch    batch.run_batch over all resumes against one JD
+  app      the Streamlit backend: one job at a time through jobs.JobQueue and a
+           WorkerPool, polled until done, as the app does after each upload
+
+For each path it reports pairs/sec, p50/p95 per-pair latency (time to first score for
+the app path too) and the time spent per stage, taken from the metrics usage trackers.
+Latency, jitter, 429s and malformed replies are injected by the mock server, so retries
+and lenient parsing are exercised without a real key.
+
+    python benchmarks/pipeline.py --pairs 20 --latency 300 --jitter 100
+    python benchmarks/pipeline.py --paths batch --pairs 200 --rate-429 0.05 --malformed-rate 0.1 --json pipeline.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.append(BENCH_DIR)
+
+from mock_openai import MockOpenAI  # noqa: E402
+
+PATHS = ("single", "batch", "app")
+SKILLS = ["Python", "Kubernetes", "TensorFlow", "PostgreSQL", "Terraform", "Rust", "React",
+          "Apache Spark", "Computer Vision", "Natural Language Processing", "GraphQL", "Kafka",
+          "Docker", "AWS", "Azure", "Go", "Java", "Scikit-learn", "Airflow", "Snowflake"]
+
+
+def write_pdf(path, lines):
+    import fitz
+
+    doc = fitz.open()
+    page = doc.new_page()
+    y = 72
+    for line in lines:
+        if y > 770:
+            page, y = doc.new_page(), 72
+        page.insert_text((72, y), line, fontsize=10)
+        y += 14
+    doc.save(path)
+    doc.close()
+
+
+def make_documents(directory, pairs, seed):
+    """One JD and `pairs` distinct resume PDFs"""
+    rng = random.Random(seed)
+    jd_path = os.path.join(directory, "jd.pdf")
+    write_pdf(jd_path, ["Senior Machine Learning Engineer", "Requirements:"]
+              + [f"- {skill}" for skill in rng.sample(SKILLS, 10)]
+              + ["Bachelor's degree in Computer Science", "AWS certification preferred"])
+    resumes = []
+    for i in range(pairs):
+        path = os.path.join(directory, f"resume_{i:04d}.pdf")
+        lines = [f"Candidate {i}", f"{rng.randint(1, 12)} years of experience", "Skills:"]
+        lines += [f"- {skill} on {rng.choice(['search', 'payments', 'ads', 'vision'])} projects"
+                  for skill in rng.sample(SKILLS, 8)]
+        lines += ["Education: " + rng.choice(["B.Tech Computer Science", "M.Sc. Data Science"])]
+        write_pdf(path, lines * 3)
+        resumes.append(path)
+    return jd_path, resumes
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def stage_times(tracker):
+    """Seconds spent waiting on calls per stage, plus local parsing"""
+    times = {}
+    for group in tracker.summary()["by_stage"]:
+        times[group["stage"]] = times.get(group["stage"], 0.0) + group["latency_seconds"]
+    return times
+
+
+def reset_caches(logic, directory):
+    """Point the caches, the result store and the near-duplicate index at empty databases in directory"""
+    from cache import ResultCache
+    from embedding_cache import EmbeddingCache
+    from near_duplicates import NearDuplicateIndex
+    from result_store import ResultStore
+
+    os.makedirs(directory, exist_ok=True)
+    logic._extraction_cache = ResultCache(os.path.join(directory, "screening.db"), namespace="extraction")
+    # Stored screenings would let a later path skip scoring the same pairs
+    logic._result_store = ResultStore(os.path.join(directory, "results.sqlite3"))
+    logic._near_duplicate_index = NearDuplicateIndex(os.path.join(directory, "fingerprints.sqlite3"))
+    clients = logic.transport._clients
+    clients["embedding_cache"] = EmbeddingCache(os.path.join(directory, "embeddings.db"))
+    # Embeddings clients hold their cache, so they are rebuilt around the new one
+    for key in [k for k in clients if isinstance(k, tuple) and k[0] == "embeddings"]:
+        del clients[key]
+
+
+def _failed(*results):
+    return any(result is None or "error" in result for result in results)
+
+
+def run_single(logic, jd_path, resumes):
+    latencies, parse_seconds, errors = [], 0.0, 0
+    for path in resumes:
+        start = time.perf_counter()
+        jd_text, _ = logic.extract_text_with_stats(jd_path, max_chars=logic.EXTRACTION_CHAR_BUDGET)
+        resume_text, _ = logic.extract_text_with_stats(path, max_chars=logic.EXTRACTION_CHAR_BUDGET)
+        parse_seconds += time.perf_counter() - start
+        resume_skills, jd_requirements = asyncio.run(logic.aextract_pair(resume_text, jd_text))
+        comparison = None
+        if not _failed(resume_skills, jd_requirements):
+            comparison = logic.compare_skills(resume_skills, jd_requirements)
+        if _failed(comparison):
+            errors += 1
+        else:
+            "".join(logic.stream_score_explanation(resume_skills, jd_requirements, comparison))
+        latencies.append(time.perf_counter() - start)
+    return {"latencies": latencies, "parse_seconds": parse_seconds, "errors": errors}
+
+
+def run_batch_path(batch, jd_path, resumes, workdir, workers):
+    output = os.path.join(workdir, "batch.jsonl")
+    start = time.perf_counter()
+    try:
+        records = batch.run_batch(jd_path, resumes, output, workers=workers, explain=True)
+    except ValueError as e:
+        # A malformed JD extraction aborts the whole batch
+        print(f"Batch aborted: {e}", file=sys.stderr)
+        return {"latencies": [], "wall_seconds": time.perf_counter() - start, "errors": len(resumes)}
+    total = time.perf_counter() - start
+    # Pairs finish concurrently, so per-pair latency is each record's own API time
+    latencies = [r["usage"]["latency_seconds"] for r in records if r.get("usage")]
+    errors = sum(1 for r in records if r.get("error"))
+    return {"latencies": latencies, "wall_seconds": total, "errors": errors}
+
+
+def run_app(jobs, metrics, tracker, jd_path, resumes, workdir, workers, poll_interval):
+    """Enqueue one job per resume as the app does and poll it until done
+
+    Latency includes the wait for a worker to claim the job and the partial-result writes;
+    time to first score is when a poll first sees a score in the job's partial result.
+    """
+    queue = jobs.JobQueue(os.path.join(workdir, "app_jobs", "queue.sqlite3"),
+                          os.path.join(workdir, "app_jobs", "files"))
+    run_screening_job = jobs.run_screening_job
+
+    def tracked_job(queue, job):
+        # Worker threads do not inherit the benchmark's usage tracker
+        with metrics.activate(tracker):
+            return run_screening_job(queue, job)
+
+    jobs.run_screening_job = tracked_job
+    pool = jobs.WorkerPool(queue, threads=workers).start()
+    latencies, first_scores, queue_waits, parse_seconds, errors = [], [], [], 0.0, 0
+    try:
+        with open(jd_path, "rb") as f:
+            jd_hash, stored_jd = queue.store_file(f.read(), os.path.basename(jd_path))
+        for path in resumes:
+            start = time.perf_counter()
+            with open(path, "rb") as f:
+                resume_hash, stored_resume = queue.store_file(f.read(), os.path.basename(path))
+            job_id = queue.enqueue({
+                "resume_path": stored_resume, "resume_name": os.path.basename(path),
+                "resume_sha256": resume_hash, "jd_path": stored_jd,
+                "jd_name": os.path.basename(jd_path), "jd_sha256": jd_hash,
+                "scorer": "llm", "explain": True
+            })
+            first_score = None
+            while True:
+                job = queue.get(job_id)
+                if first_score is None and "overall_score" in (job["result"].get("comparison") or {}):
+                    first_score = time.perf_counter() - start
+                if job["status"] in jobs.FINISHED_STATUSES:
+                    break
+                time.sleep(poll_interval)
+            latencies.append(time.perf_counter() - start)
+            if job["started_at"]:
+                queue_waits.append(job["started_at"] - job["created_at"])
+            parse_seconds += (job["progress"].get("parse") or {}).get("seconds", 0.0)
+            if job["status"] == "failed":
+                errors += 1
+            elif first_score is not None:
+                first_scores.append(first_score)
+    finally:
+        pool.stop()
+        jobs.run_screening_job = run_screening_job
+    return {"latencies": latencies, "first_score": first_scores, "queue_wait": queue_waits,
+            "parse_seconds": parse_seconds, "errors": errors}
+
+
+def summarize(name, outcome, tracker, pairs):
+    latencies = outcome["latencies"]
+    wall = outcome.get("wall_seconds") or sum(latencies)
+    stages = stage_times(tracker)
+    if "parse_seconds" in outcome:
+        stages["parse"] = outcome["parse_seconds"]
+    result = {
+        "path": name,
+        "pairs": pairs,
+        "wall_seconds": round(wall, 3),
+        "pairs_per_second": round(pairs / wall, 2) if wall else 0.0,
+        "p50_seconds": round(percentile(latencies, 50), 3),
+        "p95_seconds": round(percentile(latencies, 95), 3),
+        "stage_seconds": {stage: round(seconds, 3) for stage, seconds in sorted(stages.items())},
+        "api_calls": tracker.summary()["calls"],
+        "cost_usd": tracker.summary()["cost_usd"],
+        "events": tracker.summary()["events"],
+        "errors": outcome.get("errors", 0)
+    }
+    if outcome.get("first_score"):
+        result["first_score_p50_seconds"] = round(percentile(outcome["first_score"], 50), 3)
+        result["first_score_p95_seconds"] = round(percentile(outcome["first_score"], 95), 3)
+    if outcome.get("queue_wait"):
+        result["queue_wait_p50_seconds"] = round(percentile(outcome["queue_wait"], 50), 3)
+        result["queue_wait_p95_seconds"] = round(percentile(outcome["queue_wait"], 95), 3)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Screening pipeline benchmark against a mock API")
+    parser.add_argument("--pairs", type=int, default=10, help="Resumes screened per path")
+    parser.add_argument("--paths", nargs="+", choices=PATHS, default=list(PATHS))
+    parser.add_argument("--workers", type=int, default=4, help="Batch path screening workers")
+    parser.add_argument("--app-workers", type=int, default=2,
+                        help="Job worker threads for the app path (the app's APP_WORKERS)")
+    parser.add_argument("--app-poll", type=float, default=0.05,
+                        help="Seconds between job status polls on the app path")
+    parser.add_argument("--latency", type=float, default=200, help="Mock response latency in ms")
+    parser.add_argument("--jitter", type=float, default=50, help="Mock latency jitter in ms")
+    parser.add_argument("--stream-chunk-ms", type=float, default=5, help="Delay between streamed chunks")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="Share of calls answered 429")
+    parser.add_argument("--malformed-rate", type=float, default=0.0,
+                        help="Share of JSON replies that come back malformed")
+    parser.add_argument("--warm", action="store_true",
+                        help="Keep caches between paths instead of starting each one cold")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", help="Write the results to this file")
+    args = parser.parse_args()
+
+    mock = MockOpenAI(latency_ms=args.latency, jitter_ms=args.jitter,
+                      stream_chunk_ms=args.stream_chunk_ms, rate_429=args.rate_429,
+                      malformed_rate=args.malformed_rate, seed=args.seed).start()
+    workdir = tempfile.mkdtemp(prefix="screening-bench-")
+    # Must be set before the pipeline modules read them at import time
+    os.environ.update({
+        "OPENAI_BASE_URL": mock.base_url,
+        "OPENAI_API_KEY": "sk-mock",
+        "SKILL_INDEX_DIR": os.path.join(workdir, "skill_index"),
+        "SCREENING_CACHE_PATH": os.path.join(workdir, "cache", "screening.db"),
+        "EMBEDDING_CACHE_PATH": os.path.join(workdir, "cache", "embeddings.db"),
+        "RESULT_STORE_PATH": os.path.join(workdir, "cache", "screenings.sqlite3"),
+    })
+
+    import batch
+    import jobs
+    import logic
+    import metrics
+
+    jd_path, resumes = make_documents(workdir, args.pairs, args.seed)
+    results = []
+    try:
+        # The skill index is built once per deployment, not per pair
+        logic.get_skill_vector_store()
+        for name in args.paths:
+            if not args.warm:
+                reset_caches(logic, os.path.join(workdir, f"{name}_cache"))
+            with metrics.track(name) as tracker:
+                if name == "single":
+                    outcome = run_single(logic, jd_path, resumes)
+                elif name == "batch":
+                    outcome = run_batch_path(batch, jd_path, resumes, workdir, args.workers)
+                else:
+                    outcome = run_app(jobs, metrics, tracker, jd_path, resumes, workdir,
+                                      args.app_workers, args.app_poll)
+            results.append(summarize(name, outcome, tracker, len(resumes)))
+    finally:
+        mock.stop()
+
+    report = {"mock": {"latency_ms": args.latency, "jitter_ms": args.jitter,
+                       "rate_429": args.rate_429, "malformed_rate": args.malformed_rate,
+                       **mock.counters},
+              "results": results}
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    print(f"{args.pairs} pairs per path, mock latency {args.latency:.0f}±{args.jitter:.0f} ms, "
+          f"{args.rate_429:.0%} 429s, {args.malformed_rate:.0%} malformed; "
+          f"{mock.counters['requests']} requests served\n")
+    print(f"{'path':<7} {'pairs/s':>8} {'p50 s':>7} {'p95 s':>7} {'calls':>6} {'errors':>6}  stage seconds")
+    for row in results:
+        stages = ", ".join(f"{stage} {seconds:.2f}" for stage, seconds in row["stage_seconds"].items())
+        print(f"{row['path']:<7} {row['pairs_per_second']:>8.2f} {row['p50_seconds']:>7.3f} "
+              f"{row['p95_seconds']:>7.3f} {row['api_calls']:>6} {row['errors']:>6}  {stages}")
+        if row["events"].get("first_pass"):
+            escalated = sum(n for event, n in row["events"].items() if event.startswith("escalated"))
+            print(f"{'':<7} {escalated}/{row['events']['first_pass']} first-pass scores escalated, "
+                  f"${row['cost_usd']:.4f}")
+        if "first_score_p50_seconds" in row:
+            print(f"{'':<7} time to first score p50 {row['first_score_p50_seconds']:.3f}s, "
+                  f"p95 {row['first_score_p95_seconds']:.3f}s")
+        if "queue_wait_p50_seconds" in row:
+            print(f"{'':<7} wait for a worker p50 {row['queue_wait_p50_seconds']:.3f}s, "
+                  f"p95 {row['queue_wait_p95_seconds']:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
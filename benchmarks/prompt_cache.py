@@ -0,0 +1,169 @@
+"""Input tokens and prompt-cache hit ratio of the scoring and explanation prompts.
+
+Screens a batch of synthetic candidates against one JD with each prompt layout in
+prompts.PROMPT_VERSIONS and reports, per call type, the input tokens sent and the share
+of them the provider's automatic prefix cache can serve. The cache is simulated the
+way OpenAI documents it: the longest prefix shared with an earlier request in the run
+counts as cached, in 128-token steps, once it reaches 1024 tokens.
+
+With --live the same calls go to the configured API instead (OPENAI_BASE_URL can point
+at a stand-in) and the cached tokens reported in each response's usage are used.
+
+    python benchmarks/prompt_cache.py --candidates 20
+    python benchmarks/prompt_cache.py --live --candidates 5
+"""
+import argparse
+import json
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import metrics  # noqa: E402
+import prompts  # noqa: E402
+from tokens import CHARS_PER_TOKEN, _encoding, count_tokens, tokenizer_available  # noqa: E402
+
+MODEL = "gpt-4o"
+CACHE_MIN_TOKENS = 1024
+CACHE_INCREMENT = 128
+# Per-message framing tokens added by the chat format
+MESSAGE_OVERHEAD = 4
+
+SKILLS = ["Python", "Kubernetes", "TensorFlow", "PostgreSQL", "Terraform", "Rust", "React",
+          "Apache Spark", "Computer Vision", "Natural Language Processing", "GraphQL", "Kafka",
+          "Docker", "AWS", "Azure", "Go", "Java", "Scikit-learn", "Airflow", "Snowflake"]
+CERTS = ["AWS Certified Solutions Architect", "CKA Kubernetes Administrator",
+         "Google Professional Data Engineer", "Azure AI Engineer Associate"]
+DEGREES = ["Bachelor of Technology in Computer Science", "Master of Science in Data Science",
+           "Bachelor of Engineering in Electronics"]
+
+
+def synthetic_profile(rng, skills=8):
+    return {
+        "technical_skills": rng.sample(SKILLS, skills),
+        "qualifications": [rng.choice(DEGREES), f"{rng.randint(1, 12)} years of experience"],
+        "certifications": rng.sample(CERTS, rng.randint(0, 2))
+    }
+
+
+def synthetic_comparison(rng):
+    return {
+        "certifications_required": rng.random() < 0.5,
+        "overall_score": round(rng.uniform(20, 95), 1),
+        "score_breakdown": {"technical_skills": 40.0, "qualifications": 25.0,
+                            "certifications": 10.0, "bonuses": 2.0},
+        "missing_requirements": rng.sample(SKILLS, 3),
+        "matched_requirements": rng.sample(SKILLS, 4),
+        "strength_analysis": ["Strong cloud background", "Relevant degree", "ML projects"],
+        "improvement_areas": ["No Kubernetes", "Limited leadership", "No certifications"],
+        "hiring_recommendation": "Proceed to technical interview",
+        "next_steps": ["Technical screen", "Portfolio review", "Team interview"]
+    }
+
+
+def prompt_tokens(messages):
+    """Token sequence (or character sequence without a tokenizer) of a chat prompt"""
+    text = "".join(f"<|{m['role']}|>{m['content']}<|end|>" for m in messages)
+    encoding = _encoding(MODEL)
+    return encoding.encode(text, disallowed_special=()) if encoding else text
+
+
+def common_prefix(a, b):
+    n = 0
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        n += 1
+    return n
+
+
+def simulated_cached(sequence, history):
+    """Tokens of sequence a prefix cache filled by the earlier requests in history would serve"""
+    shared = max((common_prefix(sequence, earlier) for earlier in history), default=0)
+    if not tokenizer_available(MODEL):
+        shared //= CHARS_PER_TOKEN
+    if shared < CACHE_MIN_TOKENS:
+        return 0
+    return shared - (shared - CACHE_MIN_TOKENS) % CACHE_INCREMENT
+
+
+def input_tokens(messages):
+    return sum(count_tokens(m["content"], MODEL) + MESSAGE_OVERHEAD for m in messages)
+
+
+def simulate(version, jd, candidates):
+    stats = {"comparison": [], "explanation": []}
+    history = []
+    for resume, comparison in candidates:
+        calls = [("comparison", prompts.comparison_messages(resume, jd, version)),
+                 ("explanation", prompts.explanation_messages(resume, jd, comparison, version))]
+        for name, messages in calls:
+            sequence = prompt_tokens(messages)
+            stats[name].append((input_tokens(messages), simulated_cached(sequence, history)))
+            history.append(sequence)
+    return stats
+
+
+def run_live(version, jd, candidates):
+    import logic
+
+    prompts.PROMPT_VERSION = version
+    stats = {"comparison": [], "explanation": []}
+    for resume, _ in candidates:
+        with metrics.track("comparison") as usage:
+            comparison = logic.compare_skills(resume, jd)
+        summary = usage.summary()
+        stats["comparison"].append((summary["prompt_tokens"], summary["cached_tokens"]))
+        with metrics.track("explanation") as usage:
+            logic.generate_score_explanation(resume, jd, comparison)
+        summary = usage.summary()
+        stats["explanation"].append((summary["prompt_tokens"], summary["cached_tokens"]))
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prompt token and prefix-cache benchmark")
+    parser.add_argument("--candidates", type=int, default=20, help="Resumes screened against the JD")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--live", action="store_true",
+                        help="Send the calls to the API and read cached tokens from usage")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    jd = synthetic_profile(rng, skills=12)
+    candidates = [(synthetic_profile(rng), synthetic_comparison(rng)) for _ in range(args.candidates)]
+
+    results = {}
+    for version in prompts.PROMPT_VERSIONS:
+        stats = run_live(version, jd, candidates) if args.live else simulate(version, jd, candidates)
+        results[version] = {}
+        for name, calls in stats.items():
+            total = sum(tokens for tokens, _ in calls)
+            cached = sum(hit for _, hit in calls)
+            cost = sum(metrics.call_cost(MODEL, tokens, 0, hit) for tokens, hit in calls)
+            results[version][name] = {
+                "template": prompts.template_version(name, version),
+                "calls": len(calls),
+                "input_tokens_per_call": round(total / len(calls), 1) if calls else 0,
+                "cached_ratio": round(cached / total, 3) if total else 0.0,
+                "input_cost_usd": round(cost, 5)
+            }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    mode = "live API usage" if args.live else "simulated prefix cache"
+    counting = "tiktoken" if tokenizer_available(MODEL) else f"~{CHARS_PER_TOKEN} chars/token estimate"
+    print(f"{args.candidates} candidates against one JD, {mode}, tokens by {counting}\n")
+    print(f"{'layout':<7} {'call':<12} {'tokens/call':>12} {'cached':>8} {'input $':>9}")
+    for version, calls in results.items():
+        for name, row in calls.items():
+            print(f"{version:<7} {name:<12} {row['input_tokens_per_call']:>12.1f} "
+                  f"{row['cached_ratio']:>8.1%} {row['input_cost_usd']:>9.4f}")
+
+
+if __name__ == "__main__":
+    main()
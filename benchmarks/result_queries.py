@@ -0,0 +1,91 @@
+"""Query latency of the screening result store at dashboard scale.
+
+Fills a temporary store with synthetic screenings spread over a few JDs and times the
+queries the app's leaderboard and the results CLI run: a page by score, a filtered page,
+a deep page, the filtered count and the JD list. No API calls are made.
+
+    python benchmarks/result_queries.py --screenings 10000
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from result_store import ResultStore  # noqa: E402
+
+
+def synthetic_screenings(count, jobs, rng):
+    for i in range(count):
+        score = round(rng.uniform(0, 100), 1)
+        yield {
+            "jd_id": f"{i % jobs:064x}",
+            "candidate_id": f"{i:064x}",
+            "scorer": rng.choice(["llm", "llm", "fused", "local"]),
+            "comparison": {"overall_score": score, "hiring_recommendation": "Proceed" if score >= 50 else "Reject",
+                           "matched_requirements": ["Python", "Cloud Computing"],
+                           "missing_requirements": ["Kubernetes"]},
+            "explanation": "## Overall Assessment\n" + "Solid background. " * 40,
+            "prompt_version": "comparison-v2-000000000000",
+            "model": "gpt-4o",
+            "jd_name": f"jd_{i % jobs}.pdf",
+            "candidate_name": f"resume_{i:05d}.pdf"
+        }
+
+
+def time_query(query, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        query()
+        timings.append((time.perf_counter() - start) * 1000)
+    return {"median_ms": round(statistics.median(timings), 3), "max_ms": round(max(timings), 3)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Result store query benchmark")
+    parser.add_argument("--screenings", type=int, default=10000)
+    parser.add_argument("--jobs", type=int, default=5, help="JDs the screenings are spread over")
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", help="Write the results to this file")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    store = ResultStore(os.path.join(tempfile.mkdtemp(prefix="result-store-bench-"), "screenings.sqlite3"))
+    start = time.perf_counter()
+    store.save_many(list(synthetic_screenings(args.screenings, args.jobs, rng)))
+    insert_seconds = time.perf_counter() - start
+
+    jd_id = f"{0:064x}"
+    per_jd = store.count(jd_id)
+    queries = {
+        "top page": lambda: store.leaderboard(jd_id),
+        "recent page": lambda: store.leaderboard(jd_id, order="recent"),
+        "min score 80, llm": lambda: store.leaderboard(jd_id, min_score=80, scorer="llm"),
+        "last page": lambda: store.leaderboard(jd_id, offset=max(per_jd - 25, 0)),
+        "filtered count": lambda: store.count(jd_id, min_score=80),
+        "jobs": store.jobs,
+        "get": lambda: store.get(jd_id, f"{0:064x}", "llm"),
+    }
+    results = {name: time_query(query, args.repeat) for name, query in queries.items()}
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"screenings": args.screenings, "insert_seconds": round(insert_seconds, 3),
+                       "queries": results}, f, indent=2)
+
+    print(f"{args.screenings} screenings over {args.jobs} JDs ({per_jd} for the queried JD), "
+          f"inserted in {insert_seconds:.2f}s\n")
+    print(f"{'query':<20} {'median ms':>10} {'max ms':>8}")
+    for name, row in results.items():
+        print(f"{name:<20} {row['median_ms']:>10.3f} {row['max_ms']:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Compare section-aware prompt payloads with the old blind text[:10000] cut.
+
+For each document, reports input tokens sent to the extraction prompt and the
+recall of the facts the prompt asks for (skills, certifications, degrees).
+Synthetic resumes with known facts are generated by default; real PDF/DOCX
+files can be passed too, in which case recall is measured against the terms
+listed with --facts.
+
+    python benchmarks/section_budget.py
+    python benchmarks/section_budget.py resumes/*.pdf --facts Python AWS "Bachelor"
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sections import build_prompt_payload  # noqa: E402
+from tokens import count_tokens, tokenizer_available  # noqa: E402
+
+LEGACY_CHAR_CUT = 10000
+
+SKILLS = ["Python", "Kubernetes", "TensorFlow", "PostgreSQL", "Terraform", "Rust", "React",
+          "Apache Spark", "Computer Vision", "Natural Language Processing", "GraphQL", "Kafka"]
+CERTS = ["AWS Certified Solutions Architect", "CKA Kubernetes Administrator",
+         "Google Professional Data Engineer", "Azure AI Engineer Associate"]
+DEGREES = ["Bachelor of Technology in Computer Science", "Master of Science in Data Science"]
+FILLER = ("Collaborated with cross-functional stakeholders to deliver initiatives on schedule, "
+          "drove alignment across teams and communicated progress to leadership. ")
+
+
+def synthetic_resume(rng, experience_paragraphs):
+    """A resume whose skills and certifications sit after a long experience section"""
+    skills = rng.sample(SKILLS, 6)
+    certs = rng.sample(CERTS, 2)
+    degree = rng.choice(DEGREES)
+    lines = ["Jane Doe", "jane@example.com | +1 555 0100 | github.com/janedoe", "",
+             "PROFESSIONAL SUMMARY", FILLER * 3, "", "WORK EXPERIENCE"]
+    for i in range(experience_paragraphs):
+        lines += [f"Senior Engineer, Company {i} (2015-2020)", FILLER * 4]
+    lines += ["", "PROJECTS", "Built a customer support chatbot. " + FILLER,
+              "", "EDUCATION", degree, "", "TECHNICAL SKILLS", ", ".join(skills),
+              "", "CERTIFICATIONS"] + certs + ["", "HOBBIES", FILLER * 2,
+                                                "", "REFERENCES", "Available on request."]
+    return "\n".join(lines), skills + certs + [degree]
+
+
+def recall(payload, facts):
+    return sum(fact.lower() in payload.lower() for fact in facts) / len(facts) if facts else 1.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Section-aware payload benchmark")
+    parser.add_argument("files", nargs="*", help="Optional real PDF/DOCX documents")
+    parser.add_argument("--facts", nargs="*", default=[], help="Terms expected in real documents")
+    parser.add_argument("--budget", type=int, help="Token budget (default: EXTRACTION_TOKEN_BUDGET)")
+    parser.add_argument("--samples", type=int, default=20, help="Synthetic resumes per size")
+    args = parser.parse_args()
+
+    from logic import EXTRACTION_CHAR_BUDGET, EXTRACTION_TOKEN_BUDGET, extract_text_from_file
+    budget = args.budget or EXTRACTION_TOKEN_BUDGET
+
+    rng = random.Random(0)
+    cases = []
+    for label, paragraphs in [("short", 2), ("medium", 12), ("long", 40)]:
+        for _ in range(args.samples):
+            text, facts = synthetic_resume(rng, paragraphs)
+            cases.append((label, text, facts))
+    for path in args.files:
+        cases.append((os.path.basename(path),
+                      extract_text_from_file(path, max_chars=EXTRACTION_CHAR_BUDGET), args.facts))
+
+    print(f"Token budget: {budget}   (tokens counted with {'tiktoken' if tokenizer_available() else 'a 4 chars/token estimate'})")
+    print(f"{'case':<20}{'legacy tokens':>14}{'section tokens':>16}{'legacy recall':>15}{'section recall':>16}")
+    groups = {}
+    for label, text, facts in cases:
+        legacy = text[:LEGACY_CHAR_CUT]
+        payload = build_prompt_payload(text, budget)
+        groups.setdefault(label, []).append((
+            count_tokens(legacy), count_tokens(payload), recall(legacy, facts), recall(payload, facts)))
+
+    for label, rows in groups.items():
+        legacy_tokens, section_tokens, legacy_recall, section_recall = (
+            statistics.mean(column) for column in zip(*rows))
+        print(f"{label:<20}{legacy_tokens:>14.0f}{section_tokens:>16.0f}"
+              f"{legacy_recall:>15.0%}{section_recall:>16.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,326 @@
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+
+from batch import collect_resume_paths, file_sha256, write_ranked
+from extraction import EXTRACTION_WORKERS, extract_texts_parallel
+import metrics
+from logic import (EXTRACTION_CHAR_BUDGET, EXTRACTION_PROMPT_VERSION, build_comparison_request,
+                   build_extraction_request, extraction_cache_key, get_extraction_cache,
+                   escalation_reason, get_openai_client, get_result_store,
+                   parse_comparison_response, parse_extraction_response, prefetch_skill_contexts,
+                   scoring_models, scoring_version)
+from result_store import records_to_screenings
+
+BULK_WORK_DIR = os.environ.get("BULK_WORK_DIR", ".bulk")
+BULK_POLL_INTERVAL = float(os.environ.get("BULK_POLL_INTERVAL", "60"))
+# The Batch API accepts at most 50,000 requests per input file
+BULK_MAX_REQUESTS = 50000
+BATCH_ENDPOINT = "/v1/chat/completions"
+TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+def document_id(path):
+    """Stable ID for a resume or JD: the first 16 hex digits of its content hash"""
+    return file_sha256(path)[:16]
+
+
+def write_requests(path, requests):
+    """Write {custom_id: chat completion arguments} as a Batch API input file"""
+    with open(path, "w", encoding="utf-8") as f:
+        for custom_id, body in requests.items():
+            f.write(json.dumps({"custom_id": custom_id, "method": "POST",
+                                "url": BATCH_ENDPOINT, "body": body}) + "\n")
+    return path
+
+
+def submit_batch(client, input_path, description):
+    """Upload a request file and start a 24h batch job, returning the batch ID"""
+    with open(input_path, "rb") as f:
+        input_file = client.files.create(file=f, purpose="batch")
+    batch = client.batches.create(
+        input_file_id=input_file.id,
+        endpoint=BATCH_ENDPOINT,
+        completion_window="24h",
+        metadata={"description": description}
+    )
+    return batch.id
+
+
+def wait_for_batch(client, batch_id, poll_interval=BULK_POLL_INTERVAL):
+    """Poll a batch until it reaches a terminal status"""
+    while True:
+        batch = client.batches.retrieve(batch_id)
+        if batch.status in TERMINAL_STATUSES:
+            return batch
+        counts = batch.request_counts
+        progress = f" {counts.completed + counts.failed}/{counts.total}" if counts else ""
+        print(f"Batch {batch_id} {batch.status}{progress}", file=sys.stderr)
+        time.sleep(poll_interval)
+
+
+def _read_jsonl(client, file_id):
+    if not file_id:
+        return []
+    return [json.loads(line) for line in client.files.content(file_id).text.splitlines() if line.strip()]
+
+
+def download_results(client, batch):
+    """Split a finished batch into ({custom_id: message content}, {custom_id: error})"""
+    results, errors = {}, {}
+    for line in _read_jsonl(client, batch.output_file_id) + _read_jsonl(client, batch.error_file_id):
+        custom_id = line["custom_id"]
+        response = line.get("response") or {}
+        if line.get("error"):
+            errors[custom_id] = line["error"].get("message") or line["error"].get("code")
+        elif response.get("status_code") != 200:
+            body = response.get("body") or {}
+            errors[custom_id] = (body.get("error") or {}).get("message") or \
+                f"HTTP {response.get('status_code')}"
+        else:
+            body = response["body"]
+            # The stage is the custom_id prefix ("extract-..." or "compare-...")
+            metrics.record_usage(custom_id.split("-", 1)[0], body.get("model"), body.get("usage"),
+                                 batch=True)
+            results[custom_id] = body["choices"][0]["message"]["content"]
+    return results, errors
+
+
+def _load_state(work_dir):
+    path = os.path.join(work_dir, "state.json")
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _save_state(work_dir, state):
+    path = os.path.join(work_dir, "state.json")
+    with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+    os.replace(f"{path}.tmp", path)
+
+
+def run_stage(client, stage, requests, parse, work_dir=BULK_WORK_DIR, max_attempts=3,
+              poll_interval=BULK_POLL_INTERVAL):
+    """Run one prompt over the Batch API, resubmitting failed requests
+
+    requests maps custom_id to chat completion arguments. Responses are parsed with parse;
+    a parsed dict holding 'error' counts as a failure and is retried like a request error.
+    Progress is kept in work_dir, so an interrupted run picks up its in-flight batches
+    instead of paying for them twice. Returns ({custom_id: parsed}, {custom_id: error}).
+    """
+    os.makedirs(work_dir, exist_ok=True)
+    state = _load_state(work_dir)
+    fingerprint = hashlib.sha256(json.dumps(requests, sort_keys=True).encode("utf-8")).hexdigest()
+    stage_state = state.get(stage)
+    if not stage_state or stage_state.get("fingerprint") != fingerprint:
+        # A different request set is a new job; never reuse another job's attempts
+        stage_state = state[stage] = {"fingerprint": fingerprint, "attempt": 0, "batch_ids": [],
+                                      "results": {}}
+    results = {cid: r for cid, r in stage_state["results"].items() if cid in requests}
+    errors = {}
+
+    while True:
+        pending = {cid: body for cid, body in requests.items() if cid not in results}
+        if not pending:
+            break
+        in_flight = stage_state.get("in_flight")
+        if not in_flight:
+            if stage_state["attempt"] >= max_attempts:
+                break
+            stage_state["attempt"] += 1
+            items = list(pending.items())
+            in_flight = []
+            for start in range(0, len(items), BULK_MAX_REQUESTS):
+                input_path = write_requests(
+                    os.path.join(work_dir, f"{stage}-{stage_state['attempt']}-{start // BULK_MAX_REQUESTS}.jsonl"),
+                    dict(items[start:start + BULK_MAX_REQUESTS]))
+                in_flight.append(submit_batch(client, input_path, f"{stage} attempt {stage_state['attempt']}"))
+            stage_state["in_flight"] = in_flight
+            stage_state["batch_ids"].extend(in_flight)
+            _save_state(work_dir, state)
+            print(f"{stage}: submitted {len(pending)} requests "
+                  f"(attempt {stage_state['attempt']}/{max_attempts})", file=sys.stderr)
+
+        errors = {}
+        statuses = set()
+        for batch_id in in_flight:
+            batch = wait_for_batch(client, batch_id, poll_interval)
+            statuses.add(batch.status)
+            contents, batch_errors = download_results(client, batch)
+            errors.update(batch_errors)
+            for custom_id, content in contents.items():
+                parsed = parse(content)
+                if isinstance(parsed, dict) and "error" in parsed:
+                    errors[custom_id] = parsed["error"]
+                else:
+                    results[custom_id] = parsed
+        # Requests an expired or failed batch never reached appear in neither file
+        for custom_id in pending:
+            if custom_id not in results:
+                errors.setdefault(custom_id, f"No result returned (batch {'/'.join(sorted(statuses))})")
+
+        stage_state["results"] = results
+        stage_state["in_flight"] = []
+        _save_state(work_dir, state)
+        print(f"{stage}: {len(results)}/{len(requests)} succeeded, {len(errors)} failed", file=sys.stderr)
+
+    return results, {cid: errors.get(cid, "Not attempted") for cid in requests if cid not in results}
+
+
+def run_bulk(jd_path, resume_paths, output_path, fmt="jsonl", work_dir=BULK_WORK_DIR,
+             max_attempts=3, poll_interval=BULK_POLL_INTERVAL, use_cache=True,
+             extract_workers=EXTRACTION_WORKERS):
+    """Screen resumes against one JD through the Batch API and write ranked results
+
+    Extraction runs as one batch job and scoring as a second, since scoring needs the
+    extracted profiles. Results are reconciled to candidate and JD IDs (content hashes).
+    """
+    client = get_openai_client()
+    jd_id = document_id(jd_path)
+    documents = {jd_id: {"path": jd_path}}
+    candidates = []
+    for path in resume_paths:
+        candidate_id = document_id(path)
+        candidates.append((candidate_id, path))
+        documents.setdefault(candidate_id, {"path": path})
+
+    failed = {}
+    for item in extract_texts_parallel([d["path"] for d in documents.values()],
+                                       workers=extract_workers, max_chars=EXTRACTION_CHAR_BUDGET):
+        doc_id = document_id(item["path"])
+        if "error" in item:
+            failed[doc_id] = f"Text extraction failed ({item['error_type']}): {item['error']}"
+        elif not item["text"].strip():
+            failed[doc_id] = "Empty content in file"
+        else:
+            documents[doc_id]["text"] = item["text"]
+
+    # Profiles already in the extraction cache skip the extraction batch entirely
+    profiles = {}
+    to_extract = []
+    for doc_id, doc in documents.items():
+        if "text" not in doc:
+            continue
+        cached = get_extraction_cache().get(extraction_cache_key(doc["text"])) if use_cache else None
+        if cached is not None:
+            profiles[doc_id] = cached
+        else:
+            to_extract.append(doc_id)
+
+    if to_extract:
+        contexts = prefetch_skill_contexts([documents[d]["text"] for d in to_extract], use_cache=False)
+        requests = {
+            f"extract-{doc_id}": build_extraction_request(documents[doc_id]["text"], context)
+            for doc_id, context in zip(to_extract, contexts)
+        }
+        extracted, errors = run_stage(client, "extract", requests, parse_extraction_response,
+                                      work_dir, max_attempts, poll_interval)
+        for custom_id, profile in extracted.items():
+            doc_id = custom_id.split("-", 1)[1]
+            profiles[doc_id] = profile
+            if use_cache:
+                get_extraction_cache().set(extraction_cache_key(documents[doc_id]["text"]), profile,
+                                           version=EXTRACTION_PROMPT_VERSION)
+        for custom_id, error in errors.items():
+            failed[custom_id.split("-", 1)[1]] = f"Extraction failed: {error}"
+
+    if jd_id not in profiles:
+        raise ValueError(f"Job description extraction failed: {failed.get(jd_id)}")
+
+    def comparison_requests(candidate_ids, model):
+        return {
+            f"compare-{jd_id}-{candidate_id}": build_comparison_request(
+                profiles[candidate_id], profiles[jd_id], model)
+            for candidate_id in candidate_ids
+        }
+
+    models = scoring_models()
+    scored = [candidate_id for candidate_id, _ in candidates if candidate_id in profiles]
+    # With tiering, the first pass gets one attempt; anything it fails or leaves borderline
+    # is rescored by the large model in a second batch job
+    comparisons, errors = run_stage(client, "compare", comparison_requests(scored, models[0]),
+                                    parse_comparison_response, work_dir,
+                                    max_attempts if len(models) == 1 else 1, poll_interval)
+    for comparison in comparisons.values():
+        comparison["scoring_model"] = models[0]
+    if len(models) > 1:
+        escalate = []
+        for candidate_id in scored:
+            custom_id = f"compare-{jd_id}-{candidate_id}"
+            metrics.count_event("first_pass")
+            reason = escalation_reason(comparisons[custom_id]) if custom_id in comparisons else "parse_failure"
+            if reason:
+                metrics.count_event(f"escalated_{reason}")
+                escalate.append(candidate_id)
+        escalated, errors = run_stage(client, "escalate", comparison_requests(escalate, models[-1]),
+                                      parse_comparison_response, work_dir, max_attempts, poll_interval)
+        for custom_id, comparison in escalated.items():
+            comparison["scoring_model"] = models[-1]
+            comparisons[custom_id] = comparison
+
+    records = []
+    for candidate_id, path in candidates:
+        custom_id = f"compare-{jd_id}-{candidate_id}"
+        record = {"resume_path": path, "resume_sha256": file_sha256(path),
+                  "candidate_id": candidate_id, "jd_id": jd_id}
+        if custom_id in comparisons:
+            record.update(comparisons[custom_id])
+            record["resume_skills"] = profiles[candidate_id]
+        else:
+            record["error"] = failed.get(candidate_id) or f"Scoring failed: {errors.get(custom_id)}"
+            record["overall_score"] = 0
+        records.append(record)
+    prompt_version, model = scoring_version('llm')
+    get_result_store().save_many(records_to_screenings(
+        records, file_sha256(jd_path), 'llm', prompt_version, model, jd_name=os.path.basename(jd_path)))
+    return write_ranked(output_path, records, fmt)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Screen resumes against one JD through the OpenAI Batch API (results within 24h)')
+    parser.add_argument('job_description_path', help='Path to PDF/DOCX job description file')
+    parser.add_argument('resumes', nargs='+', help='Resume files, directories or glob patterns')
+    parser.add_argument('-o', '--output', default='bulk_results.jsonl', help='Ranked results file')
+    parser.add_argument('--format', choices=['jsonl', 'csv'],
+                        help='Output format (default: inferred from --output)')
+    parser.add_argument('--work-dir', default=BULK_WORK_DIR,
+                        help='Request files and job state; rerun with the same directory to resume')
+    parser.add_argument('--max-attempts', type=int, default=3,
+                        help='Batch submissions per stage before a request is reported as failed')
+    parser.add_argument('--poll-interval', type=float, default=BULK_POLL_INTERVAL,
+                        help='Seconds between batch status checks')
+    parser.add_argument('--extract-workers', type=int, default=EXTRACTION_WORKERS,
+                        help='Processes used to parse PDF/DOCX files')
+    parser.add_argument('--no-cache', action='store_true', help='Bypass the extraction cache')
+    parser.add_argument('--usage-report', metavar='PATH',
+                        help='Write token/cost usage as JSON, or Prometheus text for *.prom')
+
+    args = parser.parse_args(argv)
+    fmt = args.format or ('csv' if args.output.lower().endswith('.csv') else 'jsonl')
+
+    if not os.path.exists(args.job_description_path):
+        raise FileNotFoundError(f"File {args.job_description_path} not found")
+    resume_paths = collect_resume_paths(args.resumes)
+    if not resume_paths:
+        raise FileNotFoundError("No PDF/DOCX resumes matched the given paths")
+
+    with metrics.track('bulk') as usage:
+        ranked = run_bulk(args.job_description_path, resume_paths, args.output, fmt=fmt,
+                          work_dir=args.work_dir, max_attempts=args.max_attempts,
+                          poll_interval=args.poll_interval, use_cache=not args.no_cache,
+                          extract_workers=args.extract_workers)
+    print(f"USAGE: {metrics.format_summary(usage.summary())}", file=sys.stderr)
+    if args.usage_report:
+        metrics.write_report(args.usage_report, usage)
+    failures = sum(1 for record in ranked if record.get('error'))
+    print(f"{len(ranked) - failures} of {len(ranked)} resumes scored; results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
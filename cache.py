@@ -0,0 +1,127 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+CACHE_PATH = os.environ.get("SCREENING_CACHE_PATH", ".cache/screening_cache.sqlite3")
+CACHE_MAX_ENTRIES = int(os.environ.get("SCREENING_CACHE_MAX_ENTRIES", "5000"))
+CACHE_TTL_SECONDS = int(os.environ.get("SCREENING_CACHE_TTL_SECONDS", str(30 * 24 * 3600)))
+
+
+def normalize_text(text):
+    """Collapse whitespace so cosmetic re-exports of a document hash the same"""
+    return re.sub(r'\s+', ' ', text or '').strip()
+
+
+def make_cache_key(text, **params):
+    """Hash normalized text together with the parameters that shape the LLM output"""
+    payload = json.dumps({"text": normalize_text(text), "params": params}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """SQLite-backed JSON cache with TTL expiry, LRU eviction and hit/miss counters"""
+
+    def __init__(self, path=CACHE_PATH, namespace="default",
+                 max_entries=CACHE_MAX_ENTRIES, ttl_seconds=CACHE_TTL_SECONDS):
+        self.path = path
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                version TEXT NOT NULL,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            )""")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_cache_lru ON cache_entries (namespace, accessed_at)")
+        self._conn.commit()
+
+    def get(self, key):
+        """Return the cached value for key, or None on a miss or expired entry"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM cache_entries WHERE namespace = ? AND key = ?",
+                (self.namespace, key)
+            ).fetchone()
+            if row is None or (self.ttl_seconds and now - row[1] > self.ttl_seconds):
+                if row is not None:
+                    self._conn.execute(
+                        "DELETE FROM cache_entries WHERE namespace = ? AND key = ?",
+                        (self.namespace, key))
+                    self._conn.commit()
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE cache_entries SET accessed_at = ? WHERE namespace = ? AND key = ?",
+                (now, self.namespace, key))
+            self._conn.commit()
+            self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, key, value, version=""):
+        """Store a JSON-serializable value and evict least recently used entries"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache_entries VALUES (?, ?, ?, ?, ?, ?)",
+                (self.namespace, key, version, json.dumps(value), now, now))
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now):
+        if self.ttl_seconds:
+            self._conn.execute(
+                "DELETE FROM cache_entries WHERE namespace = ? AND created_at < ?",
+                (self.namespace, now - self.ttl_seconds))
+        if self.max_entries:
+            self._conn.execute("""
+                DELETE FROM cache_entries WHERE namespace = ? AND key IN (
+                    SELECT key FROM cache_entries WHERE namespace = ?
+                    ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                )""", (self.namespace, self.namespace, self.max_entries))
+
+    def invalidate(self, keep_version=None):
+        """Drop every entry, or only those not written under keep_version"""
+        with self._lock:
+            if keep_version is None:
+                cursor = self._conn.execute(
+                    "DELETE FROM cache_entries WHERE namespace = ?", (self.namespace,))
+            else:
+                cursor = self._conn.execute(
+                    "DELETE FROM cache_entries WHERE namespace = ? AND version != ?",
+                    (self.namespace, keep_version))
+            self._conn.commit()
+        return cursor.rowcount
+
+    def stats(self):
+        """Hit/miss counters for this process plus the current entry count"""
+        with self._lock:
+            size = self._conn.execute(
+                "SELECT COUNT(*) FROM cache_entries WHERE namespace = ?", (self.namespace,)
+            ).fetchone()[0]
+        total = self.hits + self.misses
+        return {
+            "namespace": self.namespace,
+            "entries": size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0
+        }
@@ -0,0 +1,81 @@
+import os
+import sys
+import threading
+
+try:
+    import tomllib
+except ModuleNotFoundError:  # Python < 3.11 falls back to st.secrets only
+    tomllib = None
+
+SECRETS_PATHS = [
+    os.path.join(".streamlit", "secrets.toml"),
+    os.path.join(os.path.expanduser("~"), ".streamlit", "secrets.toml"),
+]
+
+_api_key = None
+_api_key_lock = threading.Lock()
+
+
+def _key_from_secrets_file(path):
+    if tomllib is None:
+        return None
+    try:
+        with open(path, "rb") as f:
+            return tomllib.load(f).get("openai", {}).get("api_key")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _key_from_streamlit():
+    # Only consult st.secrets when Streamlit is already loaded, i.e. inside the app;
+    # importing it here would cost every CLI and worker process the full Streamlit import
+    if "streamlit" not in sys.modules:
+        return None
+    try:
+        return sys.modules["streamlit"].secrets["openai"]["api_key"]
+    except Exception:
+        return None
+
+
+def resolve_api_key():
+    """Find the OpenAI API key in the environment, a key file or Streamlit secrets
+
+    Sources are tried in order: OPENAI_API_KEY, the file named by OPENAI_API_KEY_FILE,
+    [openai] api_key in .streamlit/secrets.toml (project, then home) and st.secrets.
+    """
+    if os.environ.get("OPENAI_API_KEY"):
+        return os.environ["OPENAI_API_KEY"].strip()
+
+    key_file = os.environ.get("OPENAI_API_KEY_FILE")
+    if key_file:
+        try:
+            with open(key_file, encoding="utf-8") as f:
+                return f.read().strip()
+        except OSError as e:
+            raise RuntimeError(
+                f"Cannot read the OpenAI API key file {key_file} named by OPENAI_API_KEY_FILE: "
+                f"{e.strerror or e}") from e
+
+    for path in SECRETS_PATHS:
+        key = _key_from_secrets_file(path)
+        if key:
+            return key
+
+    key = _key_from_streamlit()
+    if key:
+        return key
+
+    raise RuntimeError(
+        "No OpenAI API key found. Set OPENAI_API_KEY, point OPENAI_API_KEY_FILE at a key file, "
+        "or add [openai] api_key to .streamlit/secrets.toml"
+    )
+
+
+def get_api_key():
+    """Resolve the API key once per process"""
+    global _api_key
+    if _api_key is None:
+        with _api_key_lock:
+            if _api_key is None:
+                _api_key = resolve_api_key()
+    return _api_key
@@ -0,0 +1,126 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from array import array
+
+from langchain_core.embeddings import Embeddings
+
+import metrics
+from tokens import count_tokens
+
+EMBEDDING_CACHE_PATH = os.environ.get("EMBEDDING_CACHE_PATH", ".cache/embeddings.sqlite3")
+# Texts per underlying embeddings request when filling cache misses
+EMBEDDING_BATCH_SIZE = int(os.environ.get("EMBEDDING_BATCH_SIZE", "256"))
+
+
+def _text_key(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """SQLite store of float32 embedding vectors keyed by (model, text hash)"""
+
+    def __init__(self, path=EMBEDDING_CACHE_PATH):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                key TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (model, key)
+            )""")
+        self._conn.commit()
+
+    def get_many(self, model, texts):
+        """Return {text: vector} for the texts already cached under model"""
+        keys = {_text_key(text): text for text in texts}
+        found = {}
+        with self._lock:
+            items = list(keys)
+            # Stay well under SQLite's bound-parameter limit
+            for start in range(0, len(items), 500):
+                chunk = items[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE model = ? "
+                    f"AND key IN ({','.join('?' * len(chunk))})",
+                    [model, *chunk]
+                ).fetchall()
+                for key, blob in rows:
+                    vector = array("f")
+                    vector.frombytes(blob)
+                    found[keys[key]] = vector.tolist()
+            self.hits += len(found)
+            self.misses += len(set(texts)) - len(found)
+        return found
+
+    def put_many(self, model, vectors):
+        """Store {text: vector} under model"""
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?)",
+                [(model, _text_key(text), array("f", vector).tobytes(), now)
+                 for text, vector in vectors.items()]
+            )
+            self._conn.commit()
+
+    def stats(self):
+        """Hit/miss counters for this process plus the number of stored vectors"""
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        total = self.hits + self.misses
+        return {
+            "entries": size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0
+        }
+
+
+class CachedEmbeddings(Embeddings):
+    """LangChain Embeddings wrapper that serves repeats from an EmbeddingCache
+
+    Cache misses from one call are sent to the wrapped model together through
+    embed_documents, in batches of batch_size texts, instead of one request per text.
+    """
+
+    def __init__(self, underlying, model, cache, batch_size=EMBEDDING_BATCH_SIZE):
+        self.underlying = underlying
+        self.model = model
+        self.cache = cache
+        self.batch_size = batch_size
+
+    def embed_documents(self, texts):
+        texts = list(texts)
+        found = self.cache.get_many(self.model, texts)
+        missing = list(dict.fromkeys(text for text in texts if text not in found))
+        for start in range(0, len(missing), self.batch_size):
+            batch = missing[start:start + self.batch_size]
+            metrics.check_budget()
+            started = time.perf_counter()
+            vectors = self.underlying.embed_documents(batch)
+            # LangChain drops the usage block, so embedding tokens are counted locally
+            metrics.record("embed", self.model, sum(count_tokens(text, self.model) for text in batch),
+                           latency_seconds=time.perf_counter() - started)
+            # Round to float32 now so fresh and cached vectors are bit-identical
+            computed = {
+                text: array("f", vector).tolist()
+                for text, vector in zip(batch, vectors)
+            }
+            self.cache.put_many(self.model, computed)
+            found.update(computed)
+        return [found[text] for text in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
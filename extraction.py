@@ -0,0 +1,123 @@
+import multiprocessing
+import os
+import signal
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+EXTRACTION_WORKERS = int(os.environ.get("EXTRACTION_WORKERS", str(os.cpu_count() or 2)))
+EXTRACTION_TIMEOUT = float(os.environ.get("EXTRACTION_TIMEOUT", "60"))
+
+
+def _extract_file(path, max_chars):
+    # Runs in a worker process; logic imports are cheap so spawn start-up stays fast
+    from logic import extract_text_with_stats
+
+    return extract_text_with_stats(path, max_chars=max_chars)
+
+
+def _register_worker(pids):
+    # Pool initializer: record the worker's PID so a stuck pool can be killed
+    pids.put(os.getpid())
+
+
+def _new_executor(workers):
+    # spawn avoids forking a parent that may already hold threads, locks or HTTP pools
+    context = multiprocessing.get_context("spawn")
+    pids = context.SimpleQueue()
+    executor = ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                   initializer=_register_worker, initargs=(pids,))
+    return executor, pids
+
+
+def _kill_executor(executor, pids):
+    # A timed-out parse cannot be cancelled, so the whole pool is torn down and rebuilt
+    while not pids.empty():
+        try:
+            os.kill(pids.get(), signal.SIGTERM)
+        except OSError:
+            pass
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+def extract_texts_parallel(paths, workers=EXTRACTION_WORKERS, timeout=EXTRACTION_TIMEOUT,
+                           max_chars=None):
+    """Extract text from many PDF/DOCX files on a process pool, yielding results as they finish
+
+    Yields {'path', 'text', 'stats'} on success (see logic.extract_text_with_stats) and {'path', 'error', 'error_type'} on
+    failure, where error_type is 'timeout', 'crash' or the exception class name. At most
+    `workers` files are in flight, so each file's timeout is measured from when it actually
+    started. When a worker dies, the files that were in flight are rerun one at a time on a
+    fresh pool, so only the file that kills its worker again is reported as a crash.
+    """
+    queue = list(paths)
+    queue.reverse()
+    suspects = []
+    workers = max(1, min(workers, len(queue))) if queue else 1
+    executor, pids = _new_executor(workers)
+    in_flight = {}
+
+    try:
+        while queue or suspects or in_flight:
+            # Alone in the pool, a suspect that crashes it again is the culprit
+            source = suspects if suspects else queue
+            limit = 1 if suspects else workers
+            try:
+                while source and len(in_flight) < limit:
+                    path = source.pop()
+                    in_flight[executor.submit(_extract_file, path, max_chars)] = (path, time.monotonic())
+            except BrokenProcessPool:
+                # The pool died since the last wait; the futures it still holds report it below
+                source.append(path)
+                if not in_flight:
+                    _kill_executor(executor, pids)
+                    executor, pids = _new_executor(workers)
+                    continue
+
+            next_deadline = min(started for _, started in in_flight.values()) + timeout
+            done, _ = wait(in_flight, timeout=max(next_deadline - time.monotonic(), 0),
+                           return_when=FIRST_COMPLETED)
+
+            broken = False
+            for future in done:
+                path, _ = in_flight.pop(future)
+                try:
+                    text, stats = future.result()
+                    yield {"path": path, "text": text, "stats": stats}
+                except BrokenProcessPool:
+                    broken = True
+                    in_flight[future] = (path, None)
+                except Exception as e:
+                    yield {"path": path, "error": str(e), "error_type": type(e).__name__}
+            if broken:
+                # Every file still in the pool fails with it; wait for the rest to be marked
+                wait(in_flight, timeout=timeout)
+                crashed = [path for path, _ in in_flight.values()]
+                in_flight.clear()
+                if len(crashed) == 1:
+                    yield {"path": crashed[0], "error": "Worker process died while parsing the file",
+                           "error_type": "crash"}
+                else:
+                    suspects.extend(reversed(crashed))
+                _kill_executor(executor, pids)
+                executor, pids = _new_executor(workers)
+                continue
+
+            now = time.monotonic()
+            expired = [f for f, (_, started) in in_flight.items() if now - started >= timeout]
+            if expired:
+                for future in expired:
+                    path, _ = in_flight.pop(future)
+                    yield {"path": path, "error": f"Extraction exceeded {timeout:g}s",
+                           "error_type": "timeout"}
+                # Requeue the innocent files that were running alongside the stuck ones
+                for path, _ in in_flight.values():
+                    queue.append(path)
+                in_flight.clear()
+                _kill_executor(executor, pids)
+                executor, pids = _new_executor(workers)
+    finally:
+        if in_flight:
+            _kill_executor(executor, pids)
+        else:
+            executor.shutdown(wait=True)
@@ -0,0 +1,428 @@
+import argparse
+import hashlib
+import json
+import os
+import socket
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+
+JOB_DIR = os.environ.get("JOB_DIR", ".jobs")
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "4"))
+JOB_POLL_INTERVAL = float(os.environ.get("JOB_POLL_INTERVAL", "1"))
+# A running job whose worker has not checked in for this long is handed to another worker
+JOB_LEASE_SECONDS = float(os.environ.get("JOB_LEASE_SECONDS", "300"))
+JOB_MAX_ATTEMPTS = int(os.environ.get("JOB_MAX_ATTEMPTS", "3"))
+# Partial results of streaming stages are written at most this often
+JOB_PROGRESS_INTERVAL = float(os.environ.get("JOB_PROGRESS_INTERVAL", "0.5"))
+# Finished jobs, and uploads no remaining job uses, are deleted after this long; 0 keeps everything
+JOB_RETENTION_SECONDS = float(os.environ.get("JOB_RETENTION_SECONDS", str(7 * 24 * 3600)))
+# How often a worker pool runs the retention cleanup
+JOB_PRUNE_INTERVAL = float(os.environ.get("JOB_PRUNE_INTERVAL", "3600"))
+STAGES = ["parse", "extract", "score", "explain"]
+FINISHED_STATUSES = {"done", "failed"}
+
+
+class JobQueue:
+    """Durable SQLite queue of screening jobs shared by the app and any number of workers
+
+    Uploaded documents are stored content-addressed under JOB_DIR/files, so a job can be
+    picked up by a worker in another process. Jobs are claimed atomically; a job whose
+    worker stops heartbeating is requeued once its lease expires. prune() enforces
+    JOB_RETENTION_SECONDS, so uploaded resumes do not stay on disk indefinitely.
+    """
+
+    def __init__(self, path=None, files_dir=None):
+        self.path = path or os.path.join(JOB_DIR, "queue.sqlite3")
+        self.files_dir = files_dir or os.path.join(JOB_DIR, "files")
+        self._lock = threading.Lock()
+
+        os.makedirs(self.files_dir, exist_ok=True)
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        # Autocommit, so claim() can take the write lock with BEGIN IMMEDIATE
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30,
+                                     isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                stage TEXT,
+                params TEXT NOT NULL,
+                progress TEXT NOT NULL,
+                result TEXT NOT NULL,
+                error TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                worker TEXT,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                updated_at REAL NOT NULL,
+                finished_at REAL
+            )""")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at)")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS workers (
+                id TEXT PRIMARY KEY,
+                threads INTEGER NOT NULL,
+                heartbeat_at REAL NOT NULL
+            )""")
+
+    def store_file(self, data, file_name):
+        """Save uploaded bytes once per content; returns (sha256, path)"""
+        digest = hashlib.sha256(data).hexdigest()
+        path = os.path.join(self.files_dir, digest + os.path.splitext(file_name)[1].lower())
+        try:
+            # Re-uploads restart the retention clock, so prune() leaves the file for the new job
+            os.utime(path)
+        except FileNotFoundError:
+            tmp_path = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        return digest, path
+
+    def enqueue(self, params):
+        """Queue a job and return its ID"""
+        job_id = uuid.uuid4().hex[:12]
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, status, params, progress, result, created_at, updated_at) "
+                "VALUES (?, 'queued', ?, '{}', '{}', ?, ?)",
+                (job_id, json.dumps(params), now, now))
+        return job_id
+
+    def claim(self, worker_id):
+        """Take the oldest queued (or abandoned) job for worker_id, or return None"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Jobs whose worker vanished go back to the queue, or fail after too many tries
+                self._conn.execute(
+                    "UPDATE jobs SET status = 'failed', error = 'Worker lost too many times', "
+                    "finished_at = ?, updated_at = ? "
+                    "WHERE status = 'running' AND updated_at < ? AND attempts >= ?",
+                    (now, now, now - JOB_LEASE_SECONDS, JOB_MAX_ATTEMPTS))
+                self._conn.execute(
+                    "UPDATE jobs SET status = 'queued', worker = NULL "
+                    "WHERE status = 'running' AND updated_at < ?", (now - JOB_LEASE_SECONDS,))
+                row = self._conn.execute(
+                    "SELECT id FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1").fetchone()
+                if row is not None:
+                    self._conn.execute(
+                        "UPDATE jobs SET status = 'running', worker = ?, attempts = attempts + 1, "
+                        "started_at = COALESCE(started_at, ?), updated_at = ? WHERE id = ?",
+                        (worker_id, now, now, row["id"]))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return self.get(row["id"]) if row is not None else None
+
+    def update(self, job_id, stage=None, progress=None, result=None):
+        """Record the current stage, per-stage progress and partial results of a running job"""
+        assignments, params = ["updated_at = ?"], [time.time()]
+        for column, value in (("stage", stage), ("progress", progress), ("result", result)):
+            if value is not None:
+                assignments.append(f"{column} = ?")
+                params.append(value if column == "stage" else json.dumps(value))
+        with self._lock:
+            self._conn.execute(f"UPDATE jobs SET {', '.join(assignments)} WHERE id = ?",
+                               params + [job_id])
+
+    def finish(self, job_id, result=None, error=None):
+        """Mark a job done, or failed when error is given"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, stage = NULL, error = ?, result = COALESCE(?, result), "
+                "finished_at = ?, updated_at = ? WHERE id = ?",
+                ("failed" if error else "done", error,
+                 json.dumps(result) if result is not None else None, now, now, job_id))
+
+    def heartbeat(self, worker_id, threads):
+        """Keep a worker's running jobs leased and advertise the worker as alive"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("UPDATE jobs SET updated_at = ? WHERE status = 'running' AND worker = ?",
+                               (now, worker_id))
+            self._conn.execute("INSERT OR REPLACE INTO workers VALUES (?, ?, ?)",
+                               (worker_id, threads, now))
+
+    def prune(self, max_age=JOB_RETENTION_SECONDS):
+        """Delete jobs finished more than max_age seconds ago and uploads no remaining job uses
+
+        Unreferenced files are only removed once they too are older than max_age, so an
+        upload stored just before its job is enqueued survives. Returns the deleted counts.
+        """
+        if not max_age or max_age <= 0:
+            return {"jobs": 0, "files": 0}
+        cutoff = time.time() - max_age
+        with self._lock:
+            jobs = self._conn.execute(
+                "DELETE FROM jobs WHERE status IN ('done', 'failed') AND finished_at < ?",
+                (cutoff,)).rowcount
+            self._conn.execute("DELETE FROM workers WHERE heartbeat_at < ?", (cutoff,))
+            rows = self._conn.execute("SELECT params FROM jobs").fetchall()
+        referenced = set()
+        for row in rows:
+            params = json.loads(row["params"])
+            referenced.update(os.path.basename(params[key]) for key in ("resume_path", "jd_path")
+                              if params.get(key))
+        files = 0
+        for entry in os.scandir(self.files_dir):
+            if entry.name in referenced or not entry.is_file():
+                continue
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+                    files += 1
+            except FileNotFoundError:
+                # Another worker's cleanup got there first
+                continue
+        return {"jobs": jobs, "files": files}
+
+    def _decode(self, row):
+        job = dict(row)
+        for column in ("params", "progress", "result"):
+            job[column] = json.loads(job[column])
+        return job
+
+    def get(self, job_id):
+        """The job as a dict with decoded params, progress and result, or None"""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._decode(row) if row is not None else None
+
+    def recent(self, limit=20):
+        """Most recently created jobs, without their results"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, status, stage, params, error, created_at, finished_at FROM jobs "
+                "ORDER BY created_at DESC LIMIT ?", (limit,)).fetchall()
+        return [{**dict(row), "params": json.loads(row["params"])} for row in rows]
+
+    def live_workers(self):
+        """Worker threads that checked in within the lease period"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COALESCE(SUM(threads), 0) FROM workers WHERE heartbeat_at >= ?",
+                (time.time() - JOB_LEASE_SECONDS / 3,)).fetchone()[0]
+
+    def stats(self):
+        """Job counts per status plus the live worker thread count"""
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {**{status: count for status, count in rows}, "live_workers": self.live_workers()}
+
+
+def run_screening_job(queue, job):
+    """Run one screening job's stages, writing progress and partial results as they land"""
+    import asyncio
+
+    import metrics
+    from logic import (EXTRACTION_CHAR_BUDGET, aextract_pair, compare_skills_local,
+                       compare_and_explain, extract_text_from_file, find_near_duplicate_screening,
+                       get_result_store, scoring_version, stream_comparison, stream_score_explanation)
+
+    params = job["params"]
+    job_id = job["id"]
+    progress = {stage: {"status": "pending"} for stage in STAGES}
+    if not params.get("explain", True):
+        progress["explain"]["status"] = "skipped"
+    result = {}
+    started = {}
+
+    def begin(stage):
+        started[stage] = time.perf_counter()
+        progress[stage] = {"status": "running"}
+        queue.update(job_id, stage, progress, result)
+
+    def end(stage, status="done"):
+        progress[stage] = {"status": status, "seconds": round(time.perf_counter() - started[stage], 3)}
+        queue.update(job_id, progress=progress, result=result)
+
+    with metrics.track("job") as usage:
+        begin("parse")
+        texts = [extract_text_from_file(params[key], max_chars=EXTRACTION_CHAR_BUDGET)
+                 for key in ("resume_path", "jd_path")]
+        for text, name in zip(texts, (params["resume_name"], params["jd_name"])):
+            if not text.strip():
+                raise ValueError(f"Empty content in file: {name}")
+        end("parse")
+
+        begin("extract")
+        resume_skills, jd_requirements = asyncio.run(aextract_pair(*texts))
+        for data in (resume_skills, jd_requirements):
+            if "error" in data:
+                raise ValueError(data["error"])
+        result.update(resume_skills=resume_skills, jd_requirements=jd_requirements)
+        end("extract")
+
+        scorer = params.get("scorer", "llm")
+        prompt_version, model = scoring_version(scorer)
+        store = get_result_store()
+        stored = store.get(params["jd_sha256"], params["resume_sha256"], scorer, prompt_version)
+        if stored is None:
+            stored = find_near_duplicate_screening(store, params["jd_sha256"], params["resume_sha256"],
+                                                   texts[0], scorer, prompt_version, params["resume_name"])
+        explanation = None
+
+        begin("score")
+        if stored is not None:
+            comparison, explanation = stored["comparison"], stored["explanation"]
+            result["stored_at"] = stored["created_at"]
+        elif scorer == "local":
+            comparison = compare_skills_local(resume_skills, jd_requirements)
+        elif scorer == "fused":
+            comparison, explanation = compare_and_explain(resume_skills, jd_requirements)
+        else:
+            # Streamed so the page can show the score card before the lists finish
+            last_write = 0.0
+            for comparison in stream_comparison(resume_skills, jd_requirements):
+                if time.perf_counter() - last_write >= JOB_PROGRESS_INTERVAL:
+                    result["comparison"] = comparison
+                    queue.update(job_id, progress=progress, result=result)
+                    last_write = time.perf_counter()
+        result["comparison"] = comparison
+        if "error" in comparison:
+            end("score", "failed")
+            raise ValueError(comparison["error"])
+        if stored is None:
+            store.save(params["jd_sha256"], params["resume_sha256"], scorer, comparison, explanation,
+                       prompt_version, model, jd_name=params["jd_name"],
+                       candidate_name=params["resume_name"])
+        end("score")
+
+        if params.get("explain", True):
+            begin("explain")
+            if explanation is None:
+                explanation, last_write = "", 0.0
+                for chunk in stream_score_explanation(resume_skills, jd_requirements, comparison):
+                    explanation += chunk
+                    if time.perf_counter() - last_write >= JOB_PROGRESS_INTERVAL:
+                        result["explanation"] = explanation
+                        queue.update(job_id, progress=progress, result=result)
+                        last_write = time.perf_counter()
+                store.set_explanation(params["jd_sha256"], params["resume_sha256"], scorer, explanation)
+            result["explanation"] = explanation
+            end("explain")
+
+    result["usage"] = usage.summary()
+    return result
+
+
+class WorkerPool:
+    """Threads that claim and run queued jobs until stopped"""
+
+    def __init__(self, queue, threads=JOB_WORKERS, poll_interval=JOB_POLL_INTERVAL,
+                 retention=JOB_RETENTION_SECONDS, prune_interval=JOB_PRUNE_INTERVAL):
+        self.queue = queue
+        self.threads = threads
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self.prune_interval = prune_interval
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self):
+        self.queue.heartbeat(self.worker_id, self.threads)
+        targets = [self._heartbeat, self._prune] + [self._work] * self.threads
+        for target in targets:
+            thread = threading.Thread(target=target, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self):
+        """Stop claiming new jobs; jobs still running are requeued when their lease expires"""
+        self._stop.set()
+
+    def _heartbeat(self):
+        while not self._stop.wait(JOB_LEASE_SECONDS / 6):
+            self.queue.heartbeat(self.worker_id, self.threads)
+
+    def _prune(self):
+        # Runs once at start-up and then every prune_interval
+        while True:
+            try:
+                pruned = self.queue.prune(self.retention)
+                if pruned["jobs"] or pruned["files"]:
+                    print(f"[{self.worker_id}] pruned {pruned['jobs']} jobs and "
+                          f"{pruned['files']} uploaded files", file=sys.stderr)
+            except Exception as e:
+                print(f"[{self.worker_id}] job cleanup failed: {str(e)}", file=sys.stderr)
+            if self._stop.wait(self.prune_interval):
+                return
+
+    def _work(self):
+        while not self._stop.is_set():
+            job = self.queue.claim(self.worker_id)
+            if job is None:
+                self._stop.wait(self.poll_interval)
+                continue
+            try:
+                result = run_screening_job(self.queue, job)
+                self.queue.finish(job["id"], result=result)
+            except Exception as e:
+                self.queue.finish(job["id"], error=str(e))
+            status = self.queue.get(job["id"])["status"]
+            print(f"[{self.worker_id}] job {job['id']}: {status}", file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Background screening jobs')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    worker_parser = subparsers.add_parser('worker', help='Run a worker pool until interrupted')
+    worker_parser.add_argument('-j', '--workers', type=int, default=JOB_WORKERS,
+                               help='Jobs processed concurrently by this process')
+
+    subparsers.add_parser('list', help='Show recent jobs and queue counts')
+    show_parser = subparsers.add_parser('show', help='Print one job as JSON')
+    show_parser.add_argument('job_id')
+    prune_parser = subparsers.add_parser('prune', help='Delete old finished jobs and unused uploads')
+    prune_parser.add_argument('--max-age', type=float, default=JOB_RETENTION_SECONDS,
+                              help='Seconds a finished job or unused upload is kept')
+
+    args = parser.parse_args(argv)
+    queue = JobQueue()
+
+    if args.command == 'worker':
+        pool = WorkerPool(queue, threads=args.workers).start()
+        print(f"Worker {pool.worker_id} processing jobs with {args.workers} threads", file=sys.stderr)
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pool.stop()
+        return 0
+    if args.command == 'prune':
+        pruned = queue.prune(args.max_age)
+        print(f"Deleted {pruned['jobs']} jobs and {pruned['files']} uploaded files")
+        return 0
+    if args.command == 'show':
+        job = queue.get(args.job_id)
+        if job is None:
+            print(f"No job {args.job_id}", file=sys.stderr)
+            return 1
+        print(json.dumps(job, indent=2))
+        return 0
+
+    print(json.dumps(queue.stats()))
+    for job in queue.recent():
+        created = time.strftime('%Y-%m-%d %H:%M', time.localtime(job['created_at']))
+        stage = f" ({job['stage']})" if job['stage'] else ""
+        print(f"{job['id']}  {job['status']:<8}{stage:<10} {created}  "
+              f"{job['params'].get('resume_name')} vs {job['params'].get('jd_name')}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
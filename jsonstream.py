@@ -0,0 +1,170 @@
+import json
+import re
+
+_FENCE = re.compile(r"```(?:json|JSON)?\s*\n(.*?)\n?```", re.DOTALL)
+_WHITESPACE = " \t\r\n"
+
+
+def lenient_json_loads(text, allow_truncated=True):
+    """Parse the JSON object in a model reply, with or without a ```json fence
+
+    Tries each fenced block first, then the first top-level {...} object in the text. From
+    an object cut off by a truncated reply, the members that were complete are recovered,
+    unless allow_truncated is False. Raises ValueError when no JSON object can be found,
+    or when the object is unclosed and allow_truncated is False.
+    """
+    if text is None:
+        raise ValueError("Empty response")
+    for block in _FENCE.findall(text):
+        try:
+            value = json.loads(block)
+            if isinstance(value, dict):
+                return value
+        except json.JSONDecodeError:
+            pass
+
+    start = text.find("{")
+    while start != -1:
+        parser = IncrementalJSONParser()
+        parser.feed(text[start:])
+        if not parser.done and not allow_truncated:
+            raise ValueError("Response ends inside an unclosed JSON object")
+        value = parser.repaired()
+        if value is not None:
+            return value
+        if not parser.done:
+            break
+        # A balanced but invalid {...} (e.g. prose in braces); look past it
+        start = text.find("{", start + parser._pos)
+    raise ValueError("No JSON object found in response")
+
+
+class IncrementalJSONParser:
+    """Streaming parser for a single JSON object, reporting top-level keys as they complete
+
+    Text before the opening brace (a ```json fence, preamble) and after the closing brace
+    is ignored. feed() returns the top-level keys that changed: a key appears once its
+    value is complete, and a key holding an array also appears each time another element
+    of that array completes, so lists can be shown while they are still streaming.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.values = {}
+        self.partial = {}
+        self.done = False
+        self._pos = 0
+        self._stack = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = None
+        self._key = None
+        self._expect_key = False
+        self._value_start = None
+        self._element_start = None
+
+    def snapshot(self):
+        """Completed values plus the completed elements of arrays still streaming"""
+        return {**self.partial, **self.values}
+
+    def feed(self, chunk):
+        """Consume more text and return the list of top-level keys that changed"""
+        self.buffer += chunk
+        changed = []
+        buffer = self.buffer
+        i = self._pos
+        while i < len(buffer) and not self.done:
+            char = buffer[i]
+            depth = len(self._stack)
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if depth == 1 and self._expect_key:
+                        self._key = json.loads(buffer[self._string_start:i + 1])
+                        self._expect_key = False
+            elif char == '"':
+                self._in_string = True
+                self._string_start = i
+                if depth == 2 and self._stack[-1] == "[" and self._element_start is None:
+                    self._element_start = i
+            elif depth == 0:
+                if char == "{":
+                    self._stack.append("{")
+                    self._expect_key = True
+            elif char in "{[":
+                if depth == 2 and self._stack[-1] == "[" and self._element_start is None:
+                    self._element_start = i
+                self._stack.append(char)
+                if depth == 1 and char == "[":
+                    self.partial[self._key] = []
+                    self._element_start = None
+            elif char in "}]":
+                if depth == 2 and self._stack[-1] == "[":
+                    self._complete_element(buffer, i, changed)
+                self._stack.pop()
+                if depth == 1:
+                    self._complete_value(buffer, i, changed)
+                    self.done = True
+                elif depth == 2:
+                    # A nested object or array value is complete as soon as it closes
+                    self._complete_value(buffer, i + 1, changed)
+            elif char == ",":
+                if depth == 1:
+                    self._complete_value(buffer, i, changed)
+                    self._expect_key = True
+                elif depth == 2 and self._stack[-1] == "[":
+                    self._complete_element(buffer, i, changed)
+            elif char == ":":
+                if depth == 1:
+                    self._value_start = i + 1
+            elif depth == 2 and self._stack[-1] == "[" and self._element_start is None \
+                    and char not in _WHITESPACE:
+                self._element_start = i
+            i += 1
+        self._pos = i
+        return changed
+
+    def _complete_value(self, buffer, end, changed):
+        if self._value_start is None or self._key is None:
+            return
+        text = buffer[self._value_start:end].strip()
+        self._value_start = None
+        if not text:
+            return
+        try:
+            self.values[self._key] = json.loads(text)
+        except json.JSONDecodeError:
+            return
+        self.partial.pop(self._key, None)
+        if self._key not in changed:
+            changed.append(self._key)
+
+    def _complete_element(self, buffer, end, changed):
+        if self._element_start is None:
+            return
+        text = buffer[self._element_start:end].strip()
+        self._element_start = None
+        try:
+            self.partial.setdefault(self._key, []).append(json.loads(text))
+        except json.JSONDecodeError:
+            return
+        if self._key not in changed:
+            changed.append(self._key)
+
+    def repaired(self):
+        """The parsed object, or for a truncated stream its complete members only
+
+        A cut-off scalar such as 7 from 77.5 would be silently wrong, so the member being
+        written when the stream stopped is dropped; arrays keep their completed elements.
+        """
+        if self.done:
+            start = self.buffer.find("{")
+            try:
+                return json.loads(self.buffer[start:self._pos])
+            except json.JSONDecodeError:
+                return None
+        return self.snapshot() or None
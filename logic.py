@@ -1,16 +1,31 @@
 import argparse
+import asyncio
+import contextlib
+import hashlib
 import os
-from docx import Document
-from openai import OpenAI
+import shutil
+import sys
+import threading
+import time
 import json
 import re
-import streamlit as st 
-import fitz  # PyMuPDF
-from langchain_core.documents import Document
-from langchain_community.vectorstores import FAISS
-from langchain_openai import OpenAIEmbeddings
+from cache import ResultCache, make_cache_key
+from config import get_api_key
+import metrics
+from near_duplicates import NEAR_DUPLICATES, NEAR_DUP_REUSE_SCORES, text_sha256
+import prompts
+from jsonstream import IncrementalJSONParser, lenient_json_loads
+from sections import build_prompt_payload
+from tokens import truncate_to_tokens
+import transport
 
-apiK = st.secrets['openai']['api_key'] 
+# PyMuPDF, python-docx, LangChain/FAISS and NumPy are imported inside the functions that
+# use them, so short-lived CLI and worker processes only pay for what they touch
+
+EMBEDDING_MODEL = "text-embedding-ada-002"
+SKILL_INDEX_DIR = os.environ.get("SKILL_INDEX_DIR", ".skill_index")
+# Tokens of a document embedded as the RAG query; the embedding model rejects longer inputs
+RAG_QUERY_TOKEN_LIMIT = 2000
 
 # RAG Configuration
 SKILL_KNOWLEDGE_BASE = [
@@ -65,43 +80,32 @@ SKILL_KNOWLEDGE_BASE = [
     "EQ-i 2.0 Emotional Intelligence Framework"
 ]
 
-def create_skill_vector_store():
-    """Create vector store for skill knowledge base"""
-    embeddings = OpenAIEmbeddings(api_key=apiK)
-    return FAISS.from_texts(
-        texts=SKILL_KNOWLEDGE_BASE,
-        embedding=embeddings
-    )
-
-def retrieve_rag_context(query: str, vector_store, k=3):
-    """Retrieve relevant context from knowledge base"""
-    results = vector_store.similarity_search(query, k=k)
-    return "\n".join([doc.page_content for doc in results])
-
-def extract_text_from_pdf(file_stream):
-    """Extract text from PDF resume using file stream"""
-    doc = fitz.open(stream=file_stream.read(), filetype="pdf")
-    return '\n'.join([page.get_text() for page in doc])
-
-def extract_text_from_docx(file_stream):
-    """Extract text from DOCX resume using file bytes"""
-    doc = Document(file_stream)
-    return '\n'.join([para.text for para in doc.paragraphs])
-
-def extract_skills_with_openai(text):
-    """Use OpenAI API to extract skills and qualifications"""
-    client = OpenAI(api_key=apiK)
-    
-    vector_store = create_skill_vector_store()
-    skill_context = retrieve_rag_context(text, vector_store)
-    
-    prompt = """Analyze this resume text and extract technical skills, qualifications,
+# Per-stage model routing. Extraction is mechanical JSON filling, so it runs on the small
+# model; scoring takes a first pass on FIRST_PASS_MODEL and escalates to SCORING_MODEL only
+# for borderline scores and unparseable replies. Set FIRST_PASS_MODEL to "" (or equal to
+# SCORING_MODEL) to score everything with SCORING_MODEL.
+EXTRACTION_MODEL = os.environ.get("EXTRACTION_MODEL", "gpt-4o-mini")
+FIRST_PASS_MODEL = os.environ.get("FIRST_PASS_MODEL", "gpt-4o-mini")
+SCORING_MODEL = os.environ.get("SCORING_MODEL", "gpt-4o")
+EXPLANATION_MODEL = os.environ.get("EXPLANATION_MODEL", SCORING_MODEL)
+# Tier boundaries of the app's recommendation card; a first-pass score within
+# ESCALATION_BAND points of one is rescored by SCORING_MODEL
+TIER_THRESHOLDS = (50, 75, 90)
+ESCALATION_BAND = float(os.environ.get("ESCALATION_BAND", "5"))
+# Characters of document text read before sectioning; readers stop parsing once they have it
+EXTRACTION_CHAR_BUDGET = int(os.environ.get("EXTRACTION_CHAR_BUDGET", "60000"))
+# Tokens of document text the extraction prompt receives, filled section by section
+EXTRACTION_TOKEN_BUDGET = int(os.environ.get("EXTRACTION_TOKEN_BUDGET", "2000"))
+EXTRACTION_TEMPERATURE = 0.1
+SKILL_EXTRACTION_PROMPT = """Analyze this resume text and extract technical skills, qualifications,
               and certifications. Generalize terms to broader categories (e.g., 
               "Python" -> "Programming Languages", "AWS" -> "Cloud Computing").
               Return JSON format with:
               - technical_skills: array of generalized technical capabilities
               - qualifications: array of educational/professional qualifications
               - certifications: array of professional certifications
+              - years_of_experience: total years of professional experience as a number (for a
+                job description, the minimum it asks for), or null when not stated
               Relevant Skill Framework Context:
               {skill_context}
               
@@ -122,22 +126,302 @@ def extract_skills_with_openai(text):
               - Convert "B.Tech" to "Bachelor's"
               - Treat hackathon wins as qualifications
               - Map project descriptions to technical skills"""
-    
-    response = client.chat.completions.create(
-        model="gpt-4o",
-        messages=[{
+# Bump automatically whenever the template text changes so cached extractions go stale
+EXTRACTION_PROMPT_VERSION = hashlib.sha256(SKILL_EXTRACTION_PROMPT.encode("utf-8")).hexdigest()[:12]
+
+_extraction_cache = None
+_extraction_cache_lock = threading.Lock()
+
+_skill_vector_store = None
+_skill_vector_store_lock = threading.Lock()
+
+_result_store = None
+_result_store_lock = threading.Lock()
+
+_near_duplicate_index = None
+_near_duplicate_index_lock = threading.Lock()
+
+def get_openai_client():
+    """Return the process-wide OpenAI client so connections are reused across calls"""
+    return transport.get_client(get_api_key())
+
+def get_embeddings():
+    """Return the process-wide embeddings client used for the skill index and local scoring"""
+    return transport.get_embeddings(get_api_key(), EMBEDDING_MODEL)
+
+def skill_index_fingerprint():
+    """Content hash of the skill taxonomy and the embedding model used to index it"""
+    payload = json.dumps({"model": EMBEDDING_MODEL, "texts": SKILL_KNOWLEDGE_BASE})
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+def create_skill_vector_store():
+    """Create vector store for skill knowledge base"""
+    from langchain_community.vectorstores import FAISS
+
+    embeddings = get_embeddings()
+    return FAISS.from_texts(
+        texts=SKILL_KNOWLEDGE_BASE,
+        embedding=embeddings
+    )
+
+def load_skill_vector_store(index_dir=SKILL_INDEX_DIR):
+    """Load the persisted skill index, rebuilding it when the taxonomy or model changed"""
+    from langchain_community.vectorstores import FAISS
+
+    fingerprint = skill_index_fingerprint()
+    index_path = os.path.join(index_dir, fingerprint)
+    embeddings = get_embeddings()
+
+    if os.path.exists(os.path.join(index_path, "index.faiss")):
+        try:
+            # The index is written by this module only, so the pickled docstore is trusted
+            return FAISS.load_local(index_path, embeddings, allow_dangerous_deserialization=True)
+        except Exception as e:
+            print(f"Rebuilding skill index {index_path}: {str(e)}")
+
+    vector_store = create_skill_vector_store()
+
+    # Write to a scratch directory first so concurrent readers never see a partial index
+    tmp_path = f"{index_path}.tmp-{os.getpid()}-{threading.get_ident()}"
+    vector_store.save_local(tmp_path)
+    shutil.rmtree(index_path, ignore_errors=True)
+    try:
+        os.replace(tmp_path, index_path)
+    except OSError:
+        # Another process published the same index first
+        shutil.rmtree(tmp_path, ignore_errors=True)
+
+    # Drop indexes built for an older taxonomy or embedding model
+    for entry in os.listdir(index_dir):
+        if entry != fingerprint and ".tmp-" not in entry:
+            shutil.rmtree(os.path.join(index_dir, entry), ignore_errors=True)
+
+    return vector_store
+
+def get_skill_vector_store():
+    """Return the process-wide skill index, loading it from disk on first use"""
+    global _skill_vector_store
+    if _skill_vector_store is None:
+        with _skill_vector_store_lock:
+            if _skill_vector_store is None:
+                _skill_vector_store = load_skill_vector_store()
+    return _skill_vector_store
+
+def retrieve_rag_context(query: str, vector_store, k=3):
+    """Retrieve relevant context from knowledge base"""
+    results = vector_store.similarity_search(truncate_to_tokens(query, RAG_QUERY_TOKEN_LIMIT), k=k)
+    return "\n".join([doc.page_content for doc in results])
+
+def retrieve_rag_contexts(queries, vector_store, k=3):
+    """Retrieve context for many documents with one batched query-embedding request"""
+    queries = [truncate_to_tokens(query, RAG_QUERY_TOKEN_LIMIT) for query in queries]
+    vectors = vector_store.embeddings.embed_documents(queries)
+    return [
+        "\n".join([doc.page_content for doc in vector_store.similarity_search_by_vector(vector, k=k)])
+        for vector in vectors
+    ]
+
+def _open_pdf(source):
+    import fitz  # PyMuPDF
+
+    if isinstance(source, (str, os.PathLike)):
+        # MuPDF reads pages from disk on demand instead of us copying the whole file
+        return fitz.open(source)
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return fitz.open(stream=source, filetype="pdf")
+    if hasattr(source, 'getbuffer'):
+        # In-memory uploads (BytesIO, Streamlit UploadedFile) are shared without a copy
+        return fitz.open(stream=source.getbuffer(), filetype="pdf")
+    return fitz.open(stream=source.read(), filetype="pdf")
+
+def iter_pdf_pages(source):
+    """Yield PDF page text one page at a time from a path, bytes or file stream"""
+    with _open_pdf(source) as doc:
+        for page in doc:
+            yield page.get_text()
+
+def _take_until_budget(pieces, max_chars):
+    """Collect text pieces, stopping as soon as max_chars characters have been gathered"""
+    taken = []
+    total = 0
+    for piece in pieces:
+        taken.append(piece)
+        total += len(piece) + 1
+        if max_chars and total >= max_chars:
+            break
+    return taken
+
+def extract_text_from_pdf(file_stream, max_chars=None):
+    """Extract text from PDF resume using file stream, stopping once max_chars are read"""
+    return '\n'.join(_take_until_budget(iter_pdf_pages(file_stream), max_chars))
+
+def extract_text_from_docx(file_stream, max_chars=None):
+    """Extract text from DOCX resume using file bytes"""
+    from docx import Document
+
+    doc = Document(file_stream)
+    return '\n'.join(_take_until_budget((para.text for para in doc.paragraphs), max_chars))
+
+def extract_text_from_file(file_path, max_chars=None):
+    """Extract text from a PDF/DOCX file on disk"""
+    if file_path.lower().endswith('.pdf'):
+        return extract_text_from_pdf(file_path, max_chars=max_chars)
+    elif file_path.lower().endswith('.docx'):
+        with open(file_path, 'rb') as f:
+            return extract_text_from_docx(f, max_chars=max_chars)
+    raise ValueError("Unsupported file format")
+
+def extract_text_with_stats(file_path, max_chars=None):
+    """Extract text from a file and report pages read and peak memory for the document
+
+    peak_python_bytes is the tracemalloc high-water mark for this call (MuPDF's own C
+    allocations are not visible to it); peak_rss_bytes is the process resident high-water mark.
+    """
+    import resource
+    import tracemalloc
+
+    started = time.perf_counter()
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    pages_read = 0
+    page_count = None
+    try:
+        if file_path.lower().endswith('.pdf'):
+            with _open_pdf(file_path) as doc:
+                page_count = doc.page_count
+                pieces = _take_until_budget((page.get_text() for page in doc), max_chars)
+            pages_read = len(pieces)
+            text = '\n'.join(pieces)
+        else:
+            text = extract_text_from_file(file_path, max_chars=max_chars)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        if not tracing:
+            tracemalloc.stop()
+
+    return text, {
+        "pages_read": pages_read,
+        "page_count": page_count,
+        "stopped_early": page_count is not None and pages_read < page_count,
+        "chars": len(text),
+        "seconds": round(time.perf_counter() - started, 4),
+        "peak_python_bytes": peak,
+        "peak_rss_bytes": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    }
+
+def get_extraction_cache():
+    """Return the process-wide extraction cache shared by the CLI and the app"""
+    global _extraction_cache
+    if _extraction_cache is None:
+        with _extraction_cache_lock:
+            if _extraction_cache is None:
+                cache = ResultCache(namespace="extraction")
+                # Entries from older prompt templates can never hit again
+                cache.invalidate(keep_version=EXTRACTION_PROMPT_VERSION)
+                _extraction_cache = cache
+    return _extraction_cache
+
+def get_result_store():
+    """Return the process-wide store of finished screenings"""
+    global _result_store
+    if _result_store is None:
+        with _result_store_lock:
+            if _result_store is None:
+                from result_store import ResultStore
+                _result_store = ResultStore()
+    return _result_store
+
+def get_near_duplicate_index():
+    """Return the process-wide fingerprint index of extracted and screened documents"""
+    global _near_duplicate_index
+    if _near_duplicate_index is None:
+        with _near_duplicate_index_lock:
+            if _near_duplicate_index is None:
+                from near_duplicates import NearDuplicateIndex
+                _near_duplicate_index = NearDuplicateIndex()
+    return _near_duplicate_index
+
+def reuse_near_duplicate_extraction(text):
+    """Extraction of an indexed near-duplicate of text made with the current prompt, or None"""
+    if not NEAR_DUPLICATES:
+        return None
+    reused = get_near_duplicate_index().reuse_extraction(text, EXTRACTION_PROMPT_VERSION)
+    if reused is None:
+        return None
+    metrics.count_event("near_duplicate_extraction")
+    return reused[0]
+
+def index_extraction(text, extraction):
+    """Make a fresh extraction available to near-duplicates of text"""
+    if NEAR_DUPLICATES and 'error' not in extraction:
+        get_near_duplicate_index().add_text(text, extraction, EXTRACTION_PROMPT_VERSION)
+
+def index_document(candidate_id, text, name=None):
+    """Record the text of a screened resume so near-duplicates of it can be found"""
+    if NEAR_DUPLICATES:
+        get_near_duplicate_index().add_document(candidate_id, text, name)
+
+def find_near_duplicate_screening(store, jd_id, candidate_id, resume_text, scorer, prompt_version,
+                                  candidate_name=None):
+    """Stored screening of a near-duplicate resume against the same JD, copied to candidate_id
+
+    Only with NEAR_DUP_REUSE_SCORES=1; otherwise, or without a match, this just indexes
+    the resume and returns None. The copy's comparison names its source in 'reused_from'.
+    """
+    index_document(candidate_id, resume_text, candidate_name)
+    if not (NEAR_DUPLICATES and NEAR_DUP_REUSE_SCORES):
+        return None
+    index = get_near_duplicate_index()
+    for document in index.near_documents(resume_text, exclude_doc_id=candidate_id):
+        stored = store.get(jd_id, document["doc_id"], scorer, prompt_version)
+        if stored is None:
+            continue
+        comparison = {**stored["comparison"], "reused_from": {
+            "candidate_id": document["doc_id"], "candidate_name": document["name"],
+            "similarity": document["similarity"]}}
+        store.save(jd_id, candidate_id, scorer, comparison, stored["explanation"], prompt_version,
+                   stored["model"], jd_name=stored["jd_name"], candidate_name=candidate_name)
+        index.record_reuse("score", text_sha256(resume_text), document, doc_id=candidate_id)
+        metrics.count_event("near_duplicate_score")
+        return store.get(jd_id, candidate_id, scorer, prompt_version)
+    return None
+
+def scoring_version(scorer='llm'):
+    """(prompt version, model) a stored screening from scorer 'llm', 'fused' or 'local' was made with"""
+    if scorer == 'local':
+        return 'local-rubric', EMBEDDING_MODEL
+    return prompts.template_version('fused' if scorer == 'fused' else 'comparison'), SCORING_MODEL
+
+def extraction_cache_key(text):
+    """Cache key for an extraction of text under the current prompt and model"""
+    return make_cache_key(
+        text,
+        prompt_version=EXTRACTION_PROMPT_VERSION,
+        model=EXTRACTION_MODEL,
+        temperature=EXTRACTION_TEMPERATURE,
+        token_budget=EXTRACTION_TOKEN_BUDGET
+    )
+
+def build_extraction_request(text, skill_context):
+    """Chat completion arguments for the skill extraction prompt"""
+    return {
+        "model": EXTRACTION_MODEL,
+        "messages": [{
             "role": "user", 
-            "content": prompt.format(
+            "content": SKILL_EXTRACTION_PROMPT.format(
                 skill_context=skill_context,
-                text=text[:10000]
+                text=build_prompt_payload(text, EXTRACTION_TOKEN_BUDGET, model=EXTRACTION_MODEL)
             )
         }],
-        temperature=0.1,
-        response_format={"type": "json_object"}
-    )
-    
+        "temperature": EXTRACTION_TEMPERATURE,
+        "response_format": {"type": "json_object"}
+    }
+
+def parse_extraction_response(raw_response):
+    """Parse the extraction JSON, returning an error dict when it is malformed"""
     try:
-        raw_response = response.choices[0].message.content
         json_str = re.search(r'```json\n(.*?)\n```', raw_response, re.DOTALL)
         if json_str:
             return json.loads(json_str.group(1))
@@ -151,239 +435,464 @@ def extract_skills_with_openai(text):
             "raw_response": raw_response
         }
 
-def compare_skills(resume_data, jd_data):
-    """Compare resume skills with JD requirements using structured scoring"""
-    client = OpenAI(api_key=apiK)
-    
-    scoring_rubric = """Scoring Methodology:
-    1. Technical Skills Analysis (50% base weight):
-       - Calculate skill coverage ratio: (resume_skills_matched / jd_skills_required)
-       - Base score = (matched_skills_count / required_skills_count) * base_weight
-       - If certifications not required, use adjusted_weight = base_weight + 10
-       - Handle zero division: If JD requires 0 skills, full base weight awarded
-    
-    2. Qualifications Evaluation (30% base weight):
-       - Degree Level Match (20%):
-         * Full 20% if resume meets/exceeds JD's required degree level
-         * 10% if one level below JD requirement (e.g. JD requires Master's - resume has Bachelor's)
-         * 0% if two+ levels below
-       - Field Relevance (10%):
-         * 10% if exact field match with JD requirements
-         * 5% if related field (e.g. Computer Engineering vs Computer Science)
-         * 0% for unrelated fields
-       - Only apply these scores if candidate has at least the minimum required degree type
-       - Complete mismatch (e.g. JD requires CS degree - resume has unrelated degree) = 0% overall
-    
-    3. Certification Verification (20% conditional):
-       - ONLY APPLY IF JD REQUIRES SPECIFIC CERTS
-       - If no certs required in JD, redistribute:
-         - Technical Skills: +10% (total 60%)
-         - Qualifications: +10% (total 40%)
-       - Required certs: 15%
-       - Bonus certs: 5%
-    
-    4. Experience Bonus (0-10%):
-       - +2% per year over JD's minimum requirement
-       - Max +10%
-       
-    Add these matching rules:
-    1. NLP Recognition:
-       - Accept projects using: chatbots, text processing, OCR, speech systems
-       - Count LLM implementations as NLP experience
-       
-    2. Hackathon Validation:
-       - Consider competition wins as hackathon experience
-       - Treat school-level competitions as valid
-       
-    3. Research Recognition:
-       - Count research internships as published research
-       - Accept technical reports as research equivalents"""
-    
-    prompt = f"""Act as a senior technical recruiter with 15+ years experience. Conduct a rigorous, 
-    quantitative analysis following these steps:
-
-    1. Skill Category Analysis:
-    - Map resume skills to these JD categories:
-      [Programming, Cloud, ML, DevOps, Data, AI]
-    - Compare specificity levels (e.g., "Python" vs "Programming Languages")
-    - Award category credit for any direct/implied match
-
-    2. Qualifications Assessment:
-    - Evaluate degree LEVEL (PhD/Masters/Bachelors) against JD requirements
-    - Analyze degree FIELD relevance (CS vs IT vs unrelated)
-    - Consider course projects/thesis topics for field relevance
-
-    3. Certification Verification:
-    - Match exact cert names where required
-    - Accept equivalent certs (AWS vs Azure vs GCP)
-    - Award partial credit for in-progress certifications
-
-    4. Experience Scoring:
-    - Compare years of experience in key areas
-    - Verify project depth and complexity
-    - Award bonus for leadership experience
-
-    5. Contextual Skill Mapping:
-       - Check project descriptions for implied skills
-       - Match 'conversational chatbot' -> NLP
-       - Map 'Smart India Hackathon Winner' -> Hackathon Experience
-       - Interpret 'research internship' -> Published Research
-       
-    6. GitHub Validation:
-       - Consider GitHub portfolio as open-source contribution
-       - Count organizational projects as open-source
-
-    Resume Data:
-    {json.dumps(resume_data, indent=2)}
-
-    Job Description Requirements:
-    {json.dumps(jd_data, indent=2)}
-
-    {scoring_rubric}
-
-    Final Response Format:
-    {{
-        "certifications_required": [true/false],
-        "overall_score": [0-100 score with one decimal],
-        "score_breakdown": {{
-            "technical_skills": [0-50/60],
-            "qualifications": [0-30/40],
-            "certifications": [0-20],
-            "bonuses": [0-10]
-        }},
-        "missing_requirements": ["list specific gaps with JD requirements"],
-        "matched_requirements": ["list specific matches with evidence"],
-        "strength_analysis": ["list of 3 key strengths"],
-        "improvement_areas": ["list of 3 key gaps"],
-        "hiring_recommendation": "concise hiring verdict",
-        "next_steps": ["3 actionable next steps"]
-    }}"""
+def extract_skills_with_openai(text, use_cache=True, skill_context=None):
+    """Use OpenAI API to extract skills and qualifications
+
+    Pass skill_context when it was already retrieved, e.g. by retrieve_rag_contexts in batch.
+    """
+    cache_key = extraction_cache_key(text)
+    if use_cache:
+        cached = get_extraction_cache().get(cache_key)
+        if cached is not None:
+            return cached
+        # Not copied into the exact cache, so turning reuse off also stops serving it
+        reused = reuse_near_duplicate_extraction(text)
+        if reused is not None:
+            return reused
+
+    client = get_openai_client()
     
-    response = client.chat.completions.create(
-        model="gpt-4o",
-        messages=[{
-            "role": "user",
-            "content": prompt
-        }],
-        temperature=0.0
-    )
+    if skill_context is None:
+        vector_store = get_skill_vector_store()
+        skill_context = retrieve_rag_context(text, vector_store)
     
+    response = metrics.timed_completion(client.chat.completions.create, "extract",
+                                        **build_extraction_request(text, skill_context))
+    result = parse_extraction_response(response.choices[0].message.content)
+
+    if use_cache and 'error' not in result:
+        get_extraction_cache().set(cache_key, result, version=EXTRACTION_PROMPT_VERSION)
+    index_extraction(text, result)
+    return result
+
+def prefetch_skill_contexts(texts, use_cache=True):
+    """RAG context for each text that will need a fresh extraction, None for cache hits
+
+    The query embeddings for all uncached texts go out as one batched embeddings request.
+    """
+    contexts = [None] * len(texts)
+    uncached = [
+        i for i, text in enumerate(texts)
+        if not use_cache or get_extraction_cache().get(extraction_cache_key(text)) is None
+    ]
+    if uncached:
+        retrieved = retrieve_rag_contexts([texts[i] for i in uncached], get_skill_vector_store())
+        for i, context in zip(uncached, retrieved):
+            contexts[i] = context
+    return contexts
+
+# Fields of prompts.COMPARISON_RESPONSE_FORMAT; a reply missing any of them failed to parse
+COMPARISON_LIST_FIELDS = ['missing_requirements', 'matched_requirements', 'strength_analysis',
+                          'improvement_areas', 'next_steps']
+COMPARISON_FIELDS = ['certifications_required', 'overall_score', 'score_breakdown',
+                     'hiring_recommendation'] + COMPARISON_LIST_FIELDS
+SCORE_BREAKDOWN_FIELDS = ['technical_skills', 'qualifications', 'certifications', 'bonuses']
+
+def build_comparison_request(resume_data, jd_data, model=None):
+    """Chat completion arguments for the structured scoring prompt"""
+    return {
+        "model": model or SCORING_MODEL,
+        "messages": prompts.comparison_messages(resume_data, jd_data),
+        "temperature": 0.0
+    }
+
+def _normalize_comparison(result):
+    """Check a scoring reply has every field of the response format and coerce the scores"""
+    missing = [key for key in COMPARISON_FIELDS if key not in result]
+    missing += [f"score_breakdown.{key}" for key in SCORE_BREAKDOWN_FIELDS
+                if key not in (result.get('score_breakdown') or {})]
+    if missing:
+        raise ValueError(f"Missing fields in scoring response: {', '.join(missing)}")
+    for key in COMPARISON_LIST_FIELDS:
+        if not isinstance(result[key], list):
+            raise ValueError(f"Expected a list for {key}")
+    for key in SCORE_BREAKDOWN_FIELDS:
+        result['score_breakdown'][key] = float(result['score_breakdown'][key])
+    
+    result['overall_score'] = min(max(float(result['overall_score']), 0), 100)
+    return result
+
+def _failed_comparison(error, raw_response):
+    print(f"Error parsing response: {str(error)}")
+    print(f"Raw API response: {raw_response}")
+    return {
+        "error": f"Scoring failed: {str(error)}",
+        "overall_score": 0,
+        "score_breakdown": {
+            'technical_skills': 0,
+            'qualifications': 0,
+            'certifications': 0,
+            'bonuses': 0
+        },
+        "missing_requirements": [],
+        "matched_requirements": [],
+        "strength_analysis": [],
+        "improvement_areas": [],
+        "hiring_recommendation": "",
+        "next_steps": []
+    }
+
+def parse_comparison_response(raw_response):
+    """Parse and normalize the scoring JSON, returning a zeroed result on failure
+
+    The JSON is found with or without a ```json fence, so a reply that drops the fence
+    still counts. A truncated reply or one missing a field is a failure, so it is not
+    stored and gets escalated like any other parse failure.
+    """
     try:
-        raw_response = response.choices[0].message.content
-        json_str = re.search(r'```json\n(.*?)\n```', raw_response, re.DOTALL).group(1)
-        
-        result = json.loads(json_str)
-        for key in ['technical_skills', 'qualifications', 'certifications', 'bonuses']:
-            result['score_breakdown'][key] = float(result['score_breakdown'].get(key, 0))
-        
-        result['overall_score'] = min(max(float(result.get('overall_score', 0)), 0), 100)
-        return result
-    except (json.JSONDecodeError, KeyError, ValueError, AttributeError) as e:
-        print(f"Error parsing response: {str(e)}")
-        print(f"Raw API response: {raw_response}")
-        return {
-            "error": f"Scoring failed: {str(e)}",
-            "overall_score": 0,
-            "score_breakdown": {
-                'technical_skills': 0,
-                'qualifications': 0,
-                'certifications': 0,
-                'bonuses': 0
-            },
-            "missing_requirements": [],
-            "matched_requirements": [],
-            "strength_analysis": [],
-            "improvement_areas": [],
-            "hiring_recommendation": "",
-            "next_steps": []
-        }
+        return _normalize_comparison(lenient_json_loads(raw_response, allow_truncated=False))
+    except (KeyError, ValueError, AttributeError, TypeError) as e:
+        return _failed_comparison(e, raw_response)
+
+def scoring_models():
+    """Models a pair is scored with in order: the first pass, then the escalation model"""
+    if FIRST_PASS_MODEL and FIRST_PASS_MODEL != SCORING_MODEL:
+        return [FIRST_PASS_MODEL, SCORING_MODEL]
+    return [SCORING_MODEL]
+
+def escalation_reason(comparison):
+    """Why a first-pass comparison should be rescored by the large model, or None"""
+    if 'error' in comparison:
+        return 'parse_failure'
+    score = comparison['overall_score']
+    if any(abs(score - threshold) <= ESCALATION_BAND for threshold in TIER_THRESHOLDS):
+        return 'borderline'
+    return None
+
+def _should_escalate(comparison, model, models):
+    """Record the routing decision for a comparison produced by model"""
+    comparison['scoring_model'] = model
+    if model == models[-1]:
+        return False
+    metrics.count_event('first_pass')
+    reason = escalation_reason(comparison)
+    if reason:
+        metrics.count_event(f'escalated_{reason}')
+    return reason is not None
+
+def compare_skills(resume_data, jd_data):
+    """Compare resume skills with JD requirements using structured scoring
+
+    The first pass runs on the small model; borderline or unparseable results are
+    rescored by SCORING_MODEL (see scoring_models). 'scoring_model' in the result
+    names the model whose score was kept.
+    """
+    client = get_openai_client()
+    models = scoring_models()
+
+    for model in models:
+        response = metrics.timed_completion(client.chat.completions.create, "compare",
+                                            **build_comparison_request(resume_data, jd_data, model))
+        comparison = parse_comparison_response(response.choices[0].message.content)
+        if not _should_escalate(comparison, model, models):
+            return comparison
+
+def stream_comparison(resume_data, jd_data):
+    """Yield partial comparison results while the scoring response streams in
+
+    Each item is a dict of the top-level fields complete so far, with list fields such as
+    missing_requirements growing element by element. The last item is the full result
+    exactly as compare_skills would return it, including the zeroed result on failure.
+    When the first pass is escalated, the large model's response streams in after it.
+    """
+    models = scoring_models()
+    for model in models:
+        comparison = None
+        for comparison in _stream_comparison(resume_data, jd_data, model):
+            yield comparison
+        if not _should_escalate(comparison, model, models):
+            return
+
+def _stream_comparison(resume_data, jd_data, model):
+    client = get_openai_client()
+
+    parser = IncrementalJSONParser()
+    raw = ""
+    for chunk in metrics.stream_completion(client.chat.completions.create, "compare",
+                                           **build_comparison_request(resume_data, jd_data, model)):
+        raw += chunk
+        if parser.feed(chunk):
+            snapshot = parser.snapshot()
+            try:
+                # Same coercion as _normalize_comparison, for whichever score fields are in
+                if 'score_breakdown' in snapshot:
+                    snapshot['score_breakdown'] = {
+                        key: float(snapshot['score_breakdown'].get(key, 0))
+                        for key in SCORE_BREAKDOWN_FIELDS
+                    }
+                if 'overall_score' in snapshot:
+                    snapshot['overall_score'] = min(max(float(snapshot['overall_score']), 0), 100)
+            except (AttributeError, ValueError, TypeError):
+                continue
+            yield snapshot
+    yield parse_comparison_response(raw)
+
+def build_fused_request(resume_data, jd_data, model=None):
+    """Chat completion arguments for the single-call scoring and explanation prompt"""
+    return {
+        "model": model or SCORING_MODEL,
+        "messages": prompts.fused_messages(resume_data, jd_data),
+        "temperature": 0.0,
+        "response_format": {"type": "json_object"}
+    }
+
+def parse_fused_response(raw_response):
+    """Split a fused response into (comparison, explanation markdown)
+
+    The comparison has the same fields as parse_comparison_response returns; the
+    explanation is None when scoring failed or the model left every section empty.
+    """
+    try:
+        result = lenient_json_loads(raw_response, allow_truncated=False)
+        sections = result.pop('explanation', None)
+        comparison = _normalize_comparison(result)
+        explanation = prompts.explanation_markdown(sections) if isinstance(sections, dict) else ""
+    except (KeyError, ValueError, AttributeError, TypeError) as e:
+        return _failed_comparison(e, raw_response), None
+    return comparison, explanation or None
+
+def compare_and_explain(resume_data, jd_data):
+    """Score the pair and write the explanation in one LLM call, escalating like compare_skills"""
+    client = get_openai_client()
+    models = scoring_models()
+
+    for model in models:
+        response = metrics.timed_completion(client.chat.completions.create, "fused",
+                                            **build_fused_request(resume_data, jd_data, model))
+        comparison, explanation = parse_fused_response(response.choices[0].message.content)
+        if not _should_escalate(comparison, model, models):
+            return comparison, explanation
+
+def compare_skills_local(resume_data, jd_data):
+    """Score the pair with the deterministic local rubric engine instead of the LLM"""
+    from scoring import score_locally
+
+    return score_locally(resume_data, jd_data, get_embeddings())
+
+def build_explanation_request(resume_data, jd_data, comparison_result):
+    """Chat completion arguments for the narrative explanation prompt"""
+    return {
+        "model": EXPLANATION_MODEL,
+        "messages": prompts.explanation_messages(resume_data, jd_data, comparison_result),
+        "temperature": 0.3
+    }
 
 def generate_score_explanation(resume_data, jd_data, comparison_result):
     """Generate natural language explanation of scoring results using LLM"""
-    client = OpenAI(api_key=apiK)
-    
-    prompt = f"""Act as a senior technical recruiter. Analyze this candidate evaluation and provide a detailed, 
-    professional explanation of the scoring results. Follow these guidelines:
-    1. Remember the exact scoring breakdown and comparison context from the analysis
-    2. Cross-reference specific requirements from the JD with resume details
-    3. Explain technical skill adjacencies that could compensate for gaps
-    4. Highlight patterns in qualifications/certifications
-    5. Maintain professional tone but add contextual insights
-    
-    Resume Summary:
-    {json.dumps(resume_data, indent=2)}
-    
-    Job Description Requirements:
-    {json.dumps(jd_data, indent=2)}
+    client = get_openai_client()
     
-    Scoring Results:
-    {json.dumps(comparison_result, indent=2)}
-    
-    Structure your response with these sections (use markdown):
-    ## Overall Assessment
-    - Start with score interpretation
-    - Key comparative strengths/weaknesses
-    - High-level match summary
-    
-    ## Technical Competency Analysis
-    - Skill category comparisons with JD requirements
-    - Notable matches/mismatches with specific examples
-    - Contextual analysis of skill depth
-    
-    ## Qualifications Evaluation 
-    - Degree level/field alignment analysis
-    - Coursework/project relevance to JD
-    - Gap impact assessment
-    
-    ## Certification Alignment
-    - Direct/indirect certification matches
-    - Weight of missing certs in context
-    - Equivalent certifications analysis
-    
-    ## Experience Relevance
-    - Years experience vs requirements
-    - Project complexity comparison
-    - Leadership experience evaluation
-    
-    ## Final Recommendation
-    - Strong/Moderate/Weak fit conclusion *REFER TO THE SCORING RESULTS FOR THE CONCLUSION*
-    - Hiring consideration with context
-    - Suggested next steps"""
-    
-    response = client.chat.completions.create(
-        model="gpt-4o",
-        messages=[{
-            "role": "user",
-            "content": prompt
-        }],
-        temperature=0.3
+    response = metrics.timed_completion(
+        client.chat.completions.create, "explain",
+        **build_explanation_request(resume_data, jd_data, comparison_result)
     )
     
     return response.choices[0].message.content
 
-def main():
+def stream_score_explanation(resume_data, jd_data, comparison_result):
+    """Yield the score explanation markdown in chunks as the model generates it"""
+    client = get_openai_client()
+
+    yield from metrics.stream_completion(
+        client.chat.completions.create, "explain",
+        **build_explanation_request(resume_data, jd_data, comparison_result)
+    )
+
+async def aextract_skills_with_openai(text, use_cache=True, semaphore=None):
+    """Async counterpart of extract_skills_with_openai"""
+    cache_key = extraction_cache_key(text)
+    if use_cache:
+        cached = get_extraction_cache().get(cache_key)
+        if cached is not None:
+            return cached
+        reused = await asyncio.to_thread(reuse_near_duplicate_extraction, text)
+        if reused is not None:
+            return reused
+
+    client = transport.get_async_client(get_api_key())
+
+    # The query embedding goes through the pooled sync client on a worker thread
+    vector_store = await asyncio.to_thread(get_skill_vector_store)
+    skill_context = await asyncio.to_thread(retrieve_rag_context, text, vector_store)
+
+    async with semaphore or contextlib.nullcontext():
+        response = await metrics.atimed_completion(
+            client.chat.completions.create, "extract",
+            **build_extraction_request(text, skill_context)
+        )
+    result = parse_extraction_response(response.choices[0].message.content)
+
+    if use_cache and 'error' not in result:
+        get_extraction_cache().set(cache_key, result, version=EXTRACTION_PROMPT_VERSION)
+    await asyncio.to_thread(index_extraction, text, result)
+    return result
+
+async def acompare_skills(resume_data, jd_data, semaphore=None):
+    """Async counterpart of compare_skills"""
+    client = transport.get_async_client(get_api_key())
+    models = scoring_models()
+
+    for model in models:
+        async with semaphore or contextlib.nullcontext():
+            response = await metrics.atimed_completion(
+                client.chat.completions.create, "compare",
+                **build_comparison_request(resume_data, jd_data, model)
+            )
+        comparison = parse_comparison_response(response.choices[0].message.content)
+        if not _should_escalate(comparison, model, models):
+            return comparison
+
+async def acompare_and_explain(resume_data, jd_data, semaphore=None):
+    """Async counterpart of compare_and_explain"""
+    client = transport.get_async_client(get_api_key())
+    models = scoring_models()
+
+    for model in models:
+        async with semaphore or contextlib.nullcontext():
+            response = await metrics.atimed_completion(
+                client.chat.completions.create, "fused",
+                **build_fused_request(resume_data, jd_data, model)
+            )
+        comparison, explanation = parse_fused_response(response.choices[0].message.content)
+        if not _should_escalate(comparison, model, models):
+            return comparison, explanation
+
+async def agenerate_score_explanation(resume_data, jd_data, comparison_result, semaphore=None):
+    """Async counterpart of generate_score_explanation"""
+    client = transport.get_async_client(get_api_key())
+
+    async with semaphore or contextlib.nullcontext():
+        response = await metrics.atimed_completion(
+            client.chat.completions.create, "explain",
+            **build_explanation_request(resume_data, jd_data, comparison_result)
+        )
+    return response.choices[0].message.content
+
+async def aextract_pair(resume_text, jd_text, use_cache=True, semaphore=None):
+    """Extract the resume and the JD concurrently"""
+    return await asyncio.gather(
+        aextract_skills_with_openai(resume_text, use_cache=use_cache, semaphore=semaphore),
+        aextract_skills_with_openai(jd_text, use_cache=use_cache, semaphore=semaphore)
+    )
+
+async def screen(resume_text, jd_text, semaphore=None, explain=True, use_cache=True,
+                 token_budget=None, fused=False):
+    """Run the full screening pipeline, overlapping the independent extraction stages
+
+    Pass one asyncio.Semaphore to many concurrent screen() calls to cap the
+    number of LLM requests in flight across all of them. The result's 'usage' holds
+    the tokens, cost and latency of this screening's API calls. With fused=True the
+    scores and the explanation come from a single LLM call.
+    """
+    with metrics.track("screening", token_budget=token_budget) as usage:
+        result = {
+            "resume_skills": None,
+            "jd_requirements": None,
+            "comparison": None,
+            "explanation": None
+        }
+        try:
+            await _screen(result, resume_text, jd_text, semaphore, explain, use_cache, fused)
+        except metrics.TokenBudgetExceeded as e:
+            result["error"] = str(e)
+        result["usage"] = usage.summary()
+        return result
+
+async def _screen(result, resume_text, jd_text, semaphore, explain, use_cache, fused):
+    resume_skills, jd_requirements = await aextract_pair(
+        resume_text, jd_text, use_cache=use_cache, semaphore=semaphore)
+    result["resume_skills"] = resume_skills
+    result["jd_requirements"] = jd_requirements
+    for data in (resume_skills, jd_requirements):
+        if 'error' in data:
+            result["error"] = data["error"]
+            return
+
+    if explain and fused:
+        comparison, result["explanation"] = await acompare_and_explain(
+            resume_skills, jd_requirements, semaphore=semaphore)
+    else:
+        comparison = await acompare_skills(resume_skills, jd_requirements, semaphore=semaphore)
+    result["comparison"] = comparison
+    # A fused reply without usable sections falls back to the separate explanation call
+    if explain and 'error' not in comparison and result["explanation"] is None:
+        result["explanation"] = await agenerate_score_explanation(
+            resume_skills, jd_requirements, comparison, semaphore=semaphore)
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] == 'batch':
+        from batch import main as batch_main
+        return batch_main(argv[1:])
+    if argv and argv[0] == 'bulk':
+        from bulk import main as bulk_main
+        return bulk_main(argv[1:])
+    if argv and argv[0] == 'pool':
+        from talent_pool import main as pool_main
+        return pool_main(argv[1:])
+    if argv and argv[0] == 'results':
+        from result_store import main as results_main
+        return results_main(argv[1:])
+    if argv and argv[0] == 'jobs':
+        from jobs import main as jobs_main
+        return jobs_main(argv[1:])
+    if argv and argv[0] == 'serve':
+        from server import main as serve_main
+        return serve_main(argv[1:])
+    if argv and argv[0] == 'dupes':
+        from near_duplicates import main as dupes_main
+        return dupes_main(argv[1:])
+
     parser = argparse.ArgumentParser(description='Skills Comparator')
     parser.add_argument('resume_path', help='Path to PDF/DOCX resume file')
     parser.add_argument('job_description_path', help='Path to PDF/DOCX job description file')
-    
-    args = parser.parse_args()
+    parser.add_argument('--scorer', choices=['llm', 'local'], default='llm',
+                        help='Score with GPT-4o or with the deterministic local rubric engine')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Bypass the extraction cache and rescore even if a stored result exists')
+    parser.add_argument('--clear-cache', action='store_true', help='Empty the extraction cache before running')
+    parser.add_argument('--extraction-stats', action='store_true',
+                        help='Report pages read and peak memory for each document')
+    parser.add_argument('--fused', action='store_true',
+                        help='Get the LLM score and the explanation from one call instead of two')
+    parser.add_argument('--token-budget', type=int, default=metrics.TOKEN_BUDGET,
+                        help='Stop before any further API call once this many tokens are spent')
+    parser.add_argument('--usage-report', metavar='PATH',
+                        help='Write token/cost/latency usage as JSON, or Prometheus text for *.prom')
+    
+    args = parser.parse_args(argv)
+
+    with metrics.track("screening", token_budget=args.token_budget) as usage:
+        try:
+            _run_cli(args)
+        except metrics.TokenBudgetExceeded as e:
+            print(f"\nAborted: {e}", file=sys.stderr)
+            return 2
+        finally:
+            print(f"\nUSAGE: {metrics.format_summary(usage.summary())}", file=sys.stderr)
+            if args.usage_report:
+                metrics.write_report(args.usage_report, usage)
+
+def _run_cli(args):
+    """Screen one resume against one JD and print the report"""
+    if args.clear_cache:
+        get_extraction_cache().invalidate()
     
     for path in [args.resume_path, args.job_description_path]:
         if not os.path.exists(path):
             raise FileNotFoundError(f"File {path} not found")
 
-    def process_file(file_path):
-        if file_path.lower().endswith('.pdf'):
-            return extract_text_from_pdf(open(file_path, 'rb'))
-        elif file_path.lower().endswith('.docx'):
-            return extract_text_from_docx(open(file_path, 'rb'))
-        raise ValueError("Unsupported file format")
-
-    resume_text = process_file(args.resume_path)
-    jd_text = process_file(args.job_description_path)
+    resume_text, resume_stats = extract_text_with_stats(args.resume_path, max_chars=EXTRACTION_CHAR_BUDGET)
+    jd_text, jd_stats = extract_text_with_stats(args.job_description_path, max_chars=EXTRACTION_CHAR_BUDGET)
+    if args.extraction_stats:
+        for path, stats in [(args.resume_path, resume_stats), (args.job_description_path, jd_stats)]:
+            pages = f"{stats['pages_read']}/{stats['page_count']} pages" if stats['page_count'] else "docx"
+            print(f"{path}: {pages}, {stats['chars']} chars in {stats['seconds']}s, "
+                  f"peak Python memory {stats['peak_python_bytes'] / 1024:.0f} KiB, "
+                  f"process peak RSS {stats['peak_rss_bytes'] / 2**20:.0f} MiB")
 
-    resume_skills = extract_skills_with_openai(resume_text)
-    jd_requirements = extract_skills_with_openai(jd_text)
+    resume_skills, jd_requirements = asyncio.run(
+        aextract_pair(resume_text, jd_text, use_cache=not args.no_cache)
+    )
 
     def display_results(data, title):
         print(f"\n{title}:")
@@ -395,10 +904,41 @@ def main():
     display_results(resume_skills, "RESUME SKILLS")
     display_results(jd_requirements, "JOB DESCRIPTION REQUIREMENTS")
 
-    comparison = compare_skills(resume_skills, jd_requirements)
+    from batch import file_sha256
+
+    scorer = 'local' if args.scorer == 'local' else 'fused' if args.fused else 'llm'
+    prompt_version, model = scoring_version(scorer)
+    jd_id, candidate_id = file_sha256(args.job_description_path), file_sha256(args.resume_path)
+    store = get_result_store()
+    stored = None if args.no_cache else store.get(jd_id, candidate_id, scorer, prompt_version)
+    if stored is None and not args.no_cache:
+        stored = find_near_duplicate_screening(store, jd_id, candidate_id, resume_text, scorer,
+                                               prompt_version, os.path.basename(args.resume_path))
+
+    explanation = None
+    if stored is not None:
+        comparison, explanation = stored['comparison'], stored['explanation']
+        print(f"\n(Stored result from {time.strftime('%Y-%m-%d %H:%M', time.localtime(stored['created_at']))})")
+        reused_from = comparison.get('reused_from')
+        if reused_from:
+            source = reused_from['candidate_name'] or reused_from['candidate_id'][:16]
+            print(f"(Score reused from near-duplicate resume {source}, {reused_from['similarity']:.0%} similar)")
+    else:
+        if scorer == 'local':
+            comparison = compare_skills_local(resume_skills, jd_requirements)
+        elif scorer == 'fused':
+            comparison, explanation = compare_and_explain(resume_skills, jd_requirements)
+        else:
+            comparison = compare_skills(resume_skills, jd_requirements)
+        if 'error' not in comparison:
+            store.save(jd_id, candidate_id, scorer, comparison, explanation, prompt_version, model,
+                       jd_name=os.path.basename(args.job_description_path),
+                       candidate_name=os.path.basename(args.resume_path))
     
     print("\n\nMATCH ANALYSIS:")
     print(f"Overall Match Score: {comparison['overall_score']}%")
+    if comparison.get('scoring_model'):
+        print(f"Scored by: {comparison['scoring_model']}")
     
     print("\nScore Breakdown:")
     if 'score_breakdown' in comparison:
@@ -413,9 +953,17 @@ def main():
         print("\nMATCHED REQUIREMENTS:")
         print('\n'.join(f'- {item}' for item in comparison['matched_requirements']))
 
-    score_explanation = generate_score_explanation(resume_skills, jd_requirements, comparison)
     print("\nSCORE EXPLANATION:")
-    print(score_explanation)
+    if explanation is not None:
+        print(explanation)
+        return
+    chunks = []
+    for chunk in stream_score_explanation(resume_skills, jd_requirements, comparison):
+        chunks.append(chunk)
+        print(chunk, end='', flush=True)
+    print()
+    if 'error' not in comparison:
+        store.set_explanation(jd_id, candidate_id, scorer, ''.join(chunks))
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,260 @@
+import contextlib
+import contextvars
+import json
+import os
+import threading
+import time
+
+# USD per million tokens: (input, cached input, output)
+MODEL_PRICES = {
+    "gpt-4o": (2.50, 1.25, 10.00),
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+    "text-embedding-ada-002": (0.10, 0.10, 0.0),
+    "text-embedding-3-small": (0.02, 0.02, 0.0),
+}
+# Batch API requests are billed at half the synchronous price
+BATCH_DISCOUNT = 0.5
+# Default per-run token budget for the CLIs; unset means unlimited
+TOKEN_BUDGET = int(os.environ["TOKEN_BUDGET"]) if os.environ.get("TOKEN_BUDGET") else None
+
+
+class TokenBudgetExceeded(RuntimeError):
+    """Raised before a call would start once a run has used up its token budget"""
+
+
+def call_cost(model, prompt_tokens, completion_tokens, cached_tokens=0, batch=False):
+    """USD cost of one call, or None when the model has no known price"""
+    prices = MODEL_PRICES.get(model)
+    if prices is None and model:
+        # Dated snapshots ("gpt-4o-2024-08-06") are priced like their base model
+        bases = [base for base in MODEL_PRICES if model.startswith(base + "-")]
+        prices = MODEL_PRICES[max(bases, key=len)] if bases else None
+    if prices is None:
+        return None
+    input_price, cached_price, output_price = prices
+    cost = ((prompt_tokens - cached_tokens) * input_price + cached_tokens * cached_price
+            + completion_tokens * output_price) / 1_000_000
+    return cost * BATCH_DISCOUNT if batch else cost
+
+
+class UsageTracker:
+    """Running totals of the calls made while it is active, per stage and model; see track()"""
+
+    def __init__(self, name, token_budget=None):
+        self.name = name
+        self.token_budget = token_budget
+        self.total_tokens = 0
+        self.events = {}
+        self._groups = {}
+        self._lock = threading.Lock()
+
+    def over_budget(self):
+        return self.token_budget is not None and self.total_tokens >= self.token_budget
+
+    def add(self, call):
+        with self._lock:
+            group = self._groups.setdefault((call["stage"], call["model"]), {
+                "stage": call["stage"], "model": call["model"], "calls": 0,
+                "prompt_tokens": 0, "completion_tokens": 0, "cached_tokens": 0,
+                "latency_seconds": 0.0, "cost_usd": 0.0
+            })
+            group["calls"] += 1
+            for field in ("prompt_tokens", "completion_tokens", "cached_tokens"):
+                group[field] += call[field]
+            group["latency_seconds"] += call["latency_seconds"] or 0.0
+            group["cost_usd"] += call["cost_usd"] or 0.0
+            self.total_tokens += call["prompt_tokens"] + call["completion_tokens"]
+
+    def count(self, event):
+        with self._lock:
+            self.events[event] = self.events.get(event, 0) + 1
+
+    def summary(self):
+        """JSON-serialisable totals for the whole run and per stage and model"""
+        with self._lock:
+            by_stage = [dict(group) for _, group in sorted(self._groups.items(), key=lambda item: str(item[0]))]
+            events = dict(sorted(self.events.items()))
+        for group in by_stage:
+            group["latency_seconds"] = round(group["latency_seconds"], 3)
+            group["cost_usd"] = round(group["cost_usd"], 6)
+        return {
+            "name": self.name,
+            "calls": sum(g["calls"] for g in by_stage),
+            "prompt_tokens": sum(g["prompt_tokens"] for g in by_stage),
+            "completion_tokens": sum(g["completion_tokens"] for g in by_stage),
+            "cached_tokens": sum(g["cached_tokens"] for g in by_stage),
+            "total_tokens": sum(g["prompt_tokens"] + g["completion_tokens"] for g in by_stage),
+            "cost_usd": round(sum(g["cost_usd"] for g in by_stage), 6),
+            "latency_seconds": round(sum(g["latency_seconds"] for g in by_stage), 3),
+            "token_budget": self.token_budget,
+            "events": events,
+            "by_stage": by_stage
+        }
+
+
+# Everything recorded in this process, for the Prometheus export
+PROCESS_USAGE = UsageTracker("process")
+_active = contextvars.ContextVar("active_usage_trackers", default=())
+
+
+@contextlib.contextmanager
+def activate(tracker):
+    """Attribute every call made inside the block to an existing UsageTracker too"""
+    token = _active.set(_active.get() + (tracker,))
+    try:
+        yield tracker
+    finally:
+        _active.reset(token)
+
+
+def track(name, token_budget=None):
+    """Attribute every call made inside the block to a new UsageTracker
+
+    Trackers nest, so a screening inside a batch counts towards both. Worker threads
+    only see the tracker when started under contextvars.copy_context(); asyncio tasks
+    and asyncio.to_thread carry it automatically.
+    """
+    return activate(UsageTracker(name, token_budget))
+
+
+def check_budget():
+    """Raise TokenBudgetExceeded if any active run has spent its token budget"""
+    for tracker in _active.get():
+        if tracker.over_budget():
+            raise TokenBudgetExceeded(
+                f"Token budget of {tracker.token_budget} for {tracker.name} exhausted "
+                f"({tracker.total_tokens} tokens used)")
+
+
+def record(stage, model, prompt_tokens=0, completion_tokens=0, cached_tokens=0,
+           latency_seconds=None, batch=False):
+    """Record one API call against the process totals and every active tracker"""
+    call = {
+        "stage": stage,
+        "model": model,
+        "prompt_tokens": prompt_tokens or 0,
+        "completion_tokens": completion_tokens or 0,
+        "cached_tokens": cached_tokens or 0,
+        "latency_seconds": latency_seconds,
+        "cost_usd": call_cost(model, prompt_tokens or 0, completion_tokens or 0,
+                              cached_tokens or 0, batch=batch),
+        "batch": batch
+    }
+    PROCESS_USAGE.add(call)
+    for tracker in _active.get():
+        tracker.add(call)
+    return call
+
+
+def count_event(event):
+    """Count a pipeline event (e.g. a model escalation) in the process totals and active trackers"""
+    PROCESS_USAGE.count(event)
+    for tracker in _active.get():
+        tracker.count(event)
+
+
+def record_usage(stage, model, usage, latency_seconds=None, batch=False):
+    """Record a call from the usage object (or dict) of a chat completion response"""
+    if usage is None:
+        return record(stage, model, latency_seconds=latency_seconds, batch=batch)
+    if isinstance(usage, dict):
+        details = usage.get("prompt_tokens_details") or {}
+        cached = details.get("cached_tokens", 0)
+        prompt, completion = usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0)
+    else:
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached = getattr(details, "cached_tokens", 0) if details else 0
+        prompt, completion = usage.prompt_tokens, usage.completion_tokens
+    return record(stage, model, prompt, completion, cached, latency_seconds, batch)
+
+
+def timed_completion(create, stage, **request):
+    """Call create(**request) under the active budgets and record its usage"""
+    check_budget()
+    start = time.perf_counter()
+    response = create(**request)
+    record_usage(stage, request.get("model"), getattr(response, "usage", None),
+                 time.perf_counter() - start)
+    return response
+
+
+async def atimed_completion(create, stage, **request):
+    """Async counterpart of timed_completion"""
+    check_budget()
+    start = time.perf_counter()
+    response = await create(**request)
+    record_usage(stage, request.get("model"), getattr(response, "usage", None),
+                 time.perf_counter() - start)
+    return response
+
+
+def stream_completion(create, stage, **request):
+    """Stream create(**request), yielding content deltas, and record its usage at the end"""
+    check_budget()
+    start = time.perf_counter()
+    stream = create(stream=True, stream_options={"include_usage": True}, **request)
+    usage = None
+    for chunk in stream:
+        # With include_usage the final chunk carries the usage and no choices
+        if getattr(chunk, "usage", None):
+            usage = chunk.usage
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+    record_usage(stage, request.get("model"), usage, time.perf_counter() - start)
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def prometheus_text(tracker=PROCESS_USAGE, prefix="screening"):
+    """Render a tracker's totals in the Prometheus text exposition format"""
+    summary = tracker.summary()
+    metrics = [
+        ("llm_requests_total", "counter", "API calls made", lambda g: [({}, g["calls"])]),
+        ("llm_tokens_total", "counter", "Tokens billed, by kind", lambda g: [
+            ({"kind": "prompt"}, g["prompt_tokens"]),
+            ({"kind": "completion"}, g["completion_tokens"]),
+            ({"kind": "cached"}, g["cached_tokens"])]),
+        ("llm_cost_usd_total", "counter", "Estimated spend in USD", lambda g: [({}, g["cost_usd"])]),
+        ("llm_latency_seconds_total", "counter", "Wall time spent waiting on calls",
+         lambda g: [({}, g["latency_seconds"])]),
+    ]
+    lines = []
+    for name, kind, help_text, samples in metrics:
+        lines.append(f"# HELP {prefix}_{name} {help_text}")
+        lines.append(f"# TYPE {prefix}_{name} {kind}")
+        for group in summary["by_stage"]:
+            for extra, value in samples(group):
+                labels = {"stage": group["stage"], "model": group["model"], **extra}
+                label_text = ",".join(f'{k}="{_label(v)}"' for k, v in labels.items())
+                lines.append(f"{prefix}_{name}{{{label_text}}} {value}")
+    lines.append(f"# HELP {prefix}_events_total Pipeline events such as model escalations")
+    lines.append(f"# TYPE {prefix}_events_total counter")
+    for event, value in summary["events"].items():
+        lines.append(f'{prefix}_events_total{{event="{_label(event)}"}} {value}')
+    return "\n".join(lines) + "\n"
+
+
+def write_report(path, tracker):
+    """Write a tracker's summary to path: Prometheus text for .prom files, JSON otherwise"""
+    with open(path, "w", encoding="utf-8") as f:
+        if path.endswith(".prom"):
+            f.write(prometheus_text(tracker))
+        else:
+            json.dump(tracker.summary(), f, indent=2)
+
+
+def format_summary(summary):
+    """One-line human readable usage total"""
+    cost = f"${summary['cost_usd']:.4f}"
+    cached = f" ({summary['cached_tokens']} cached)" if summary["cached_tokens"] else ""
+    text = (f"{summary['calls']} API calls, {summary['prompt_tokens']} prompt{cached} + "
+            f"{summary['completion_tokens']} completion tokens, ~{cost}, "
+            f"{summary['latency_seconds']:.1f}s waiting")
+    events = summary.get("events") or {}
+    if events.get("first_pass"):
+        escalated = sum(n for event, n in events.items() if event.startswith("escalated"))
+        text += (f", {escalated}/{events['first_pass']} first-pass scores escalated "
+                 f"({escalated / events['first_pass']:.0%})")
+    return text
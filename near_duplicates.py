@@ -0,0 +1,365 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+
+from sections import segment_sections
+
+NEAR_DUP_INDEX_PATH = os.environ.get("NEAR_DUP_INDEX_PATH", ".results/fingerprints.sqlite3")
+# Off by default: a reused extraction is only as right as the near-duplicate it came from
+NEAR_DUPLICATES = os.environ.get("NEAR_DUPLICATES", "0") == "1"
+# Minimum fingerprint similarity (share of equal bits) for two texts to count as near-duplicates.
+# Lower values catch looser copies but make every lookup scan more candidates.
+NEAR_DUP_SIMILARITY = float(os.environ.get("NEAR_DUP_SIMILARITY", "0.95"))
+# Also reuse a near-duplicate resume's stored score against the same JD instead of rescoring
+NEAR_DUP_REUSE_SCORES = os.environ.get("NEAR_DUP_REUSE_SCORES", "0") == "1"
+FINGERPRINT_BITS = 64
+SHINGLE_WORDS = 3
+# Sections extractions are mostly read from; near-duplicates must agree on them exactly
+KEY_SECTIONS = ("skills", "certifications", "education")
+
+
+def _words(text):
+    return re.findall(r"\w+", text.lower())
+
+
+def _shingles(text):
+    words = _words(text)
+    if len(words) <= SHINGLE_WORDS:
+        return [" ".join(words)] if words else []
+    return [" ".join(words[i:i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1)]
+
+
+def simhash(text):
+    """64-bit SimHash of the word 3-grams of text
+
+    Case, punctuation and whitespace are ignored, so a re-export of the same document
+    gets the same fingerprint, and a changed date or moved line flips only a few bits.
+    """
+    import numpy as np
+
+    shingles = _shingles(text)
+    if not shingles:
+        return 0
+    digests = b"".join(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest()
+                       for shingle in shingles)
+    bits = np.unpackbits(np.frombuffer(digests, dtype=np.uint8)).reshape(-1, FINGERPRINT_BITS)
+    majority = bits.sum(axis=0, dtype=np.int64) * 2 > len(shingles)
+    return int.from_bytes(np.packbits(majority).tobytes(), "big")
+
+
+def key_sections_digest(text):
+    """Hash of the skills, certifications and education sections of text, or None without any
+
+    These sections are short next to the experience history, so editing a skill, dropping
+    a certification or changing a degree barely moves the whole-document SimHash. Reuse
+    therefore also requires their normalised words to be identical.
+    """
+    parts = sorted(f"{section}: {' '.join(_words(section_text))}"
+                   for section, section_text in segment_sections(text) if section in KEY_SECTIONS)
+    if not parts:
+        return None
+    return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+def max_distance(similarity):
+    """Differing bits allowed between the fingerprints of near-duplicates"""
+    return int((1 - similarity) * FINGERPRINT_BITS + 1e-9)
+
+
+def band_values(fingerprint, bands):
+    """Split a fingerprint into `bands` runs of bits
+
+    Fingerprints at most bands - 1 bits apart are equal in at least one band, so
+    looking up the bands of a query finds every near-duplicate.
+    """
+    values = []
+    shift = FINGERPRINT_BITS
+    for band in range(bands):
+        width = FINGERPRINT_BITS // bands + (1 if band < FINGERPRINT_BITS % bands else 0)
+        shift -= width
+        values.append((fingerprint >> shift) & ((1 << width) - 1))
+    return values
+
+
+def _to_sql(fingerprint):
+    # SQLite integers are signed 64-bit
+    return fingerprint - (1 << 64) if fingerprint >= 1 << 63 else fingerprint
+
+
+def _from_sql(value):
+    return value + (1 << 64) if value < 0 else value
+
+
+def text_sha256(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class NearDuplicateIndex:
+    """SQLite index of SimHash fingerprints of document text, with banded lookup
+
+    Each text is stored with its extraction (when it has one) and the document IDs (file
+    hashes, as used by the result store) it was read from. Lookups only compare the query
+    against texts sharing a band, which stays sub-millisecond at hundreds of thousands of
+    texts. Every reuse of a near-duplicate's extraction or score is logged with its source.
+    """
+
+    def __init__(self, path=NEAR_DUP_INDEX_PATH, similarity=NEAR_DUP_SIMILARITY):
+        self.path = path
+        self.max_distance = max_distance(similarity)
+        self.bands = min(self.max_distance + 1, FINGERPRINT_BITS)
+        self._lock = threading.Lock()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS texts (
+                id INTEGER PRIMARY KEY,
+                text_sha256 TEXT NOT NULL UNIQUE,
+                fingerprint INTEGER NOT NULL,
+                extraction TEXT,
+                extraction_version TEXT,
+                key_sections TEXT,
+                created_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS bands (
+                band INTEGER NOT NULL,
+                value INTEGER NOT NULL,
+                text_id INTEGER NOT NULL,
+                PRIMARY KEY (band, value, text_id)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS documents (
+                doc_id TEXT PRIMARY KEY,
+                text_id INTEGER NOT NULL,
+                name TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_documents_text ON documents (text_id);
+            CREATE TABLE IF NOT EXISTS reuses (
+                id INTEGER PRIMARY KEY,
+                kind TEXT NOT NULL,
+                text_sha256 TEXT NOT NULL,
+                source_text_sha256 TEXT NOT NULL,
+                distance INTEGER NOT NULL,
+                doc_id TEXT,
+                source_doc_id TEXT,
+                created_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+        """)
+        columns = [row["name"] for row in self._conn.execute("PRAGMA table_info(texts)")]
+        if "key_sections" not in columns:
+            # Texts indexed before key sections were recorded never qualify for reuse
+            self._conn.execute("ALTER TABLE texts ADD COLUMN key_sections TEXT")
+        self._ensure_bands()
+
+    def _ensure_bands(self):
+        # The band layout follows the similarity threshold; rebuild it when that changes
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'bands'").fetchone()
+            if row is not None and int(row["value"]) == self.bands:
+                return
+            self._conn.execute("DELETE FROM bands")
+            rows = self._conn.execute("SELECT id, fingerprint FROM texts").fetchall()
+            self._conn.executemany("INSERT INTO bands VALUES (?, ?, ?)", [
+                (band, value, row["id"])
+                for row in rows
+                for band, value in enumerate(band_values(_from_sql(row["fingerprint"]), self.bands))])
+            self._conn.execute("INSERT OR REPLACE INTO meta VALUES ('bands', ?)", (str(self.bands),))
+            self._conn.commit()
+
+    def _text_id(self, sha256, fingerprint, extraction=None, extraction_version=None, key_sections=None):
+        row = self._conn.execute("SELECT id FROM texts WHERE text_sha256 = ?", (sha256,)).fetchone()
+        if row is not None:
+            if extraction is not None:
+                self._conn.execute("UPDATE texts SET extraction = ?, extraction_version = ? WHERE id = ?",
+                                   (json.dumps(extraction), extraction_version, row["id"]))
+            if key_sections is not None:
+                self._conn.execute("UPDATE texts SET key_sections = ? WHERE id = ?", (key_sections, row["id"]))
+            return row["id"]
+        cursor = self._conn.execute(
+            "INSERT INTO texts (text_sha256, fingerprint, extraction, extraction_version, key_sections, "
+            "created_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (sha256, _to_sql(fingerprint), json.dumps(extraction) if extraction is not None else None,
+             extraction_version, key_sections, time.time()))
+        self._conn.executemany("INSERT INTO bands VALUES (?, ?, ?)", [
+            (band, value, cursor.lastrowid)
+            for band, value in enumerate(band_values(fingerprint, self.bands))])
+        return cursor.lastrowid
+
+    def add_many(self, entries):
+        """Index many texts in one transaction
+
+        entries are dicts with 'text_sha256' and 'fingerprint', and optionally 'extraction'
+        with its 'extraction_version' and the text's 'key_sections' digest. A known text
+        only gets those updated.
+        """
+        with self._lock:
+            for entry in entries:
+                self._text_id(entry["text_sha256"], entry["fingerprint"], entry.get("extraction"),
+                              entry.get("extraction_version"), entry.get("key_sections"))
+            self._conn.commit()
+        return len(entries)
+
+    def add_text(self, text, extraction=None, extraction_version=None):
+        """Index text, optionally with the extraction made from it"""
+        self.add_many([{"text_sha256": text_sha256(text), "fingerprint": simhash(text),
+                        "extraction": extraction, "extraction_version": extraction_version,
+                        "key_sections": key_sections_digest(text)}])
+
+    def add_document(self, doc_id, text, name=None):
+        """Record that document doc_id (e.g. a file hash) reads as text"""
+        sha256, fingerprint = text_sha256(text), simhash(text)
+        with self._lock:
+            text_id = self._text_id(sha256, fingerprint, key_sections=key_sections_digest(text))
+            self._conn.execute(
+                "INSERT INTO documents VALUES (?, ?, ?) ON CONFLICT (doc_id) DO UPDATE SET "
+                "text_id = excluded.text_id, name = COALESCE(excluded.name, name)",
+                (doc_id, text_id, name))
+            self._conn.commit()
+
+    def nearest(self, fingerprint, extraction_version=None, key_sections=None, limit=10):
+        """Indexed texts within the similarity threshold of fingerprint, closest first
+
+        With extraction_version only texts with an extraction made under it are returned,
+        and with key_sections only texts with that key_sections_digest().
+        """
+        values = band_values(fingerprint, self.bands)
+        where = " OR ".join("(band = ? AND value = ?)" for _ in values)
+        params = [x for pair in enumerate(values) for x in pair]
+        query = (f"SELECT id, text_sha256, fingerprint FROM texts "
+                 f"WHERE id IN (SELECT text_id FROM bands WHERE {where})")
+        if extraction_version is not None:
+            query += " AND extraction_version = ?"
+            params.append(extraction_version)
+        if key_sections is not None:
+            query += " AND key_sections = ?"
+            params.append(key_sections)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        matches = []
+        for row in rows:
+            distance = hamming(fingerprint, _from_sql(row["fingerprint"]))
+            if distance <= self.max_distance:
+                matches.append({"text_id": row["id"], "text_sha256": row["text_sha256"],
+                                "distance": distance,
+                                "similarity": round(1 - distance / FINGERPRINT_BITS, 4)})
+        matches.sort(key=lambda match: (match["distance"], match["text_id"]))
+        return matches[:limit]
+
+    def reuse_extraction(self, text, extraction_version):
+        """(extraction, match) of the closest near-duplicate of text extracted under extraction_version
+
+        The near-duplicate must have the same key sections (see key_sections_digest), so
+        texts without recognisable skills, certifications or education sections never
+        qualify. Returns None when there is none; a reuse is logged with its source.
+        """
+        key_sections = key_sections_digest(text)
+        if key_sections is None:
+            return None
+        sha256 = text_sha256(text)
+        matches = self.nearest(simhash(text), extraction_version=extraction_version,
+                               key_sections=key_sections, limit=1)
+        if not matches:
+            return None
+        match = matches[0]
+        with self._lock:
+            row = self._conn.execute("SELECT extraction FROM texts WHERE id = ?",
+                                     (match["text_id"],)).fetchone()
+        self.record_reuse("extraction", sha256, match)
+        return json.loads(row["extraction"]), match
+
+    def near_documents(self, text, exclude_doc_id=None, limit=10):
+        """Documents whose text is a near-duplicate of text with the same key sections, closest first"""
+        key_sections = key_sections_digest(text)
+        if key_sections is None:
+            return []
+        matches = self.nearest(simhash(text), key_sections=key_sections, limit=limit)
+        if not matches:
+            return []
+        by_text = {match["text_id"]: match for match in matches}
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT doc_id, text_id, name FROM documents "
+                f"WHERE text_id IN ({', '.join('?' * len(by_text))})", list(by_text)).fetchall()
+        documents = [{**by_text[row["text_id"]], "doc_id": row["doc_id"], "name": row["name"]}
+                     for row in rows if row["doc_id"] != exclude_doc_id]
+        documents.sort(key=lambda document: (document["distance"], document["doc_id"]))
+        return documents
+
+    def record_reuse(self, kind, sha256, match, doc_id=None):
+        """Log that `kind` ('extraction' or 'score') of text sha256 was taken from match"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO reuses (kind, text_sha256, source_text_sha256, distance, doc_id, "
+                "source_doc_id, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (kind, sha256, match["text_sha256"], match["distance"], doc_id,
+                 match.get("doc_id"), time.time()))
+            self._conn.commit()
+
+    def recent_reuses(self, limit=20):
+        with self._lock:
+            rows = self._conn.execute("SELECT * FROM reuses ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+        return [dict(row) for row in rows]
+
+    def stats(self):
+        """Indexed text, document and reuse counts"""
+        with self._lock:
+            texts, documents = self._conn.execute(
+                "SELECT (SELECT COUNT(*) FROM texts), (SELECT COUNT(*) FROM documents)").fetchone()
+            reuses = dict(self._conn.execute("SELECT kind, COUNT(*) FROM reuses GROUP BY kind").fetchall())
+        return {"path": self.path, "texts": texts, "documents": documents, "bands": self.bands,
+                "max_distance": self.max_distance, "reuses": reuses}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Near-duplicate document index')
+    parser.add_argument('--index', default=NEAR_DUP_INDEX_PATH, help='Fingerprint database path')
+    parser.add_argument('--similarity', type=float, default=NEAR_DUP_SIMILARITY,
+                        help='Minimum fingerprint similarity of near-duplicates')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    subparsers.add_parser('stats', help='Index size and reuse counts')
+    check_parser = subparsers.add_parser('check', help='List indexed near-duplicates of documents')
+    check_parser.add_argument('paths', nargs='+', help='PDF/DOCX files')
+    reuses_parser = subparsers.add_parser('reuses', help='Most recent reuses and their sources')
+    reuses_parser.add_argument('-n', '--limit', type=int, default=20)
+
+    args = parser.parse_args(argv)
+    index = NearDuplicateIndex(args.index, args.similarity)
+
+    if args.command == 'stats':
+        print(json.dumps(index.stats()))
+    elif args.command == 'reuses':
+        for reuse in index.recent_reuses(args.limit):
+            created = time.strftime('%Y-%m-%d %H:%M', time.localtime(reuse['created_at']))
+            print(f"{created}  {reuse['kind']:<10} {reuse['text_sha256'][:12]} <- "
+                  f"{reuse['source_text_sha256'][:12]}  {reuse['distance']} bits apart"
+                  f"{'  ' + reuse['source_doc_id'][:12] if reuse['source_doc_id'] else ''}")
+    else:
+        from logic import EXTRACTION_CHAR_BUDGET, extract_text_from_file
+
+        for path in args.paths:
+            text = extract_text_from_file(path, max_chars=EXTRACTION_CHAR_BUDGET)
+            started = time.perf_counter()
+            matches = index.nearest(simhash(text))
+            elapsed = (time.perf_counter() - started) * 1000
+            print(f"{path}: {len(matches)} near-duplicates in {elapsed:.2f} ms")
+            for match in matches:
+                print(f"  {match['text_sha256'][:12]}  {match['similarity']:.1%} similar")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,290 @@
+import hashlib
+import json
+import os
+import re
+
+# Layout used for new requests: "v2" (static prefix first, compact data) or "v1" (legacy)
+PROMPT_VERSION = os.environ.get("PROMPT_VERSION", "v2")
+PROMPT_VERSIONS = ("v1", "v2")
+
+# Static prompt text shared by every layout. The indentation is that of the original
+# inline f-strings, so the v1 layout reproduces the legacy prompts byte for byte.
+COMPARISON_INSTRUCTIONS = """Act as a senior technical recruiter with 15+ years experience. Conduct a rigorous, 
+    quantitative analysis following these steps:
+
+    1. Skill Category Analysis:
+    - Map resume skills to these JD categories:
+      [Programming, Cloud, ML, DevOps, Data, AI]
+    - Compare specificity levels (e.g., "Python" vs "Programming Languages")
+    - Award category credit for any direct/implied match
+
+    2. Qualifications Assessment:
+    - Evaluate degree LEVEL (PhD/Masters/Bachelors) against JD requirements
+    - Analyze degree FIELD relevance (CS vs IT vs unrelated)
+    - Consider course projects/thesis topics for field relevance
+
+    3. Certification Verification:
+    - Match exact cert names where required
+    - Accept equivalent certs (AWS vs Azure vs GCP)
+    - Award partial credit for in-progress certifications
+
+    4. Experience Scoring:
+    - Compare years of experience in key areas
+    - Verify project depth and complexity
+    - Award bonus for leadership experience
+
+    5. Contextual Skill Mapping:
+       - Check project descriptions for implied skills
+       - Match 'conversational chatbot' -> NLP
+       - Map 'Smart India Hackathon Winner' -> Hackathon Experience
+       - Interpret 'research internship' -> Published Research
+       
+    6. GitHub Validation:
+       - Consider GitHub portfolio as open-source contribution
+       - Count organizational projects as open-source"""
+
+SCORING_RUBRIC = """Scoring Methodology:
+    1. Technical Skills Analysis (50% base weight):
+       - Calculate skill coverage ratio: (resume_skills_matched / jd_skills_required)
+       - Base score = (matched_skills_count / required_skills_count) * base_weight
+       - If certifications not required, use adjusted_weight = base_weight + 10
+       - Handle zero division: If JD requires 0 skills, full base weight awarded
+    
+    2. Qualifications Evaluation (30% base weight):
+       - Degree Level Match (20%):
+         * Full 20% if resume meets/exceeds JD's required degree level
+         * 10% if one level below JD requirement (e.g. JD requires Master's - resume has Bachelor's)
+         * 0% if two+ levels below
+       - Field Relevance (10%):
+         * 10% if exact field match with JD requirements
+         * 5% if related field (e.g. Computer Engineering vs Computer Science)
+         * 0% for unrelated fields
+       - Only apply these scores if candidate has at least the minimum required degree type
+       - Complete mismatch (e.g. JD requires CS degree - resume has unrelated degree) = 0% overall
+    
+    3. Certification Verification (20% conditional):
+       - ONLY APPLY IF JD REQUIRES SPECIFIC CERTS
+       - If no certs required in JD, redistribute:
+         - Technical Skills: +10% (total 60%)
+         - Qualifications: +10% (total 40%)
+       - Required certs: 15%
+       - Bonus certs: 5%
+    
+    4. Experience Bonus (0-10%):
+       - +2% per year over JD's minimum requirement
+       - Max +10%
+       
+    Add these matching rules:
+    1. NLP Recognition:
+       - Accept projects using: chatbots, text processing, OCR, speech systems
+       - Count LLM implementations as NLP experience
+       
+    2. Hackathon Validation:
+       - Consider competition wins as hackathon experience
+       - Treat school-level competitions as valid
+       
+    3. Research Recognition:
+       - Count research internships as published research
+       - Accept technical reports as research equivalents"""
+
+COMPARISON_RESPONSE_FORMAT = """Final Response Format:
+    {
+        "certifications_required": [true/false],
+        "overall_score": [0-100 score with one decimal],
+        "score_breakdown": {
+            "technical_skills": [0-50/60],
+            "qualifications": [0-30/40],
+            "certifications": [0-20],
+            "bonuses": [0-10]
+        },
+        "missing_requirements": ["list specific gaps with JD requirements"],
+        "matched_requirements": ["list specific matches with evidence"],
+        "strength_analysis": ["list of 3 key strengths"],
+        "improvement_areas": ["list of 3 key gaps"],
+        "hiring_recommendation": "concise hiring verdict",
+        "next_steps": ["3 actionable next steps"]
+    }"""
+
+EXPLANATION_GUIDELINES = """Act as a senior technical recruiter. Analyze this candidate evaluation and provide a detailed, 
+    professional explanation of the scoring results. Follow these guidelines:
+    1. Remember the exact scoring breakdown and comparison context from the analysis
+    2. Cross-reference specific requirements from the JD with resume details
+    3. Explain technical skill adjacencies that could compensate for gaps
+    4. Highlight patterns in qualifications/certifications
+    5. Maintain professional tone but add contextual insights"""
+
+EXPLANATION_SECTIONS = """Structure your response with these sections (use markdown):
+    ## Overall Assessment
+    - Start with score interpretation
+    - Key comparative strengths/weaknesses
+    - High-level match summary
+    
+    ## Technical Competency Analysis
+    - Skill category comparisons with JD requirements
+    - Notable matches/mismatches with specific examples
+    - Contextual analysis of skill depth
+    
+    ## Qualifications Evaluation 
+    - Degree level/field alignment analysis
+    - Coursework/project relevance to JD
+    - Gap impact assessment
+    
+    ## Certification Alignment
+    - Direct/indirect certification matches
+    - Weight of missing certs in context
+    - Equivalent certifications analysis
+    
+    ## Experience Relevance
+    - Years experience vs requirements
+    - Project complexity comparison
+    - Leadership experience evaluation
+    
+    ## Final Recommendation
+    - Strong/Moderate/Weak fit conclusion *REFER TO THE SCORING RESULTS FOR THE CONCLUSION*
+    - Hiring consideration with context
+    - Suggested next steps"""
+
+# (JSON field, markdown heading) of each explanation section, in display order
+EXPLANATION_SECTION_FIELDS = [
+    ("overall_assessment", "Overall Assessment"),
+    ("technical_competency_analysis", "Technical Competency Analysis"),
+    ("qualifications_evaluation", "Qualifications Evaluation"),
+    ("certification_alignment", "Certification Alignment"),
+    ("experience_relevance", "Experience Relevance"),
+    ("final_recommendation", "Final Recommendation"),
+]
+
+
+def _dedent(text):
+    # The templates carry the 4-space indent and stray trailing spaces of the code they
+    # were lifted from
+    return re.sub(r"(?m)[ \t]+$", "", re.sub(r"(?m)^    ", "", text))
+
+
+COMPARISON_SYSTEM_PROMPT = "\n\n".join([
+    _dedent(COMPARISON_INSTRUCTIONS),
+    _dedent(SCORING_RUBRIC),
+    _dedent(COMPARISON_RESPONSE_FORMAT),
+    "Reply with the JSON object only, inside a ```json code block."
+])
+EXPLANATION_SYSTEM_PROMPT = "\n\n".join([
+    _dedent(EXPLANATION_GUIDELINES).replace("Analyze this candidate evaluation",
+                                            "Analyze the candidate evaluation you are given"),
+    _dedent(EXPLANATION_SECTIONS)
+])
+FUSED_SYSTEM_PROMPT = "\n\n".join([
+    _dedent(COMPARISON_INSTRUCTIONS),
+    _dedent(SCORING_RUBRIC),
+    "Then explain the scores as a senior technical recruiter would: cross-reference JD "
+    "requirements with resume details, explain skill adjacencies that could compensate for "
+    "gaps and keep a professional tone. The explanation must agree with the scores above.",
+    _dedent(EXPLANATION_SECTIONS).replace(
+        "Structure your response with these sections (use markdown):",
+        "Fill the explanation fields with these sections (markdown bullet points, without the heading):"),
+    _dedent(COMPARISON_RESPONSE_FORMAT).replace(
+        '"next_steps": ["3 actionable next steps"]',
+        '"next_steps": ["3 actionable next steps"],\n    "explanation": {\n' + ",\n".join(
+            f'        "{field}": "markdown for the {title} section"'
+            for field, title in EXPLANATION_SECTION_FIELDS) + "\n    }"),
+    "Reply with this JSON object only."
+])
+
+
+def compact_json(data):
+    """Serialize prompt data without indentation or spaces after separators"""
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+
+
+def comparison_messages(resume_data, jd_data, version=None):
+    """Chat messages for the structured scoring prompt
+
+    v2 sends the instructions, rubric and response format as a static system message, then
+    the JD before the resume, so calls for one JD share the longest possible cached prefix.
+    """
+    version = version or PROMPT_VERSION
+    if version == "v1":
+        return [{"role": "user", "content": f"""{COMPARISON_INSTRUCTIONS}
+
+    Resume Data:
+    {json.dumps(resume_data, indent=2)}
+
+    Job Description Requirements:
+    {json.dumps(jd_data, indent=2)}
+
+    {SCORING_RUBRIC}
+
+    {COMPARISON_RESPONSE_FORMAT}"""}]
+    return [
+        {"role": "system", "content": COMPARISON_SYSTEM_PROMPT},
+        {"role": "user", "content": f"Job Description Requirements:\n{compact_json(jd_data)}\n\n"
+                                    f"Resume Data:\n{compact_json(resume_data)}"}
+    ]
+
+
+def explanation_messages(resume_data, jd_data, comparison_result, version=None):
+    """Chat messages for the narrative explanation prompt
+
+    v2 sends the guidelines and section outline as a static system message, followed by
+    the JD, resume and scores as compact JSON.
+    """
+    version = version or PROMPT_VERSION
+    if version == "v1":
+        return [{"role": "user", "content": f"""{EXPLANATION_GUIDELINES}
+    
+    Resume Summary:
+    {json.dumps(resume_data, indent=2)}
+    
+    Job Description Requirements:
+    {json.dumps(jd_data, indent=2)}
+    
+    Scoring Results:
+    {json.dumps(comparison_result, indent=2)}
+    
+    {EXPLANATION_SECTIONS}"""}]
+    return [
+        {"role": "system", "content": EXPLANATION_SYSTEM_PROMPT},
+        {"role": "user", "content": f"Job Description Requirements:\n{compact_json(jd_data)}\n\n"
+                                    f"Resume Summary:\n{compact_json(resume_data)}\n\n"
+                                    f"Scoring Results:\n{compact_json(comparison_result)}"}
+    ]
+
+
+def fused_messages(resume_data, jd_data):
+    """Chat messages for one call that returns the scores and the explanation together"""
+    return [
+        {"role": "system", "content": FUSED_SYSTEM_PROMPT},
+        {"role": "user", "content": f"Job Description Requirements:\n{compact_json(jd_data)}\n\n"
+                                    f"Resume Data:\n{compact_json(resume_data)}"}
+    ]
+
+
+def _section_markdown(value):
+    # Models sometimes answer "markdown bullet points" with a JSON list of the bullets
+    if isinstance(value, list):
+        items = [str(item).strip() for item in value if str(item).strip()]
+        return "\n".join(item if item.startswith(("-", "*", "•")) else f"- {item}" for item in items)
+    return str(value or "").strip()
+
+
+def explanation_markdown(sections):
+    """Join {field: markdown} explanation sections into the '## ' document the app renders
+
+    Section values may be strings, lists of bullet points or other scalars.
+    """
+    rendered = [(title, _section_markdown(sections.get(field)))
+                for field, title in EXPLANATION_SECTION_FIELDS]
+    return "\n\n".join(f"## {title}\n{text}" for title, text in rendered if text)
+
+
+def template_version(name, version=None):
+    """Identifier of a template's layout and static text, e.g. 'comparison-v2-3f9a01c2b7de'"""
+    version = version or PROMPT_VERSION
+    if name == "fused":
+        # Single layout; the version only records which default was active
+        messages = fused_messages({}, {})
+    elif name == "comparison":
+        messages = comparison_messages({}, {}, version=version)
+    else:
+        messages = explanation_messages({}, {}, {}, version=version)
+    digest = hashlib.sha256(json.dumps(messages).encode("utf-8")).hexdigest()
+    return f"{name}-{version}-{digest[:12]}"
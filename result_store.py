@@ -0,0 +1,241 @@
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+RESULT_STORE_PATH = os.environ.get("RESULT_STORE_PATH", ".results/screenings.sqlite3")
+# Columns returned by leaderboard(); the full comparison JSON is only loaded by get()
+LEADERBOARD_COLUMNS = ["candidate_id", "candidate_name", "scorer", "overall_score",
+                       "hiring_recommendation", "prompt_version", "model", "created_at"]
+ORDERS = {
+    "score": "overall_score DESC, id",
+    "recent": "created_at DESC, id DESC",
+}
+
+
+class ResultStore:
+    """SQLite store of finished screenings, one row per (JD, candidate, scorer)
+
+    JD and candidate IDs are SHA-256 hashes of the uploaded files, as used by the app
+    and batch mode, so a candidate re-uploaded later maps to the same row. Every row
+    records the prompt template version and model it was produced with.
+    """
+
+    def __init__(self, path=RESULT_STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS screenings (
+                id INTEGER PRIMARY KEY,
+                jd_id TEXT NOT NULL,
+                candidate_id TEXT NOT NULL,
+                scorer TEXT NOT NULL,
+                jd_name TEXT,
+                candidate_name TEXT,
+                overall_score REAL NOT NULL,
+                hiring_recommendation TEXT,
+                comparison TEXT NOT NULL,
+                explanation TEXT,
+                prompt_version TEXT NOT NULL,
+                model TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                UNIQUE (jd_id, candidate_id, scorer)
+            )""")
+        # Leaderboards page through one JD by score or recency; candidate history and
+        # time-range dashboards use the other two
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_screenings_jd_score ON screenings (jd_id, overall_score DESC, id)")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_screenings_jd_created ON screenings (jd_id, created_at)")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_screenings_candidate ON screenings (candidate_id, created_at)")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_screenings_created ON screenings (created_at)")
+        self._conn.commit()
+
+    def _row(self, jd_id, candidate_id, scorer, comparison, explanation, prompt_version, model,
+             jd_name, candidate_name, created_at):
+        return (jd_id, candidate_id, scorer, jd_name, candidate_name,
+                float(comparison.get("overall_score") or 0), comparison.get("hiring_recommendation"),
+                json.dumps(comparison), explanation, prompt_version,
+                # With model tiering the model that produced the kept score is in the result
+                comparison.get("scoring_model") or model, created_at)
+
+    def save(self, jd_id, candidate_id, scorer, comparison, explanation=None, prompt_version="",
+             model="", jd_name=None, candidate_name=None):
+        """Insert or replace the screening of a candidate against a JD"""
+        self.save_many([{
+            "jd_id": jd_id, "candidate_id": candidate_id, "scorer": scorer,
+            "comparison": comparison, "explanation": explanation,
+            "prompt_version": prompt_version, "model": model,
+            "jd_name": jd_name, "candidate_name": candidate_name
+        }])
+
+    def save_many(self, screenings):
+        """Insert or replace many screenings (dicts with save()'s arguments) in one transaction"""
+        now = time.time()
+        rows = [self._row(s["jd_id"], s["candidate_id"], s["scorer"], s["comparison"],
+                          s.get("explanation"), s.get("prompt_version", ""), s.get("model", ""),
+                          s.get("jd_name"), s.get("candidate_name"), now)
+                for s in screenings]
+        with self._lock:
+            self._conn.executemany("""
+                INSERT INTO screenings (jd_id, candidate_id, scorer, jd_name, candidate_name,
+                                        overall_score, hiring_recommendation, comparison,
+                                        explanation, prompt_version, model, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (jd_id, candidate_id, scorer) DO UPDATE SET
+                    jd_name = COALESCE(excluded.jd_name, jd_name),
+                    candidate_name = COALESCE(excluded.candidate_name, candidate_name),
+                    overall_score = excluded.overall_score,
+                    hiring_recommendation = excluded.hiring_recommendation,
+                    comparison = excluded.comparison,
+                    explanation = excluded.explanation,
+                    prompt_version = excluded.prompt_version,
+                    model = excluded.model,
+                    created_at = excluded.created_at""", rows)
+            self._conn.commit()
+        return len(rows)
+
+    def set_explanation(self, jd_id, candidate_id, scorer, explanation):
+        """Attach an explanation generated after the screening was saved"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE screenings SET explanation = ? WHERE jd_id = ? AND candidate_id = ? AND scorer = ?",
+                (explanation, jd_id, candidate_id, scorer))
+            self._conn.commit()
+        return cursor.rowcount > 0
+
+    def get(self, jd_id, candidate_id, scorer, prompt_version=None):
+        """Return the stored screening, or None if absent or made with another prompt version"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM screenings WHERE jd_id = ? AND candidate_id = ? AND scorer = ?",
+                (jd_id, candidate_id, scorer)).fetchone()
+        if row is None or (prompt_version is not None and row["prompt_version"] != prompt_version):
+            return None
+        result = dict(row)
+        result["comparison"] = json.loads(result["comparison"])
+        return result
+
+    def _filters(self, jd_id, min_score, scorer):
+        clauses, params = ["jd_id = ?"], [jd_id]
+        if min_score is not None:
+            clauses.append("overall_score >= ?")
+            params.append(min_score)
+        if scorer is not None:
+            clauses.append("scorer = ?")
+            params.append(scorer)
+        return " AND ".join(clauses), params
+
+    def leaderboard(self, jd_id, limit=25, offset=0, min_score=None, scorer=None, order="score"):
+        """One page of a JD's screenings, best score (or most recent) first"""
+        where, params = self._filters(jd_id, min_score, scorer)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(LEADERBOARD_COLUMNS)} FROM screenings WHERE {where} "
+                f"ORDER BY {ORDERS[order]} LIMIT ? OFFSET ?", params + [limit, offset]).fetchall()
+        return [dict(row) for row in rows]
+
+    def count(self, jd_id, min_score=None, scorer=None):
+        """Number of screenings leaderboard() pages through with the same filters"""
+        where, params = self._filters(jd_id, min_score, scorer)
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM screenings WHERE {where}", params).fetchone()[0]
+
+    def candidate_history(self, candidate_id):
+        """Every JD a candidate was screened against, most recent first"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT jd_id, jd_name, scorer, overall_score, created_at FROM screenings "
+                "WHERE candidate_id = ? ORDER BY created_at DESC", (candidate_id,)).fetchall()
+        return [dict(row) for row in rows]
+
+    def jobs(self):
+        """JDs with stored screenings: ID, name, screening count and last screening time"""
+        with self._lock:
+            # Grouping reads only the (jd_id, created_at) index; names are looked up per JD
+            rows = self._conn.execute("""
+                SELECT jd_id, COUNT(*) AS screenings, MAX(created_at) AS last_screened,
+                       (SELECT jd_name FROM screenings AS named
+                        WHERE named.jd_id = grouped.jd_id AND jd_name IS NOT NULL LIMIT 1) AS jd_name
+                FROM screenings AS grouped GROUP BY jd_id ORDER BY last_screened DESC""").fetchall()
+        return [dict(row) for row in rows]
+
+    def stats(self):
+        """Stored screening and JD counts"""
+        with self._lock:
+            screenings, jds = self._conn.execute(
+                "SELECT COUNT(*), COUNT(DISTINCT jd_id) FROM screenings").fetchone()
+        return {"path": self.path, "screenings": screenings, "jobs": jds}
+
+
+def records_to_screenings(records, jd_id, scorer, prompt_version, model, jd_name=None):
+    """Store rows for the successful records of a batch or bulk run"""
+    screenings = []
+    for record in records:
+        if record.get("error") or not record.get("resume_sha256"):
+            continue
+        comparison = {key: value for key, value in record.items()
+                      if key not in ("resume_path", "resume_sha256", "resume_skills", "explanation",
+                                     "usage", "extraction_stats", "candidate_id", "jd_id")}
+        screenings.append({
+            "jd_id": jd_id, "candidate_id": record["resume_sha256"], "scorer": scorer,
+            "comparison": comparison, "explanation": record.get("explanation"),
+            "prompt_version": prompt_version, "model": model, "jd_name": jd_name,
+            "candidate_name": os.path.basename(record["resume_path"])
+        })
+    return screenings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Browse stored screening results without API calls')
+    parser.add_argument('--store', default=RESULT_STORE_PATH, help='Result database path')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    subparsers.add_parser('jobs', help='List JDs with stored screenings')
+
+    top_parser = subparsers.add_parser('top', help='Leaderboard for one JD')
+    top_parser.add_argument('jd_id', help='JD ID (SHA-256 of the JD file) or a unique prefix of it')
+    top_parser.add_argument('-n', '--limit', type=int, default=25)
+    top_parser.add_argument('--offset', type=int, default=0)
+    top_parser.add_argument('--min-score', type=float)
+    top_parser.add_argument('--scorer', choices=['llm', 'fused', 'local'])
+    top_parser.add_argument('--order', choices=sorted(ORDERS), default='score')
+
+    args = parser.parse_args(argv)
+    store = ResultStore(args.store)
+
+    if args.command == 'jobs':
+        for job in store.jobs():
+            print(f"{job['jd_id'][:16]}  {job['screenings']:>6} screenings  "
+                  f"last {time.strftime('%Y-%m-%d %H:%M', time.localtime(job['last_screened']))}  "
+                  f"{job['jd_name'] or ''}")
+        return 0
+
+    matches = [job['jd_id'] for job in store.jobs() if job['jd_id'].startswith(args.jd_id)]
+    if len(matches) != 1:
+        print(f"{'No' if not matches else 'Ambiguous'} JD matching {args.jd_id}", file=sys.stderr)
+        return 1
+    started = time.perf_counter()
+    rows = store.leaderboard(matches[0], args.limit, args.offset, args.min_score, args.scorer, args.order)
+    total = store.count(matches[0], args.min_score, args.scorer)
+    elapsed = (time.perf_counter() - started) * 1000
+    for rank, row in enumerate(rows, args.offset + 1):
+        print(f"{rank:>5}. {row['overall_score']:5.1f}%  {row['candidate_name'] or row['candidate_id'][:16]}"
+              f"  [{row['scorer']}, {row['prompt_version']}]")
+    print(f"\n{len(rows)} of {total} screenings in {elapsed:.1f} ms", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,208 @@
+import re
+
+import numpy as np
+
+# Cosine similarity at or above which two skill phrases count as the same requirement
+SKILL_MATCH_THRESHOLD = 0.85
+# Similarity at or above which two degree fields count as related
+RELATED_FIELD_THRESHOLD = 0.80
+
+
+def _degree_abbreviation(letter):
+    # Tech/Sc forms and dotted forms ("M.S.") always count; a bare "MS"/"BE" only with degree
+    # context after it ("MS in ...", "MS, ...", "MS (...)", "MS degree"), so "MS Office" does not
+    return (rf"\b{letter}\.?\s?(?:Tech|Sc)\b|\b{letter}\.\s?[SEA]\b"
+            rf"|\b{letter}[SEA]\b(?=\s+(?:in|of|degree)\b|\s*(?:[,(]|$))")
+
+
+# Degree words match in any case; abbreviations are case-sensitive so "be"/"ms" in prose don't count.
+# "Master" and "Associate" need degree context, so "Scrum Master" and AWS "Associate" certs don't count
+DEGREE_LEVELS = [
+    (4, re.compile(r"(?i:doctor)|\bPh\.?\s?D\b")),
+    (3, re.compile(rf"(?i:\bmaster['’]?s\b|\bmaster (?:of|in)\b)|{_degree_abbreviation('M')}|\bMBA\b")),
+    (2, re.compile(rf"(?i:bachelor|undergraduate)|{_degree_abbreviation('B')}")),
+    (1, re.compile(r"(?i:diploma|\bassociate['’]?s? degree\b|\bassociate (?:of|in)\b)")),
+]
+YEARS_PATTERN = re.compile(r"(\d+(?:\.\d+)?)\s*\+?\s*(?:years?|yrs?)", re.IGNORECASE)
+
+TIER_RECOMMENDATIONS = [
+    (90, "Gold Tier Candidate - Ideal Hire",
+     ["Schedule final interview with tech lead", "Request reference checks", "Prepare offer letter"]),
+    (75, "Silver Tier Candidate - Strong Match",
+     ["Schedule final interview with tech lead", "Request reference checks", "Prepare offer letter"]),
+    (50, "Bronze Tier Candidate - Potential Fit",
+     ["Conduct technical screening", "Review portfolio projects", "Schedule team interview"]),
+    (0, "Not Recommended - Significant Gaps",
+     ["Consider alternative candidates", "Provide constructive feedback",
+      "Encourage re-application after upskilling"]),
+]
+
+
+def cosine_similarity_matrix(a, b):
+    """Pairwise cosine similarity between the rows of a and the rows of b"""
+    a = np.asarray(a, dtype=np.float32)
+    b = np.asarray(b, dtype=np.float32)
+    a = a / np.maximum(np.linalg.norm(a, axis=1, keepdims=True), 1e-12)
+    b = b / np.maximum(np.linalg.norm(b, axis=1, keepdims=True), 1e-12)
+    return a @ b.T
+
+
+def embed_phrases(phrases, embeddings):
+    """Embed each distinct phrase once, returning {phrase: vector}"""
+    unique = sorted({p for p in phrases if p})
+    if not unique:
+        return {}
+    return dict(zip(unique, embeddings.embed_documents(unique)))
+
+
+def match_requirements(resume_items, jd_items, vectors, threshold=SKILL_MATCH_THRESHOLD):
+    """Match every JD item to its most similar resume item
+
+    Returns a list of (jd_item, best_resume_item, similarity, matched) tuples in JD order.
+    """
+    if not jd_items:
+        return []
+    if not resume_items:
+        return [(item, None, 0.0, False) for item in jd_items]
+
+    similarity = cosine_similarity_matrix(
+        [vectors[item] for item in jd_items],
+        [vectors[item] for item in resume_items]
+    )
+    # Identical phrases always match, whatever the embedding model says
+    resume_keys = [item.strip().lower() for item in resume_items]
+    for i, item in enumerate(jd_items):
+        if item.strip().lower() in resume_keys:
+            similarity[i, resume_keys.index(item.strip().lower())] = 1.0
+
+    best = similarity.argmax(axis=1)
+    return [
+        (item, resume_items[j], float(similarity[i, j]), bool(similarity[i, j] >= threshold))
+        for i, (item, j) in enumerate(zip(jd_items, best))
+    ]
+
+
+def degree_level(qualifications):
+    """Highest degree level mentioned (4=PhD, 3=Master's, 2=Bachelor's, 1=Diploma, 0=none)"""
+    level = 0
+    for qualification in qualifications:
+        for value, pattern in DEGREE_LEVELS:
+            if value > level and pattern.search(qualification):
+                level = value
+    return level
+
+
+def years_of_experience(items):
+    """Largest 'N years' figure mentioned, or None when no figure is given"""
+    years = [float(m.group(1)) for item in items for m in YEARS_PATTERN.finditer(item)]
+    return max(years) if years else None
+
+
+def profile_years(profile):
+    """Years of experience from the extracted years_of_experience field
+
+    Profiles extracted before the field existed, or where it came back null, fall back to
+    any 'N years' figure in their qualifications and technical skills.
+    """
+    value = profile.get('years_of_experience')
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    if isinstance(value, str):
+        match = re.search(r"\d+(?:\.\d+)?", value)
+        if match:
+            return float(match.group(0))
+    return years_of_experience(list(profile.get('qualifications') or [])
+                               + list(profile.get('technical_skills') or []))
+
+
+def tier_for_score(score):
+    """Recommendation text and next steps for the 90/75/50 score tiers used by the app"""
+    for threshold, recommendation, next_steps in TIER_RECOMMENDATIONS:
+        if score >= threshold:
+            return recommendation, list(next_steps)
+    return TIER_RECOMMENDATIONS[-1][1], list(TIER_RECOMMENDATIONS[-1][2])
+
+
+def score_locally(resume_data, jd_data, embeddings, threshold=SKILL_MATCH_THRESHOLD):
+    """Apply the compare_skills rubric deterministically, returning the same result schema"""
+    resume_skills = list(resume_data.get('technical_skills') or [])
+    jd_skills = list(jd_data.get('technical_skills') or [])
+    resume_quals = list(resume_data.get('qualifications') or [])
+    jd_quals = list(jd_data.get('qualifications') or [])
+    resume_certs = list(resume_data.get('certifications') or [])
+    jd_certs = list(jd_data.get('certifications') or [])
+
+    vectors = embed_phrases(
+        resume_skills + jd_skills + resume_quals + jd_quals + resume_certs + jd_certs, embeddings)
+
+    certifications_required = bool(jd_certs)
+    technical_weight = 50 if certifications_required else 60
+    qualifications_weight = 30 if certifications_required else 40
+
+    # 1. Technical skills: coverage ratio times weight, full weight when nothing is required
+    skill_matches = match_requirements(resume_skills, jd_skills, vectors, threshold)
+    matched_skills = [m for m in skill_matches if m[3]]
+    coverage = len(matched_skills) / len(jd_skills) if jd_skills else 1.0
+    technical_score = coverage * technical_weight
+
+    # 2. Qualifications: 20 for degree level and 10 for field relevance, rescaled to the weight
+    required_level = degree_level(jd_quals)
+    candidate_level = degree_level(resume_quals)
+    if required_level and not candidate_level:
+        level_points, field_points = 0, 0
+    else:
+        gap = required_level - candidate_level
+        level_points = 20 if gap <= 0 else 10 if gap == 1 else 0
+        if not jd_quals:
+            field_points = 10
+        else:
+            qual_matches = match_requirements(resume_quals, jd_quals, vectors, threshold)
+            best_field = max(m[2] for m in qual_matches)
+            field_points = 10 if best_field >= threshold else 5 if best_field >= RELATED_FIELD_THRESHOLD else 0
+    qualifications_score = (level_points + field_points) / 30 * qualifications_weight
+
+    # 3. Certifications: 15 for required coverage plus 5 for any additional certs
+    cert_matches = match_requirements(resume_certs, jd_certs, vectors, threshold)
+    certifications_score = 0.0
+    if certifications_required:
+        matched_certs = {m[1] for m in cert_matches if m[3]}
+        certifications_score = 15 * sum(m[3] for m in cert_matches) / len(jd_certs)
+        if any(cert not in matched_certs for cert in resume_certs):
+            certifications_score += 5
+
+    # 4. Experience: +2 per year over the JD minimum, capped at 10
+    required_years = profile_years(jd_data)
+    candidate_years = profile_years(resume_data)
+    bonuses = 0.0
+    if required_years is not None and candidate_years is not None:
+        bonuses = min(max(candidate_years - required_years, 0) * 2, 10)
+
+    score_breakdown = {
+        'technical_skills': round(technical_score, 1),
+        'qualifications': round(qualifications_score, 1),
+        'certifications': round(certifications_score, 1),
+        'bonuses': round(bonuses, 1)
+    }
+    overall_score = round(min(max(sum(score_breakdown.values()), 0), 100), 1)
+
+    all_matches = skill_matches + cert_matches
+    matched = [f"{jd} (matched by '{resume}', similarity {sim:.2f})"
+               for jd, resume, sim, ok in all_matches if ok]
+    missing = [jd for jd, _, _, ok in all_matches if not ok]
+    if required_level > candidate_level:
+        missing.append(f"Degree level: JD requires {', '.join(jd_quals)}")
+
+    hiring_recommendation, next_steps = tier_for_score(overall_score)
+    strongest = sorted((m for m in all_matches if m[3]), key=lambda m: m[2], reverse=True)
+    return {
+        "certifications_required": certifications_required,
+        "overall_score": overall_score,
+        "score_breakdown": score_breakdown,
+        "missing_requirements": missing,
+        "matched_requirements": matched,
+        "strength_analysis": [f"Matches '{jd}'" for jd, _, _, _ in strongest[:3]],
+        "improvement_areas": [f"Gap in '{item}'" for item in missing[:3]],
+        "hiring_recommendation": hiring_recommendation,
+        "next_steps": next_steps,
+        "scoring_method": "local"
+    }
@@ -0,0 +1,103 @@
+import re
+
+from tokens import count_tokens, truncate_to_tokens
+
+# Canonical section -> heading keywords seen in resumes and job descriptions
+SECTION_HEADINGS = {
+    "skills": ["skills", "technical skills", "core competencies", "competencies", "technologies",
+               "tech stack", "tools", "expertise", "requirements", "must have", "must-have",
+               "nice to have", "preferred qualifications", "what you bring", "what we're looking for"],
+    "certifications": ["certifications", "certificates", "licenses", "licenses & certifications",
+                       "courses", "training"],
+    "education": ["education", "academic background", "qualifications", "academics",
+                  "educational qualifications", "minimum qualifications", "basic qualifications"],
+    "projects": ["projects", "personal projects", "academic projects", "key projects",
+                 "open source", "hackathons", "achievements", "awards", "publications", "research"],
+    "experience": ["experience", "work experience", "professional experience", "employment",
+                   "employment history", "work history", "internships", "responsibilities",
+                   "what you'll do", "role", "about the role"],
+    "summary": ["summary", "profile", "objective", "about me", "professional summary", "about us",
+                "overview"],
+    "boilerplate": ["benefits", "perks", "what we offer", "equal opportunity employer",
+                    "eeo statement", "how to apply", "references", "hobbies", "interests",
+                    "declaration", "personal details"],
+}
+# Sections that never carry skills, qualifications or certifications
+EXCLUDED_SECTIONS = {"boilerplate"}
+# Sections the extraction prompt asks about come first when the budget is tight
+SECTION_PRIORITY = ["skills", "certifications", "education", "projects", "experience",
+                    "header", "summary", "other"]
+
+_HEADING_LOOKUP = {
+    keyword: section for section, keywords in SECTION_HEADINGS.items() for keyword in keywords
+}
+_HEADING_CLEAN = re.compile(r"^[\s#*•\-–—|:]+|[\s#*•\-–—|:]+$")
+
+
+def classify_heading(line):
+    """Return the canonical section a heading line introduces, or None for body text"""
+    stripped = line.strip()
+    if not stripped or len(stripped) > 50:
+        return None
+    key = _HEADING_CLEAN.sub("", stripped).lower()
+    key = re.sub(r"\s+", " ", key)
+    if key in _HEADING_LOOKUP:
+        return _HEADING_LOOKUP[key]
+    # Unknown short all-caps lines ("VOLUNTEERING") still start a new section
+    if stripped.isupper() and len(key.split()) <= 4 and re.search(r"[A-Z]{3}", stripped):
+        return "other"
+    return None
+
+
+def segment_sections(text):
+    """Split document text into [(section, text)] in document order
+
+    Text before the first recognised heading is returned as the 'header' section
+    (name, contact details). Headings are kept with their section.
+    """
+    sections = []
+    current, lines = "header", []
+    for line in text.splitlines():
+        section = classify_heading(line)
+        if section:
+            if any(l.strip() for l in lines):
+                sections.append((current, "\n".join(lines).strip()))
+            current, lines = section, [line]
+        else:
+            lines.append(line)
+    if any(l.strip() for l in lines):
+        sections.append((current, "\n".join(lines).strip()))
+    return sections
+
+
+def build_prompt_payload(text, token_budget, priority=SECTION_PRIORITY, model="gpt-4o"):
+    """Assemble the document text to send to the LLM within token_budget
+
+    Boilerplate sections are dropped. The rest are admitted in priority order, each whole if
+    it fits or cut to the remaining budget otherwise, and emitted in their document order.
+    """
+    sections = [s for s in segment_sections(text) if s[0] not in EXCLUDED_SECTIONS]
+    if not sections:
+        return ""
+    if len(sections) == 1:
+        return truncate_to_tokens(sections[0][1], token_budget, model)
+    if sum(count_tokens(section_text, model) + 1 for _, section_text in sections) <= token_budget:
+        return "\n\n".join(section_text for _, section_text in sections)
+
+    rank = {name: i for i, name in enumerate(priority)}
+    order = sorted(range(len(sections)), key=lambda i: (rank.get(sections[i][0], len(rank)), i))
+
+    remaining = token_budget
+    kept = {}
+    for i in order:
+        if remaining <= 0:
+            break
+        section_text = sections[i][1]
+        cost = count_tokens(section_text, model) + 1
+        if cost <= remaining:
+            kept[i] = section_text
+            remaining -= cost
+        else:
+            kept[i] = truncate_to_tokens(section_text, remaining - 1, model)
+            remaining = 0
+    return "\n\n".join(kept[i] for i in sorted(kept) if kept[i])
@@ -0,0 +1,356 @@
+import argparse
+import asyncio
+import hashlib
+import io
+import json
+import os
+import sys
+import time
+
+import openai
+from aiohttp import web
+
+import metrics
+from logic import (EXTRACTION_CHAR_BUDGET, acompare_and_explain, acompare_skills,
+                   aextract_skills_with_openai, agenerate_score_explanation, compare_skills_local,
+                   extract_text_from_docx, extract_text_from_pdf, extraction_cache_key,
+                   find_near_duplicate_screening, get_result_store, get_skill_vector_store,
+                   scoring_version)
+
+SERVER_HOST = os.environ.get("SERVER_HOST", "127.0.0.1")
+SERVER_PORT = int(os.environ.get("SERVER_PORT", "8000"))
+# LLM calls in flight across all requests; further calls queue for a slot
+SERVER_CONCURRENCY = int(os.environ.get("SERVER_CONCURRENCY", "16"))
+SERVER_MAX_UPLOAD_MB = float(os.environ.get("SERVER_MAX_UPLOAD_MB", "20"))
+SCORERS = ("llm", "fused", "local")
+
+
+class Coalescer:
+    """Share one running call among every request that asks for the same thing
+
+    The first caller starts the call as a task and later callers with the same key await
+    that task instead of sending their own upstream request, so 30 applicants screened
+    against one JD at once cost one JD extraction. Keys are dropped when the call ends;
+    afterwards the extraction cache and the result store serve repeats.
+    """
+
+    def __init__(self):
+        self._tasks = {}
+
+    def in_flight(self):
+        return len(self._tasks)
+
+    async def run(self, kind, key, factory):
+        task = self._tasks.get((kind, key))
+        if task is None:
+            # The task copies this request's context, so its usage is billed to this request
+            task = asyncio.ensure_future(factory())
+            self._tasks[(kind, key)] = task
+            task.add_done_callback(lambda done: self._forget(kind, key, done))
+        else:
+            metrics.count_event(f"coalesced_{kind}")
+        # A waiter that disconnects must not cancel the call the others are waiting on
+        return await asyncio.shield(task)
+
+    def _forget(self, kind, key, task):
+        self._tasks.pop((kind, key), None)
+        if not task.cancelled():
+            # Marks the exception as retrieved when every waiter has gone away
+            task.exception()
+
+
+def _digest(*values):
+    return hashlib.sha256(json.dumps(values, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def document_text(data, file_name):
+    """Text of an uploaded PDF/DOCX, cut at the extraction character budget"""
+    if file_name.lower().endswith('.pdf'):
+        return extract_text_from_pdf(data, max_chars=EXTRACTION_CHAR_BUDGET)
+    if file_name.lower().endswith('.docx'):
+        return extract_text_from_docx(io.BytesIO(data), max_chars=EXTRACTION_CHAR_BUDGET)
+    raise ValueError(f"Unsupported file format: {file_name}")
+
+
+class ScreeningService:
+    """The pipeline stages behind the HTTP routes, with bounded and coalesced LLM calls"""
+
+    def __init__(self, concurrency=SERVER_CONCURRENCY):
+        self.concurrency = concurrency
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.coalescer = Coalescer()
+        self.started_at = time.time()
+        self.active_requests = 0
+        # (route, status) -> [requests, seconds]
+        self.requests = {}
+
+    async def extract(self, text):
+        return await self.coalescer.run(
+            "extract", extraction_cache_key(text),
+            lambda: aextract_skills_with_openai(text, semaphore=self.semaphore))
+
+    async def compare(self, resume_skills, jd_requirements, scorer="llm"):
+        """(comparison, explanation); the explanation is None unless scorer is 'fused'"""
+        async def score():
+            if scorer == "local":
+                return await asyncio.to_thread(compare_skills_local, resume_skills, jd_requirements), None
+            if scorer == "fused":
+                return await acompare_and_explain(resume_skills, jd_requirements, semaphore=self.semaphore)
+            return await acompare_skills(resume_skills, jd_requirements, semaphore=self.semaphore), None
+
+        return await self.coalescer.run("compare", _digest(scorer, resume_skills, jd_requirements), score)
+
+    async def explain(self, resume_skills, jd_requirements, comparison):
+        return await self.coalescer.run(
+            "explain", _digest(resume_skills, jd_requirements, comparison),
+            lambda: agenerate_score_explanation(resume_skills, jd_requirements, comparison,
+                                                semaphore=self.semaphore))
+
+    async def screen(self, resume, jd, scorer="llm", explain=True):
+        """Full screening of two documents, each a dict with 'text', 'id' and 'name'
+
+        Stored screenings with the current prompt version are reused, and new ones are
+        saved, under the same IDs the app and batch mode use for uploaded files.
+        """
+        with metrics.track("screening") as usage:
+            result = {"jd_id": jd["id"], "candidate_id": resume["id"], "resume_skills": None,
+                      "jd_requirements": None, "comparison": None, "explanation": None}
+            await self._screen(result, resume, jd, scorer, explain)
+        result["usage"] = usage.summary()
+        return result
+
+    async def _screen(self, result, resume, jd, scorer, explain):
+        resume_skills, jd_requirements = await asyncio.gather(self.extract(resume["text"]),
+                                                              self.extract(jd["text"]))
+        result.update(resume_skills=resume_skills, jd_requirements=jd_requirements)
+        for data in (resume_skills, jd_requirements):
+            if 'error' in data:
+                result["error"] = data["error"]
+                return
+
+        prompt_version, model = scoring_version(scorer)
+        store = get_result_store()
+        stored = await asyncio.to_thread(store.get, jd["id"], resume["id"], scorer, prompt_version)
+        if stored is None:
+            stored = await asyncio.to_thread(find_near_duplicate_screening, store, jd["id"], resume["id"],
+                                             resume["text"], scorer, prompt_version, resume["name"])
+        if stored is not None:
+            comparison, explanation = stored["comparison"], stored["explanation"]
+            result["stored_at"] = stored["created_at"]
+        else:
+            comparison, explanation = await self.compare(resume_skills, jd_requirements, scorer)
+        result["comparison"] = comparison
+        if 'error' in comparison:
+            result["error"] = comparison["error"]
+            return
+        if explain and explanation is None:
+            explanation = await self.explain(resume_skills, jd_requirements, comparison)
+        result["explanation"] = explanation
+        if stored is None:
+            await asyncio.to_thread(store.save, jd["id"], resume["id"], scorer, comparison, explanation,
+                                    prompt_version, model, jd_name=jd["name"],
+                                    candidate_name=resume["name"])
+        elif explanation != stored["explanation"]:
+            await asyncio.to_thread(store.set_explanation, jd["id"], resume["id"], scorer, explanation)
+
+    def health(self):
+        return {
+            "status": "ok",
+            "uptime_seconds": round(time.time() - self.started_at, 1),
+            "active_requests": self.active_requests,
+            "coalescing_calls": self.coalescer.in_flight(),
+            "llm_concurrency": self.concurrency
+        }
+
+    def prometheus_text(self, prefix="screening"):
+        """Pipeline totals from metrics.prometheus_text plus the HTTP request counters"""
+        lines = [metrics.prometheus_text(prefix=prefix).rstrip("\n")]
+        lines.append(f"# HELP {prefix}_http_requests_total HTTP requests served, by route and status")
+        lines.append(f"# TYPE {prefix}_http_requests_total counter")
+        for (route, status), (count, _) in sorted(self.requests.items()):
+            lines.append(f'{prefix}_http_requests_total{{route="{route}",status="{status}"}} {count}')
+        lines.append(f"# HELP {prefix}_http_request_seconds_total Time spent serving HTTP requests")
+        lines.append(f"# TYPE {prefix}_http_request_seconds_total counter")
+        for (route, status), (_, seconds) in sorted(self.requests.items()):
+            lines.append(f'{prefix}_http_request_seconds_total{{route="{route}",status="{status}"}} '
+                         f'{round(seconds, 6)}')
+        for name, help_text, value in [
+                ("http_active_requests", "Requests being served", self.active_requests),
+                ("coalescing_calls", "Upstream calls that identical requests can currently join",
+                 self.coalescer.in_flight())]:
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} gauge")
+            lines.append(f"{prefix}_{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+SERVICE = web.AppKey("service", ScreeningService)
+
+
+def _error(status, message, **extra):
+    return web.json_response({"error": message, **extra}, status=status)
+
+
+@web.middleware
+async def observe(request, handler):
+    """Count requests per route and status, and turn bad input and API failures into JSON errors"""
+    service = request.app[SERVICE]
+    resource = request.match_info.route.resource
+    route = resource.canonical if resource is not None else "unmatched"
+    service.active_requests += 1
+    started = time.perf_counter()
+    status = 500
+    try:
+        try:
+            response = await handler(request)
+        except web.HTTPException as e:
+            response = e
+        except ValueError as e:
+            response = _error(400, f"Bad request: {e}")
+        except openai.APIError as e:
+            response = _error(502, f"Upstream API error: {e}")
+        status = response.status
+        if isinstance(response, web.HTTPException):
+            raise response
+        return response
+    finally:
+        service.active_requests -= 1
+        counts = service.requests.setdefault((route, status), [0, 0.0])
+        counts[0] += 1
+        counts[1] += time.perf_counter() - started
+
+
+async def read_body(request):
+    """Fields of a JSON or multipart/form-data request body"""
+    if request.content_type == "multipart/form-data":
+        return dict(await request.post())
+    try:
+        body = await request.json()
+    except json.JSONDecodeError as e:
+        raise ValueError(f"invalid JSON ({e})")
+    if not isinstance(body, dict):
+        raise ValueError("expected a JSON object")
+    return body
+
+
+async def read_document(body, name):
+    """The uploaded file `name`, or the plain text in `{name}_text`, as text plus its store ID"""
+    upload = body.get(name)
+    if isinstance(upload, web.FileField):
+        data = upload.file.read()
+        text = await asyncio.to_thread(document_text, data, upload.filename)
+        document = {"text": text, "id": hashlib.sha256(data).hexdigest(), "name": upload.filename}
+    elif isinstance(body.get(f"{name}_text"), str):
+        text = body[f"{name}_text"]
+        document = {"text": text, "id": hashlib.sha256(text.encode("utf-8")).hexdigest(),
+                    "name": body.get(f"{name}_name")}
+    else:
+        raise ValueError(f"upload a '{name}' file or send '{name}_text'")
+    if not document["text"].strip():
+        raise ValueError(f"no text found in {name}")
+    return document
+
+
+def _required(body, *names):
+    missing = [name for name in names if not isinstance(body.get(name), dict)]
+    if missing:
+        raise ValueError(f"expected JSON objects in {', '.join(missing)}")
+    return [body[name] for name in names]
+
+
+def _flag(value, default):
+    if value is None:
+        return default
+    if isinstance(value, str):
+        return value.lower() in ("1", "true", "yes", "on")
+    return bool(value)
+
+
+def _scorer(body):
+    scorer = body.get("scorer", "llm")
+    if scorer not in SCORERS:
+        raise ValueError(f"scorer must be one of {', '.join(SCORERS)}")
+    return scorer
+
+
+async def handle_extract(request):
+    """POST /extract: skills of one document ('file' upload or 'text')"""
+    body = await read_body(request)
+    if "file" in body:
+        body = {"document": body["file"]}
+    elif "text" in body:
+        body = {"document_text": body["text"]}
+    document = await read_document(body, "document")
+    skills = await request.app[SERVICE].extract(document["text"])
+    return web.json_response(skills, status=502 if 'error' in skills else 200)
+
+
+async def handle_compare(request):
+    """POST /compare: score extracted 'resume' skills against extracted 'jd' requirements"""
+    body = await read_body(request)
+    resume_skills, jd_requirements = _required(body, "resume", "jd")
+    comparison, explanation = await request.app[SERVICE].compare(resume_skills, jd_requirements, _scorer(body))
+    result = {"comparison": comparison, "explanation": explanation}
+    return web.json_response(result, status=502 if 'error' in comparison else 200)
+
+
+async def handle_explain(request):
+    """POST /explain: markdown assessment of a 'comparison' of 'resume' and 'jd'"""
+    body = await read_body(request)
+    explanation = await request.app[SERVICE].explain(*_required(body, "resume", "jd", "comparison"))
+    return web.json_response({"explanation": explanation})
+
+
+async def handle_screen(request):
+    """POST /screen: full pipeline for a 'resume' and a 'jd' (file uploads or *_text fields)"""
+    body = await read_body(request)
+    resume, jd = await asyncio.gather(read_document(body, "resume"), read_document(body, "jd"))
+    result = await request.app[SERVICE].screen(resume, jd, _scorer(body), _flag(body.get("explain"), True))
+    return web.json_response(result, status=502 if 'error' in result else 200)
+
+
+async def handle_health(request):
+    return web.json_response(request.app[SERVICE].health())
+
+
+async def handle_metrics(request):
+    return web.Response(text=request.app[SERVICE].prometheus_text(),
+                        content_type="text/plain", charset="utf-8")
+
+
+async def _load_resources(app):
+    # Load the skill index before serving, so the first requests don't all wait on it
+    await asyncio.to_thread(get_skill_vector_store)
+
+
+def create_app(concurrency=SERVER_CONCURRENCY):
+    app = web.Application(middlewares=[observe], client_max_size=int(SERVER_MAX_UPLOAD_MB * 2**20))
+    app[SERVICE] = ScreeningService(concurrency)
+    app.on_startup.append(_load_resources)
+    app.add_routes([
+        web.post("/extract", handle_extract),
+        web.post("/compare", handle_compare),
+        web.post("/explain", handle_explain),
+        web.post("/screen", handle_screen),
+        web.get("/health", handle_health),
+        web.get("/metrics", handle_metrics),
+    ])
+    return app
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='HTTP API for resume screening')
+    parser.add_argument('--host', default=SERVER_HOST)
+    parser.add_argument('--port', type=int, default=SERVER_PORT)
+    parser.add_argument('--concurrency', type=int, default=SERVER_CONCURRENCY,
+                        help='Maximum LLM calls in flight across all requests')
+    args = parser.parse_args(argv)
+
+    print(f"Serving on http://{args.host}:{args.port} with {args.concurrency} LLM calls in flight",
+          file=sys.stderr)
+    web.run_app(create_app(args.concurrency), host=args.host, port=args.port, print=None)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
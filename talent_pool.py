@@ -0,0 +1,192 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+
+from langchain_community.vectorstores import FAISS
+
+TALENT_POOL_DIR = os.environ.get("TALENT_POOL_DIR", ".talent_pool")
+METADATA_FILE = "candidates.json"
+
+
+def profile_text(profile):
+    """Flatten an extracted skills profile into the text that gets embedded"""
+    lines = []
+    for category in ['technical_skills', 'qualifications', 'certifications']:
+        items = profile.get(category) or []
+        if items:
+            lines.append(f"{category.replace('_', ' ').title()}: {', '.join(items)}")
+    return '\n'.join(lines)
+
+
+class TalentPool:
+    """Incrementally updatable FAISS index of candidate profiles with a JSON metadata sidecar"""
+
+    def __init__(self, embeddings, path=TALENT_POOL_DIR):
+        self.embeddings = embeddings
+        self.path = path
+        self.candidates = {}
+        self._store = None
+        self._lock = threading.RLock()
+
+        metadata_path = os.path.join(path, METADATA_FILE)
+        if os.path.exists(metadata_path):
+            with open(metadata_path, encoding='utf-8') as f:
+                self.candidates = json.load(f)
+            if self.candidates:
+                # The index is written by this class only, so the pickled docstore is trusted
+                self._store = FAISS.load_local(
+                    path, embeddings, allow_dangerous_deserialization=True, normalize_L2=True)
+
+    def __len__(self):
+        return len(self.candidates)
+
+    def __contains__(self, candidate_id):
+        return candidate_id in self.candidates
+
+    def upsert(self, candidate_id, profile, metadata=None):
+        """Add a candidate, or replace them if their profile changed; returns True if re-embedded"""
+        text = profile_text(profile)
+        profile_hash = hashlib.sha256(text.encode('utf-8')).hexdigest()
+        with self._lock:
+            existing = self.candidates.get(candidate_id)
+            if existing and existing['profile_hash'] == profile_hash:
+                existing['metadata'].update(metadata or {})
+                return False
+            if existing:
+                self._store.delete([candidate_id])
+
+            if self._store is None:
+                self._store = FAISS.from_texts(
+                    [text], self.embeddings, metadatas=[{'candidate_id': candidate_id}],
+                    ids=[candidate_id], normalize_L2=True)
+            else:
+                self._store.add_texts(
+                    [text], metadatas=[{'candidate_id': candidate_id}], ids=[candidate_id])
+            self.candidates[candidate_id] = {
+                'profile': profile,
+                'profile_hash': profile_hash,
+                'metadata': dict(metadata or {}),
+                'updated_at': time.time()
+            }
+            return True
+
+    def delete(self, candidate_id):
+        """Remove a candidate from the index; returns False if they were not present"""
+        with self._lock:
+            if candidate_id not in self.candidates:
+                return False
+            self._store.delete([candidate_id])
+            del self.candidates[candidate_id]
+            return True
+
+    def search(self, jd_profile, k=20):
+        """Return the top-k candidates for a JD profile as dicts, most similar first"""
+        with self._lock:
+            if not self.candidates:
+                return []
+            results = self._store.similarity_search_with_score(
+                profile_text(jd_profile), k=min(k, len(self.candidates)))
+        shortlist = []
+        for doc, distance in results:
+            candidate_id = doc.metadata['candidate_id']
+            shortlist.append({
+                'candidate_id': candidate_id,
+                # Vectors are unit length, so squared L2 distance maps directly to cosine
+                'similarity': round(1 - float(distance) / 2, 4),
+                'profile': self.candidates[candidate_id]['profile'],
+                'metadata': self.candidates[candidate_id]['metadata']
+            })
+        return shortlist
+
+    def save(self):
+        """Persist the index and sidecar atomically next to each other"""
+        with self._lock:
+            tmp_path = f"{self.path}.tmp-{os.getpid()}"
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            os.makedirs(tmp_path)
+            if self._store is not None and self.candidates:
+                self._store.save_local(tmp_path)
+            with open(os.path.join(tmp_path, METADATA_FILE), 'w', encoding='utf-8') as f:
+                json.dump(self.candidates, f)
+            old_path = f"{self.path}.old-{os.getpid()}"
+            if os.path.exists(self.path):
+                os.replace(self.path, old_path)
+            os.replace(tmp_path, self.path)
+            shutil.rmtree(old_path, ignore_errors=True)
+
+
+def main(argv=None):
+    from logic import (EXTRACTION_CHAR_BUDGET, extract_text_from_file, extract_skills_with_openai,
+                       compare_skills, get_embeddings)
+
+    parser = argparse.ArgumentParser(description='Talent pool index for instant candidate retrieval')
+    parser.add_argument('--pool', default=TALENT_POOL_DIR, help='Index directory')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    add_parser = subparsers.add_parser(
+        'add', help='Add or update resumes (ID = first 16 hex digits of the content hash)')
+    add_parser.add_argument('resumes', nargs='+', help='Resume files, directories or glob patterns')
+
+    delete_parser = subparsers.add_parser('delete', help='Remove candidates by ID')
+    delete_parser.add_argument('candidate_ids', nargs='+')
+
+    search_parser = subparsers.add_parser('search', help='Shortlist candidates for a JD')
+    search_parser.add_argument('job_description_path', help='Path to PDF/DOCX job description file')
+    search_parser.add_argument('-k', '--top-k', type=int, default=20)
+    search_parser.add_argument('--compare', action='store_true',
+                               help='Run compare_skills on the shortlist and rank by overall_score')
+
+    args = parser.parse_args(argv)
+    pool = TalentPool(get_embeddings(), path=args.pool)
+
+    if args.command == 'add':
+        from batch import collect_resume_paths, file_sha256
+        for path in collect_resume_paths(args.resumes):
+            # Content IDs keep same-named files in different folders apart
+            candidate_id = file_sha256(path)[:16]
+            profile = extract_skills_with_openai(
+                extract_text_from_file(path, max_chars=EXTRACTION_CHAR_BUDGET))
+            if 'error' in profile:
+                print(f"Skipping {path}: {profile['error']}")
+                continue
+            changed = pool.upsert(candidate_id, profile, {'resume_path': path})
+            # An edited resume gets a new ID; drop the entry for its previous version
+            for stale_id in [cid for cid, candidate in pool.candidates.items()
+                             if candidate['metadata'].get('resume_path') == path and cid != candidate_id]:
+                pool.delete(stale_id)
+            print(f"{'Indexed' if changed else 'Unchanged'}: {candidate_id} ({path})")
+        pool.save()
+    elif args.command == 'delete':
+        for candidate_id in args.candidate_ids:
+            print(f"{'Deleted' if pool.delete(candidate_id) else 'Not found'}: {candidate_id}")
+        pool.save()
+    else:
+        jd_requirements = extract_skills_with_openai(
+            extract_text_from_file(args.job_description_path, max_chars=EXTRACTION_CHAR_BUDGET))
+        if 'error' in jd_requirements:
+            raise ValueError(f"Job description extraction failed: {jd_requirements['error']}")
+
+        started = time.perf_counter()
+        shortlist = pool.search(jd_requirements, k=args.top_k)
+        print(f"Retrieved {len(shortlist)} of {len(pool)} candidates in "
+              f"{(time.perf_counter() - started) * 1000:.1f} ms\n")
+
+        if args.compare:
+            for candidate in shortlist:
+                candidate['comparison'] = compare_skills(candidate['profile'], jd_requirements)
+            shortlist.sort(key=lambda c: c['comparison']['overall_score'], reverse=True)
+
+        for rank, candidate in enumerate(shortlist, 1):
+            line = (f"{rank:>3}. {candidate['candidate_id']}  {candidate['metadata'].get('resume_path', '')}"
+                    f"  similarity {candidate['similarity']:.3f}")
+            if 'comparison' in candidate:
+                line += f"  score {candidate['comparison']['overall_score']:.1f}%"
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
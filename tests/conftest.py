@@ -0,0 +1,106 @@
+"""Shared fixtures: the mock OpenAI server and throwaway caches and stores"""
+import json
+import os
+import sys
+
+import pytest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(TESTS_DIR))
+sys.path.append(os.path.join(os.path.dirname(TESTS_DIR), "benchmarks"))
+
+import logic  # noqa: E402
+from cache import ResultCache  # noqa: E402
+from mock_openai import MockOpenAI  # noqa: E402
+from result_store import ResultStore  # noqa: E402
+
+
+class BatchMock(MockOpenAI):
+    """Mock server whose batches fail chosen requests and stay in progress for a few polls"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        # custom_id -> how many batches fail it (None: every one)
+        self.fail = {}
+        self.polls_before_done = 0
+        self._polls = {}
+
+    def run_batch(self, batch_id):
+        polls = self._polls.get(batch_id, 0)
+        if polls < self.polls_before_done:
+            self._polls[batch_id] = polls + 1
+            return
+        super().run_batch(batch_id)
+        batch = self.batches[batch_id]
+        failed = [line for line in self.file_lines(batch["output_file_id"])
+                  if self._should_fail(line["custom_id"])]
+        if not failed:
+            return
+        output = [line for line in self.file_lines(batch["output_file_id"]) if line not in failed]
+        errors = self.file_lines(batch["error_file_id"]) + [
+            {"id": line["id"], "custom_id": line["custom_id"], "response": None,
+             "error": {"code": "server_error", "message": "Injected failure"}}
+            for line in failed]
+        batch["output_file_id"] = self._store_file(output, "batch_output")
+        batch["error_file_id"] = self._store_file(errors, "batch_output")
+        batch["request_counts"] = {"total": len(output) + len(errors), "completed": len(output),
+                                   "failed": len(errors)}
+
+    def _should_fail(self, custom_id):
+        if custom_id not in self.fail:
+            return False
+        if self.fail[custom_id] is not None:
+            self.fail[custom_id] -= 1
+            if self.fail[custom_id] <= 0:
+                del self.fail[custom_id]
+        return True
+
+    def file_lines(self, file_id):
+        if not file_id:
+            return []
+        return [json.loads(line) for line in self.files[file_id]["content"].decode("utf-8").splitlines()
+                if line.strip()]
+
+    def batch_requests(self):
+        """custom_ids submitted in each batch, in submission order"""
+        return [[line["custom_id"] for line in self.file_lines(batch["input_file_id"])]
+                for batch in self.batches.values()]
+
+
+@pytest.fixture
+def mock(monkeypatch):
+    server = BatchMock().start()
+    monkeypatch.setenv("OPENAI_BASE_URL", server.base_url)
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-mock")
+    # The shared clients keep the base URL they were built with
+    for key in [k for k in logic.transport._clients
+                if isinstance(k, tuple) and k[0] in ("openai", "embeddings")]:
+        del logic.transport._clients[key]
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def client(mock):
+    return logic.get_openai_client()
+
+
+@pytest.fixture
+def local_stores(tmp_path, monkeypatch):
+    """Point the extraction cache and the result store at empty databases in tmp_path"""
+    monkeypatch.setattr(logic, "_extraction_cache", ResultCache(str(tmp_path / "cache.db"),
+                                                                namespace="extraction"))
+    monkeypatch.setattr(logic, "_result_store", ResultStore(str(tmp_path / "results.db")))
+
+
+@pytest.fixture
+def write_docx():
+    def write(path, lines):
+        import docx
+
+        document = docx.Document()
+        for line in lines:
+            document.add_paragraph(line)
+        document.save(str(path))
+        return str(path)
+    return write
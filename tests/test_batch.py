@@ -0,0 +1,49 @@
+"""Batch screening against benchmarks/mock_openai.py"""
+import json
+
+import pytest
+
+import batch
+import logic
+from embedding_cache import EmbeddingCache
+
+
+@pytest.fixture
+def skill_index(mock, tmp_path, monkeypatch):
+    """A skill taxonomy index embedded by the mock server, with embeddings cached in tmp_path"""
+    monkeypatch.setitem(logic.transport._clients, "embedding_cache",
+                        EmbeddingCache(str(tmp_path / "embeddings.db")))
+    monkeypatch.setattr(logic, "_skill_vector_store", logic.create_skill_vector_store())
+
+
+@pytest.fixture
+def documents(tmp_path, write_docx):
+    jd_path = write_docx(tmp_path / "jd.docx", ["Data Engineer", "Requirements: Python, AWS"])
+    resumes = [write_docx(tmp_path / f"resume_{i}.docx", [f"Candidate {i}", "Skills: Python"])
+               for i in range(6)]
+    return jd_path, resumes
+
+
+def read_records(path):
+    return [json.loads(line) for line in path.read_text().splitlines() if line.strip()]
+
+
+def test_token_budget_exhausted_mid_batch_stops_the_run(local_stores, skill_index, documents,
+                                                        tmp_path):
+    jd_path, resumes = documents
+    output = tmp_path / "results.jsonl"
+    # Enough for the JD and a couple of resumes: each one costs an extraction and a scoring call
+    args = [jd_path, *resumes, "-o", str(output), "-j", "1", "--extract-workers", "1"]
+    assert batch.main(args + ["--token-budget", "3000"]) == 2
+
+    written = read_records(output)
+    assert 0 < len(written) < len(resumes)
+    # Only finished screenings are written; the rest are left for the rerun
+    assert all("error" not in record for record in written)
+
+    assert batch.main(args) is None
+    rerun = read_records(output)
+    assert sorted(record["resume_path"] for record in rerun) == sorted(resumes)
+    assert all("error" not in record for record in rerun)
+    # The rerun kept the screenings that finished before the budget ran out
+    assert all(record in rerun for record in written)
@@ -0,0 +1,153 @@
+"""Bulk mode against the files and batches endpoints of benchmarks/mock_openai.py"""
+import json
+
+import pytest
+
+import bulk
+import logic
+
+
+def extraction_requests(count):
+    return {f"extract-doc{i}": logic.build_extraction_request(f"Resume {i}: Python, AWS", None)
+            for i in range(count)}
+
+
+def test_run_stage_submits_and_polls_until_complete(mock, client, tmp_path):
+    mock.polls_before_done = 2
+    results, errors = bulk.run_stage(client, "extract", extraction_requests(3),
+                                     logic.parse_extraction_response, str(tmp_path), poll_interval=0)
+
+    assert errors == {}
+    assert sorted(results) == ["extract-doc0", "extract-doc1", "extract-doc2"]
+    assert all("technical_skills" in profile for profile in results.values())
+    assert mock.batch_requests() == [["extract-doc0", "extract-doc1", "extract-doc2"]]
+    batch = next(iter(mock.batches.values()))
+    assert batch["endpoint"] == bulk.BATCH_ENDPOINT
+    assert batch["completion_window"] == "24h"
+    assert mock._polls[batch["id"]] == 2
+
+    state = json.loads((tmp_path / "state.json").read_text())
+    assert state["extract"]["attempt"] == 1
+    assert state["extract"]["batch_ids"] == [batch["id"]]
+    assert state["extract"]["in_flight"] == []
+
+
+def test_run_stage_resubmits_only_failed_requests(mock, client, tmp_path):
+    mock.fail = {"extract-doc1": 1, "extract-doc3": 1}
+    results, errors = bulk.run_stage(client, "extract", extraction_requests(4),
+                                     logic.parse_extraction_response, str(tmp_path), poll_interval=0)
+
+    assert errors == {}
+    assert len(results) == 4
+    assert mock.batch_requests() == [["extract-doc0", "extract-doc1", "extract-doc2", "extract-doc3"],
+                                     ["extract-doc1", "extract-doc3"]]
+
+
+def test_run_stage_retries_unparseable_replies(mock, client, tmp_path):
+    replies = []
+
+    def parse_once_bad(content):
+        # The first reply is treated as malformed
+        replies.append(content)
+        if len(replies) == 1:
+            return {"error": "Malformed reply"}
+        return logic.parse_extraction_response(content)
+
+    requests = extraction_requests(1)
+    results, errors = bulk.run_stage(client, "extract", requests, parse_once_bad, str(tmp_path),
+                                     poll_interval=0)
+
+    assert errors == {}
+    assert list(results) == ["extract-doc0"]
+    assert len(mock.batches) == 2
+
+
+def test_run_stage_reports_requests_that_fail_every_attempt(mock, client, tmp_path):
+    mock.fail = {"extract-doc0": None}
+    results, errors = bulk.run_stage(client, "extract", extraction_requests(2),
+                                     logic.parse_extraction_response, str(tmp_path),
+                                     max_attempts=2, poll_interval=0)
+
+    assert list(results) == ["extract-doc1"]
+    assert errors == {"extract-doc0": "Injected failure"}
+    assert mock.batch_requests() == [["extract-doc0", "extract-doc1"], ["extract-doc0"]]
+
+
+def test_run_stage_resumes_in_flight_batch_from_state(mock, client, tmp_path, monkeypatch):
+    requests = extraction_requests(2)
+
+    def interrupted(*args, **kwargs):
+        raise KeyboardInterrupt
+
+    with monkeypatch.context() as m:
+        m.setattr(bulk, "wait_for_batch", interrupted)
+        with pytest.raises(KeyboardInterrupt):
+            bulk.run_stage(client, "extract", requests, logic.parse_extraction_response,
+                           str(tmp_path), poll_interval=0)
+    state = json.loads((tmp_path / "state.json").read_text())
+    assert len(state["extract"]["in_flight"]) == 1
+
+    results, errors = bulk.run_stage(client, "extract", requests, logic.parse_extraction_response,
+                                     str(tmp_path), poll_interval=0)
+    assert errors == {}
+    assert len(results) == 2
+    # The rerun collected the batch the interrupted run submitted instead of paying again
+    assert len(mock.batches) == 1
+    assert state["extract"]["in_flight"] == list(mock.batches)
+
+    # Finished results are reused; a different request set is a new job
+    bulk.run_stage(client, "extract", requests, logic.parse_extraction_response, str(tmp_path),
+                   poll_interval=0)
+    assert len(mock.batches) == 1
+    bulk.run_stage(client, "extract", extraction_requests(3), logic.parse_extraction_response,
+                   str(tmp_path), poll_interval=0)
+    assert len(mock.batches) == 2
+
+
+def test_run_bulk_reconciles_and_escalates(mock, local_stores, write_docx, tmp_path, monkeypatch):
+    # Skill context retrieval is not part of the Batch API flow
+    monkeypatch.setattr(bulk, "prefetch_skill_contexts", lambda texts, use_cache=True: [None] * len(texts))
+    monkeypatch.setattr(logic, "FIRST_PASS_MODEL", "gpt-4o-mini")
+    monkeypatch.setattr(logic, "SCORING_MODEL", "gpt-4o")
+
+    jd_path = write_docx(tmp_path / "jd.docx", ["Data Engineer", "Requirements: Python, AWS"])
+    resumes = [write_docx(tmp_path / f"resume_{i}.docx", [f"Candidate {i}", "Skills: Python"])
+               for i in range(5)]
+    broken = bulk.document_id(resumes[4])
+    mock.fail = {f"extract-{broken}": None}
+
+    output = tmp_path / "ranked.jsonl"
+    ranked = bulk.run_bulk(jd_path, resumes, str(output), work_dir=str(tmp_path / "work"),
+                           max_attempts=2, poll_interval=0, extract_workers=1)
+
+    # Extraction, its resubmission of the failing resume, first-pass scoring, escalation
+    stages = [{cid.split("-", 1)[0] for cid in ids} for ids in mock.batch_requests()]
+    assert stages == [{"extract"}, {"extract"}, {"compare"}, {"compare"}]
+    assert mock.batch_requests()[1] == [f"extract-{broken}"]
+    compare_batch, escalate_batch = mock.batch_requests()[2:]
+    assert len(compare_batch) == 4
+    # Replies rotate through the fixture scores 78.5, 54, 22 and 31.5; the two within
+    # ESCALATION_BAND of a tier threshold are rescored by the large model
+    assert len(escalate_batch) == 2
+    escalated = {cid.rsplit("-", 1)[1] for cid in escalate_batch}
+    first_pass, escalation = [mock.batches[batch_id] for batch_id in list(mock.batches)[2:]]
+    assert {line["body"]["model"] for line in mock.file_lines(first_pass["input_file_id"])} == {"gpt-4o-mini"}
+    assert {line["body"]["model"] for line in mock.file_lines(escalation["input_file_id"])} == {"gpt-4o"}
+
+    by_path = {record["resume_path"]: record for record in ranked}
+    assert set(by_path) == set(resumes)
+    for path in resumes[:4]:
+        record = by_path[path]
+        assert record["candidate_id"] == bulk.document_id(path)
+        assert record["jd_id"] == bulk.document_id(jd_path)
+        assert "error" not in record
+        expected = "gpt-4o" if record["candidate_id"] in escalated else "gpt-4o-mini"
+        assert record["scoring_model"] == expected
+    failed = by_path[resumes[4]]
+    assert failed["error"] == "Extraction failed: Injected failure"
+    assert failed["overall_score"] == 0
+
+    scores = [record["overall_score"] for record in ranked]
+    assert scores == sorted(scores, reverse=True)
+    assert [json.loads(line)["resume_path"] for line in output.read_text().splitlines()] == \
+        [record["resume_path"] for record in ranked]
@@ -0,0 +1,20 @@
+"""API key resolution"""
+import pytest
+
+from config import resolve_api_key
+
+
+def test_key_file(tmp_path, monkeypatch):
+    key_file = tmp_path / "openai.key"
+    key_file.write_text("sk-from-file\n")
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    monkeypatch.setenv("OPENAI_API_KEY_FILE", str(key_file))
+    assert resolve_api_key() == "sk-from-file"
+
+
+def test_missing_key_file_is_a_config_error(tmp_path, monkeypatch):
+    missing = tmp_path / "missing.key"
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    monkeypatch.setenv("OPENAI_API_KEY_FILE", str(missing))
+    with pytest.raises(RuntimeError, match=str(missing)):
+        resolve_api_key()
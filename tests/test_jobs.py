@@ -0,0 +1,77 @@
+"""Job queue retention"""
+import os
+import time
+
+from jobs import JobQueue, WorkerPool
+
+DAY = 24 * 3600
+
+
+def age(queue, job_id, path, seconds):
+    """Backdate a finished job and its upload by seconds"""
+    past = time.time() - seconds
+    queue._conn.execute("UPDATE jobs SET finished_at = ? WHERE id = ?", (past, job_id))
+    os.utime(path, (past, past))
+
+
+def enqueue(queue, resume, jd):
+    resume_hash, resume_path = queue.store_file(resume, "resume.pdf")
+    jd_hash, jd_path = queue.store_file(jd, "jd.pdf")
+    job_id = queue.enqueue({"resume_path": resume_path, "jd_path": jd_path,
+                            "resume_sha256": resume_hash, "jd_sha256": jd_hash})
+    return job_id, resume_path, jd_path
+
+
+def test_prune_deletes_old_jobs_and_unused_uploads(tmp_path):
+    queue = JobQueue(str(tmp_path / "queue.sqlite3"), str(tmp_path / "files"))
+    old_job, old_resume, shared_jd = enqueue(queue, b"old resume", b"jd")
+    new_job, new_resume, _ = enqueue(queue, b"new resume", b"jd")
+    running_job, running_resume, _ = enqueue(queue, b"running resume", b"jd")
+    queue.finish(old_job, result={})
+    queue.finish(new_job, result={})
+    age(queue, old_job, old_resume, 8 * DAY)
+    age(queue, new_job, new_resume, 1 * DAY)
+    os.utime(shared_jd, (time.time() - 8 * DAY,) * 2)
+    os.utime(running_resume, (time.time() - 8 * DAY,) * 2)
+    # An upload whose job is not enqueued yet, and one left behind long ago
+    _, fresh_upload = queue.store_file(b"just uploaded", "resume.docx")
+    _, orphan = queue.store_file(b"orphan", "resume.docx")
+    os.utime(orphan, (time.time() - 8 * DAY,) * 2)
+
+    assert queue.prune(7 * DAY) == {"jobs": 1, "files": 2}
+
+    assert queue.get(old_job) is None
+    assert queue.get(new_job) is not None
+    assert queue.get(running_job) is not None
+    assert not os.path.exists(old_resume) and not os.path.exists(orphan)
+    # Still used by the remaining jobs, or too recent to be an orphan
+    for path in (new_resume, running_resume, shared_jd, fresh_upload):
+        assert os.path.exists(path)
+
+
+def test_reupload_restarts_the_retention_clock(tmp_path):
+    queue = JobQueue(str(tmp_path / "queue.sqlite3"), str(tmp_path / "files"))
+    _, path = queue.store_file(b"resume", "resume.pdf")
+    os.utime(path, (time.time() - 8 * DAY,) * 2)
+    queue.store_file(b"resume", "resume.pdf")
+    assert queue.prune(7 * DAY) == {"jobs": 0, "files": 0}
+    assert queue.prune(0) == {"jobs": 0, "files": 0}
+    assert os.path.exists(path)
+
+
+def test_worker_pool_prunes_on_start(tmp_path):
+    queue = JobQueue(str(tmp_path / "queue.sqlite3"), str(tmp_path / "files"))
+    job_id, resume, jd = enqueue(queue, b"resume", b"jd")
+    queue.finish(job_id, error="failed")
+    age(queue, job_id, resume, 2 * DAY)
+    os.utime(jd, (time.time() - 2 * DAY,) * 2)
+
+    pool = WorkerPool(queue, threads=0, retention=DAY).start()
+    try:
+        deadline = time.time() + 5
+        while os.listdir(tmp_path / "files") and time.time() < deadline:
+            time.sleep(0.05)
+    finally:
+        pool.stop()
+    assert queue.get(job_id) is None
+    assert os.listdir(tmp_path / "files") == []
@@ -0,0 +1,70 @@
+"""Deterministic parts of the local scoring engine"""
+import hashlib
+
+import pytest
+
+from scoring import degree_level, profile_years, score_locally
+
+
+class PhraseEmbeddings:
+    """Embeddings where equal phrases are identical and different ones nearly orthogonal"""
+
+    def embed_documents(self, texts):
+        return [list(hashlib.sha256(text.lower().encode("utf-8")).digest()) for text in texts]
+
+
+@pytest.mark.parametrize("qualification, level", [
+    ("MS in Computer Science", 3),
+    ("M.S. Computer Science", 3),
+    ("MS (Data Science)", 3),
+    ("MSc Data Science", 3),
+    ("Master's degree in Statistics", 3),
+    ("Masters in Physics", 3),
+    ("Master of Business Administration", 3),
+    ("MBA", 3),
+    ("B.E. Mechanical", 2),
+    ("BS in Physics", 2),
+    ("Bachelor's in Computer Science", 2),
+    ("Associate degree in Networking", 1),
+    ("Associate of Applied Science", 1),
+    ("PhD in Machine Learning", 4),
+])
+def test_degree_level_recognises_degrees(qualification, level):
+    assert degree_level([qualification]) == level
+
+
+@pytest.mark.parametrize("qualification", [
+    "MS Office",
+    "Proficient in MS Office and MS Excel",
+    "Scrum Master certification",
+    "Certified ScrumMaster",
+    "Mastercard internship",
+    "AWS Certified Solutions Architect – Associate",
+    "Hackathon Experience",
+])
+def test_degree_level_ignores_non_degrees(qualification):
+    assert degree_level([qualification]) == 0
+
+
+@pytest.mark.parametrize("profile, years", [
+    ({"years_of_experience": 6}, 6.0),
+    ({"years_of_experience": "5+ years"}, 5.0),
+    # Profiles without the field, or with it null, fall back to figures in the lists
+    ({"qualifications": ["B.Tech", "4 years of experience"]}, 4.0),
+    ({"years_of_experience": None, "technical_skills": ["Python (3 yrs)"]}, 3.0),
+    ({"years_of_experience": None, "qualifications": ["B.Tech"]}, None),
+])
+def test_profile_years(profile, years):
+    assert profile_years(profile) == years
+
+
+def test_experience_bonus_uses_extracted_years():
+    jd = {"technical_skills": ["Python"], "qualifications": [], "certifications": [],
+          "years_of_experience": 3}
+    resume = {"technical_skills": ["Python"], "qualifications": [], "certifications": [],
+              "years_of_experience": 5}
+    assert score_locally(resume, jd, PhraseEmbeddings())["score_breakdown"]["bonuses"] == 4.0
+    resume["years_of_experience"] = 12
+    assert score_locally(resume, jd, PhraseEmbeddings())["score_breakdown"]["bonuses"] == 10.0
+    resume["years_of_experience"] = None
+    assert score_locally(resume, jd, PhraseEmbeddings())["score_breakdown"]["bonuses"] == 0.0
@@ -0,0 +1,49 @@
+import functools
+import math
+
+# Rough characters-per-token ratio for English prose, used when tiktoken has no encoding
+CHARS_PER_TOKEN = 4
+
+
+@functools.lru_cache(maxsize=None)
+def _encoding(model):
+    try:
+        import tiktoken
+
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception:
+        # tiktoken missing, or its encoding files cannot be downloaded (offline workers)
+        return None
+
+
+def tokenizer_available(model="gpt-4o"):
+    """Whether counts for model are exact rather than estimated"""
+    return _encoding(model) is not None
+
+
+def count_tokens(text, model="gpt-4o"):
+    """Number of tokens text costs for model, estimated when no tokenizer is available"""
+    if not text:
+        return 0
+    encoding = _encoding(model)
+    if encoding is None:
+        return math.ceil(len(text) / CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_to_tokens(text, max_tokens, model="gpt-4o"):
+    """Cut text to at most max_tokens, preferring to end on a line boundary"""
+    if max_tokens <= 0:
+        return ""
+    if count_tokens(text, model) <= max_tokens:
+        return text
+    encoding = _encoding(model)
+    if encoding is None:
+        cut = text[:max_tokens * CHARS_PER_TOKEN]
+    else:
+        cut = encoding.decode(encoding.encode(text, disallowed_special=())[:max_tokens])
+    newline = cut.rfind("\n")
+    return cut[:newline] if newline > len(cut) // 2 else cut
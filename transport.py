@@ -0,0 +1,132 @@
+import asyncio
+import os
+import threading
+import weakref
+
+# Connection pool and timeout settings shared by every OpenAI call in the process
+OPENAI_TIMEOUT = float(os.environ.get("OPENAI_TIMEOUT", "120"))
+OPENAI_CONNECT_TIMEOUT = float(os.environ.get("OPENAI_CONNECT_TIMEOUT", "10"))
+OPENAI_MAX_RETRIES = int(os.environ.get("OPENAI_MAX_RETRIES", "5"))
+OPENAI_MAX_CONNECTIONS = int(os.environ.get("OPENAI_MAX_CONNECTIONS", "100"))
+OPENAI_MAX_KEEPALIVE = int(os.environ.get("OPENAI_MAX_KEEPALIVE", "20"))
+OPENAI_KEEPALIVE_EXPIRY = float(os.environ.get("OPENAI_KEEPALIVE_EXPIRY", "60"))
+
+_lock = threading.Lock()
+_clients = {}
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def _timeout():
+    import openai
+
+    return openai.Timeout(OPENAI_TIMEOUT, connect=OPENAI_CONNECT_TIMEOUT)
+
+
+def _limits():
+    import httpx
+
+    return httpx.Limits(
+        max_connections=OPENAI_MAX_CONNECTIONS,
+        max_keepalive_connections=OPENAI_MAX_KEEPALIVE,
+        keepalive_expiry=OPENAI_KEEPALIVE_EXPIRY
+    )
+
+
+def get_http_client():
+    """Process-wide pooled HTTP client, so keep-alive connections and TLS sessions are reused"""
+    import openai
+
+    with _lock:
+        if 'http' not in _clients:
+            _clients['http'] = openai.DefaultHttpxClient(limits=_limits(), timeout=_timeout())
+        return _clients['http']
+
+
+def _loop_clients():
+    # httpx async clients are bound to the loop they first ran on, and asyncio.run() in the
+    # CLI and app creates a fresh loop each time, so async clients are pooled per loop
+    import openai
+
+    loop = asyncio.get_running_loop()
+    with _lock:
+        if loop not in _async_clients:
+            _async_clients[loop] = {
+                'http': openai.DefaultAsyncHttpxClient(limits=_limits(), timeout=_timeout())
+            }
+        return _async_clients[loop]
+
+
+def get_client(api_key):
+    """Shared OpenAI client
+
+    The SDK retries connection errors, 408/409/429 and 5xx responses with exponential
+    backoff and jitter, and waits for the server's Retry-After when one is sent.
+    """
+    import openai
+
+    with _lock:
+        client = _clients.get(('openai', api_key))
+    if client is None:
+        client = openai.OpenAI(
+            api_key=api_key,
+            http_client=get_http_client(),
+            timeout=_timeout(),
+            max_retries=OPENAI_MAX_RETRIES
+        )
+        with _lock:
+            client = _clients.setdefault(('openai', api_key), client)
+    return client
+
+
+def get_async_client(api_key):
+    """AsyncOpenAI client for the running event loop, with the same pooling and retries"""
+    import openai
+
+    clients = _loop_clients()
+    with _lock:
+        if api_key not in clients:
+            clients[api_key] = openai.AsyncOpenAI(
+                api_key=api_key,
+                http_client=clients['http'],
+                timeout=_timeout(),
+                max_retries=OPENAI_MAX_RETRIES
+            )
+        return clients[api_key]
+
+
+def get_embedding_cache():
+    """Process-wide disk-backed embedding cache, reusable by any component that embeds text"""
+    from embedding_cache import EmbeddingCache
+
+    with _lock:
+        if 'embedding_cache' not in _clients:
+            _clients['embedding_cache'] = EmbeddingCache()
+        return _clients['embedding_cache']
+
+
+def get_embeddings(api_key, model):
+    """Shared, cache-backed LangChain embeddings client routed through the pooled HTTP client"""
+    from embedding_cache import CachedEmbeddings
+    from langchain_openai import OpenAIEmbeddings
+    from tokens import tokenizer_available
+
+    with _lock:
+        embeddings = _clients.get(('embeddings', api_key, model))
+    if embeddings is None:
+        embeddings = CachedEmbeddings(
+            OpenAIEmbeddings(
+                api_key=api_key,
+                model=model,
+                http_client=get_http_client(),
+                request_timeout=_timeout(),
+                max_retries=OPENAI_MAX_RETRIES,
+                # Pre-splitting long inputs needs tiktoken's encoding files; callers already
+                # cap query length, so workers without them send plain text instead
+                check_embedding_ctx_length=tokenizer_available(model)
+            ),
+            model,
+            get_embedding_cache()
+        )
+        with _lock:
+            embeddings = _clients.setdefault(('embeddings', api_key, model), embeddings)
+    return embeddings